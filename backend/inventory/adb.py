@@ -0,0 +1,101 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import psycopg
+from django.conf import settings
+from django.db import connections
+
+from .metrics import REGISTRY, Gauge
+from .middleware import record_query
+
+
+class AsyncPool:
+    """
+    Kleiner Pool von psycopg-AsyncConnections für die async Lesepfade unter ASGI.
+    Djangos async ORM reicht jede Query per sync_to_async an einen gemeinsamen
+    Thread weiter; hier laufen die Queries direkt auf dem Event-Loop.
+    Autocommit, nur Lesezugriffe; je Event-Loop ein eigener Satz Verbindungen.
+    """
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+        self._loop = None
+        self._idle = []
+        self._sem = None
+        self.size = 0
+        self.in_use = 0
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Verbindungen eines anderen (beendeten) Loops sind hier nicht nutzbar
+            self.size = getattr(settings, "ASYNC_DB_POOL_SIZE", 10)
+            self._loop, self._idle, self.in_use = loop, [], 0
+            self._sem = asyncio.Semaphore(self.size)
+
+    def _params(self) -> dict:
+        wrapper = connections[self.alias]
+        params = wrapper.get_connection_params()
+        params.pop("cursor_factory", None)  # synchroner Cursor aus Django
+        params["autocommit"] = True
+        return params
+
+    async def _connect(self):
+        conn = await psycopg.AsyncConnection.connect(**self._params())
+        if settings.USE_TZ:
+            await conn.execute("SELECT set_config('TimeZone', %s, false)", [connections[self.alias].timezone_name])
+        return conn
+
+    @asynccontextmanager
+    async def connection(self):
+        self._bind()
+        async with self._sem:
+            conn = self._idle.pop() if self._idle else None
+            if conn is None or conn.closed:
+                conn = await self._connect()
+            self.in_use += 1
+            try:
+                yield conn
+            except BaseException:
+                # Abbruch mitten in einer Query: Zustand unklar, Verbindung verwerfen
+                await conn.close()
+                raise
+            else:
+                self._idle.append(conn)
+            finally:
+                self.in_use -= 1
+
+    async def close(self):
+        """Freie Verbindungen schließen (Shutdown, Tests)."""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.close()
+
+
+pool = AsyncPool()
+
+
+async def execute(conn, sql: str, params=None):
+    """conn.execute mit Zurechnung zum laufenden Request (Server-Timing, N+1)."""
+    t0 = time.perf_counter()
+    try:
+        return await conn.execute(sql, params)
+    finally:
+        record_query(sql, time.perf_counter() - t0)
+
+
+async def fetchall(sql: str, params=None):
+    async with pool.connection() as conn:
+        cur = await execute(conn, sql, params)
+        return await cur.fetchall()
+
+
+async def fetchone(sql: str, params=None):
+    rows = await fetchall(sql, params)
+    return rows[0] if rows else None
+
+
+REGISTRY.register(Gauge(
+    "warehouse_async_db_pool", "Async-Pool dieses Workers (size, in_use, idle)", ("stat",),
+    fn=lambda: {("size",): pool.size, ("in_use",): pool.in_use, ("idle",): len(pool._idle)}))
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .bincodes import canonical_bin_code
+from .metrics import cache_hit
+from .models import Bin, Location
+from .utils_cache import current_version, bump_version
+
+BIN_KEY = "bins"
+
+
+class BinCache:
+    """
+    Prozesslokale Map normalisierter Bin-Codes -> (bin_id, location).
+    - (LOC, kanonischer Code) für die Form LOC-BIN
+    - kanonischer Code allein, MAIN bevorzugt (Default-Location)
+    Die Version in inventory_cacheversion wird höchstens alle
+    BIN_CACHE_CHECK_INTERVAL Sekunden geprüft, Treffer kosten keine Query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.checked_at = 0.0
+        self.locations = {}  # location_id -> (code, name)
+        self.by_loc = {}     # (loc_code, canon) -> (bin_id, location_id, code)
+        self.by_canon = {}   # canon -> (bin_id, location_id, code)
+
+    def load(self, version: int):
+        locations = {l["id"]: (l["code"], l["name"]) for l in Location.objects.values("id", "code", "name")}
+        rows = (Bin.objects
+                .values_list("id", "location_id", "code", "code_canonical", "location__code")
+                .order_by("location__code", "code", "id"))
+        by_loc, by_canon, in_main = {}, {}, {}
+        for bin_id, loc_id, code, canon, loc_code in rows:
+            entry = (bin_id, loc_id, code)
+            by_loc.setdefault((loc_code, canon), entry)
+            by_canon.setdefault(canon, entry)
+            if loc_code == "MAIN":
+                in_main.setdefault(canon, entry)
+        by_canon.update(in_main)
+        with self._lock:
+            self.locations, self.by_loc, self.by_canon = locations, by_loc, by_canon
+            self.version = version
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        interval = getattr(settings, "BIN_CACHE_CHECK_INTERVAL", 2.0)
+        if self.version is not None and now - self.checked_at < interval:
+            return
+        v = current_version(BIN_KEY)
+        self.checked_at = now
+        if v != self.version:
+            self.load(v)
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+
+    def lookup(self, code: str):
+        """Exakter Treffer für einen normalisierten Code als Bin (mit Location), sonst None."""
+        self.ensure_fresh()
+        parts = code.split('-')
+        entry = None
+        if len(parts) >= 4:
+            entry = self.by_loc.get((parts[0], canonical_bin_code("-".join(parts[1:]))))
+        if entry is None:
+            entry = self.by_canon.get(canonical_bin_code(code))
+        cache_hit("bins", entry is not None)
+        if entry is None:
+            return None
+        return self._instance(*entry)
+
+    def _instance(self, bin_id, loc_id, code):
+        loc_code, loc_name = self.locations[loc_id]
+        b = Bin.from_db("default", ["id", "location_id", "code", "code_canonical"],
+                        [bin_id, loc_id, code, canonical_bin_code(code)])
+        b.location = Location.from_db("default", ["id", "code", "name"], [loc_id, loc_code, loc_name])
+        return b
+
+
+bin_cache = BinCache()
+
+
+def schedule_invalidate():
+    """Nach Commit: Version bumpen, eigenen Cache verwerfen."""
+    def run():
+        bump_version(BIN_KEY)
+        bin_cache.invalidate()
+    transaction.on_commit(run)
@@ -0,0 +1,29 @@
+import re
+
+
+def bin_tokens(code: str):
+    """
+    Zerlegt einen Bin-Code in kanonische Teile:
+    Trenner (- _ Leerzeichen) und Buchstabe/Ziffer-Grenzen trennen,
+    Buchstaben groß, Zahlen ohne führende Nullen.
+      'A-01-01' / 'a 1 1' / 'A01-01'  ->  ['A', '1', '1']
+    """
+    out = []
+    for tok in re.findall(r"[A-Za-z]+|\d+", code or ""):
+        out.append(str(int(tok)) if tok.isdigit() else tok.upper())
+    return out
+
+
+def canonical_bin_code(code: str) -> str:
+    return "-".join(bin_tokens(code))
+
+
+def bin_components(code: str) -> dict:
+    """Gang/Regal/Ebene/Fach aus dem Code; alles ab dem 4. Teil landet im Fach."""
+    t = bin_tokens(code)
+    return {
+        "aisle": t[0] if len(t) > 0 else "",
+        "rack": t[1] if len(t) > 1 else "",
+        "level": t[2] if len(t) > 2 else "",
+        "slot": "-".join(t[3:]),
+    }
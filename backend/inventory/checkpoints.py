@@ -0,0 +1,109 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CheckpointRun, StockLedger
+
+# Tage erst abschließen, wenn auch späte Commits vom Tagesende sicher im Ledger stehen
+SAFETY_MARGIN = timedelta(minutes=10)
+
+# Bin-Delta aus dem Ledger: Zugang auf to_bin, Abgang von from_bin
+DELTA_SQL = """
+    SELECT item_id, bin_id, SUM(d) AS d FROM (
+        SELECT item_id, to_bin_id AS bin_id, qty AS d FROM inventory_stockledger
+        WHERE to_bin_id IS NOT NULL AND ts >= %s AND ts < %s {to_filter}
+        UNION ALL
+        SELECT item_id, from_bin_id, -qty FROM inventory_stockledger
+        WHERE from_bin_id IS NOT NULL AND ts >= %s AND ts < %s {from_filter}
+    ) x GROUP BY item_id, bin_id
+"""
+
+STEP_SQL = f"""
+    WITH delta AS ({DELTA_SQL.format(to_filter="", from_filter="")} HAVING SUM(d) <> 0)
+    INSERT INTO inventory_stockcheckpoint (day, item_id, bin_id, qty)
+    SELECT %s, d.item_id, d.bin_id, COALESCE(prev.qty, 0) + d.d
+    FROM delta d
+    LEFT JOIN LATERAL (
+        SELECT c.qty FROM inventory_stockcheckpoint c
+        WHERE c.item_id = d.item_id AND c.bin_id = d.bin_id AND c.day < %s
+        ORDER BY c.day DESC LIMIT 1
+    ) prev ON true;
+"""
+
+
+def day_start(day) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def build(until=None):
+    """
+    Checkpoints ab dem letzten Lauf bis einschließlich `until` (Standard: gestern)
+    fortschreiben. Jeder Tag liest nur seinen eigenen ts-Bereich (eine Ledger-Partition).
+    Liefert [(day, geänderte Bins)].
+    """
+    last = CheckpointRun.objects.order_by("-day").first()
+    if last:
+        day, lower = last.day + timedelta(days=1), last.cutoff
+    else:
+        first = StockLedger.objects.order_by("ts").values_list("ts", flat=True).first()
+        if first is None:
+            return []
+        day = timezone.localtime(first).date()
+        lower = day_start(day)
+
+    latest = timezone.localtime(timezone.now() - SAFETY_MARGIN).date() - timedelta(days=1)
+    until = min(until, latest) if until else latest
+    done = []
+    while day <= until:
+        cutoff = day_start(day + timedelta(days=1))
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute(STEP_SQL, [lower, cutoff, lower, cutoff, day, day])
+            changed = cur.rowcount
+            CheckpointRun.objects.create(day=day, cutoff=cutoff, changed=changed)
+        done.append((day, changed))
+        day, lower = day + timedelta(days=1), cutoff
+    return done
+
+
+def stock_as_of(at: datetime, item_id=None, bin_id=None):
+    """
+    Bin-Bestände zum Zeitpunkt `at`: jüngster Checkpoint <= at plus Ledger-Delta seitdem.
+    Mindestens item_id oder bin_id angeben. Liefert (checkpoint_day, [(item_id, bin_id, qty)]).
+    """
+    run = CheckpointRun.objects.filter(cutoff__lte=at).order_by("-day").first()
+    lower = run.cutoff if run else day_start(date(1970, 1, 1))
+
+    base_where, base_params = [], []
+    to_filter = from_filter = ""
+    if item_id is not None:
+        base_where.append("item_id = %s")
+        base_params.append(item_id)
+        to_filter = from_filter = "AND item_id = %s"
+    if bin_id is not None:
+        base_where.append("bin_id = %s")
+        base_params.append(bin_id)
+        to_filter += " AND to_bin_id = %s"
+        from_filter += " AND from_bin_id = %s"
+    filter_params = [p for p in (item_id, bin_id) if p is not None]
+    delta_params = [lower, at, *filter_params, lower, at, *filter_params]
+
+    parts, params = [], []
+    if run:
+        parts.append(f"""
+            SELECT DISTINCT ON (item_id, bin_id) item_id, bin_id, qty AS d
+            FROM inventory_stockcheckpoint
+            WHERE day <= %s {"".join(" AND " + w for w in base_where)}
+            ORDER BY item_id, bin_id, day DESC
+        """)
+        params += [run.day, *base_params]
+    parts.append(DELTA_SQL.format(to_filter=to_filter, from_filter=from_filter))
+    params += delta_params
+
+    with connection.cursor() as cur:
+        cur.execute(f"""
+            SELECT item_id, bin_id, SUM(d) FROM ({" UNION ALL ".join(f"({p})" for p in parts)}) s
+            GROUP BY item_id, bin_id HAVING SUM(d) <> 0
+            ORDER BY item_id, bin_id;
+        """, params)
+        return (run.day if run else None), cur.fetchall()
@@ -0,0 +1,148 @@
+import csv
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import adb
+from .middleware import record_query
+from .models import StockLedger, Inventory
+
+CHUNK_SIZE = 5000          # Zeilen je Fetch aus dem Server-Side-Cursor
+FLUSH_BYTES = 64 * 1024    # Ausgabe in ~64 KB-Blöcken statt Zeile für Zeile
+# Offene Transaktionen können noch Buchungen mit älterem ts committen;
+# der Export endet daher standardmäßig kurz vor "jetzt", damit kein Wasserzeichen etwas überspringt.
+LEDGER_EXPORT_LAG = timedelta(seconds=30)
+
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+LEDGER_COLUMNS = ("id", "ts", "sku", "from_location", "from_bin", "to_location", "to_bin",
+                  "qty", "ref_type", "ref_id")
+LEDGER_FIELDS = ("id", "ts", "item__sku", "from_bin__location__code", "from_bin__code",
+                 "to_bin__location__code", "to_bin__code", "qty", "ref_type", "ref_id")
+
+INVENTORY_COLUMNS = ("id", "sku", "location", "bin", "qty")
+INVENTORY_FIELDS = ("id", "item__sku", "bin__location__code", "bin__code", "qty")
+
+
+def ledger_rows(since_ts=None, since_id=None, until_ts=None, limit=None):
+    """
+    Ledger aufsteigend nach (ts, id). Wasserzeichen (since_ts, since_id) ist exklusiv:
+    der Client merkt sich ts und id der letzten Zeile und setzt dort fort.
+    Liefert das values_list-QuerySet; gelesen wird erst in streaming_export.
+    """
+    qs = StockLedger.objects.order_by("ts", "id")
+    if since_ts is not None and since_id is not None:
+        qs = qs.filter(Q(ts__gt=since_ts) | Q(ts=since_ts, id__gt=since_id))
+    elif since_ts is not None:
+        qs = qs.filter(ts__gt=since_ts)
+    elif since_id is not None:
+        qs = qs.filter(id__gt=since_id)
+    qs = qs.filter(ts__lt=until_ts or timezone.now() - LEDGER_EXPORT_LAG)
+    qs = qs.values_list(*LEDGER_FIELDS)
+    if limit:
+        qs = qs[:limit]
+    return qs
+
+
+def inventory_rows(limit=None):
+    """
+    Bestandszeilen nach id, immer als Vollabzug (ein Statement = konsistenter Snapshot).
+    Kein Wasserzeichen: Mengen ändern sich in bestehenden Zeilen, Deltas liefert der Ledger-Export.
+    """
+    qs = Inventory.objects.order_by("id").values_list(*INVENTORY_FIELDS)
+    if limit:
+        qs = qs[:limit]
+    return qs
+
+
+def _cell(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if v is None or isinstance(v, (int, str)):
+        return v
+    return str(v)  # Decimal ohne Rundung
+
+
+class _Echo:
+    """Pseudo-Datei für csv.writer: gibt die geschriebene Zeile direkt zurück."""
+    def write(self, value):
+        return value
+
+
+def _render(columns, fmt):
+    """Kopfzeile ("" bei NDJSON) und Formatierer Zeile -> Text."""
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        return writer.writerow(columns), lambda row: writer.writerow([_cell(v) for v in row])
+    return "", lambda row: json.dumps(dict(zip(columns, map(_cell, row))), ensure_ascii=False) + "\n"
+
+
+def _chunks(rows, columns, fmt):
+    head, line = _render(columns, fmt)
+    buf, size = [head], len(head)
+    for row in rows:
+        text = line(row)
+        buf.append(text)
+        size += len(text)
+        if size >= FLUSH_BYTES:
+            yield "".join(buf)
+            buf, size = [], 0
+    if size:
+        yield "".join(buf)
+
+
+async def _achunks(rows, columns, fmt):
+    """Wie _chunks, für einen async Zeilen-Iterator."""
+    head, line = _render(columns, fmt)
+    buf, size = [head], len(head)
+    async for row in rows:
+        text = line(row)
+        buf.append(text)
+        size += len(text)
+        if size >= FLUSH_BYTES:
+            yield "".join(buf)
+            buf, size = [], 0
+    if size:
+        yield "".join(buf)
+
+
+async def aiter_rows(qs):
+    """
+    Async-Gegenstück zu qs.iterator(): dasselbe SQL über einen Server-Side-Cursor auf dem
+    Async-Pool, CHUNK_SIZE Zeilen je Fetch. Die Transaktion hält den Snapshot über den ganzen Export.
+    """
+    sql, params = qs.query.sql_with_params()
+    async with adb.pool.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor(name=f"export_{uuid.uuid4().hex}") as cur:
+                t0 = time.perf_counter()
+                try:
+                    await cur.execute(sql, params)
+                finally:
+                    record_query(sql, time.perf_counter() - t0)
+                while rows := await cur.fetchmany(CHUNK_SIZE):
+                    for row in rows:
+                        yield row
+
+
+def streaming_export(qs, columns, fmt: str, name: str, asynchronous=None) -> StreamingHttpResponse:
+    """
+    Unter ASGI (ASYNC_READ_VIEWS) ein async Iterator – ein synchroner würde von Django
+    per sync_to_async(list) komplett gepuffert. Unter WSGI der Server-Side-Cursor des ORM.
+    """
+    if asynchronous is None:
+        asynchronous = settings.ASYNC_READ_VIEWS
+    if asynchronous:
+        content = _achunks(aiter_rows(qs), columns, fmt)
+    else:
+        content = _chunks(qs.iterator(chunk_size=CHUNK_SIZE), columns, fmt)
+    resp = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    resp["Content-Disposition"] = f'attachment; filename="{name}.{fmt}"'
+    resp["Cache-Control"] = "no-store"
+    return resp
@@ -0,0 +1,206 @@
+import threading
+from array import array
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from rapidfuzz import process, fuzz
+
+from .metrics import cache_hit
+from .models import Item, ItemAlias
+from .phonetics import PhoneticIndex, normalize_text
+from .utils_cache import current_version, acurrent_version, bump_version
+
+INDEX_KEY = "fuzzy_items"
+BATCH_CHUNK = 32  # Queries pro cdist-Aufruf (begrenzt die Score-Matrix im Speicher)
+
+
+class FuzzyItemIndex:
+    """
+    Prozessweiter Index über SKU, Name und Aliase.
+    - wird einmal geladen und per Signal inkrementell gepflegt
+    - Version in inventory_cacheversion: andere Worker merken, wenn sie veraltet sind
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.version = None
+        self.items = {}     # item_id -> (sku, name)
+        self.aliases = {}   # alias_id -> (item_id, alias)
+        self._texts = []
+        self._item_ids = array("q")
+        self._phonetic = None
+        self._dirty = True
+
+    # ---- Laden / Versionierung ----
+
+    def load(self, version: int):
+        items = {i["id"]: (i["sku"], i["name"]) for i in Item.objects.values("id", "sku", "name")}
+        aliases = {a["id"]: (a["item_id"], a["alias"]) for a in ItemAlias.objects.values("id", "item_id", "alias")}
+        with self._lock:
+            self.items = items
+            self.aliases = aliases
+            self.version = version
+            self._dirty = True
+
+    def ensure_fresh(self):
+        v = current_version(INDEX_KEY)
+        cache_hit("fuzzy_items", v == self.version)
+        if v != self.version:
+            self.load(v)
+
+    async def aensure_fresh(self):
+        v = await acurrent_version(INDEX_KEY)
+        cache_hit("fuzzy_items", v == self.version)
+        if v != self.version:
+            await sync_to_async(self.load)(v)
+
+    def apply_change(self, new_version: int, change):
+        """
+        Eigene Änderung einspielen. Passt die Version nicht lückenlos
+        (anderer Worker hat dazwischen gebucht), wird beim nächsten Zugriff neu geladen.
+        """
+        with self._lock:
+            if self.version is not None and new_version == self.version + 1:
+                change(self)
+                self.version = new_version
+            else:
+                self.version = None
+
+    # ---- Inkrementelle Pflege ----
+
+    def upsert_item(self, item_id: int, sku: str, name: str):
+        self.items[item_id] = (sku, name)
+        self._dirty = True
+
+    def remove_item(self, item_id: int):
+        self.items.pop(item_id, None)
+        self.aliases = {k: v for k, v in self.aliases.items() if v[0] != item_id}
+        self._dirty = True
+
+    def upsert_alias(self, alias_id: int, item_id: int, alias: str):
+        self.aliases[alias_id] = (item_id, alias)
+        self._dirty = True
+
+    def remove_alias(self, alias_id: int):
+        self.aliases.pop(alias_id, None)
+        self._dirty = True
+
+    # ---- Suche ----
+
+    def choices(self):
+        """Liefert (texts, item_ids) – wird nur nach Änderungen neu aufgebaut."""
+        with self._lock:
+            if self._dirty:
+                texts, ids = [], array("q")
+                for item_id, (sku, _name) in self.items.items():
+                    if sku:
+                        texts.append(str(sku)); ids.append(item_id)
+                for item_id, (_sku, name) in self.items.items():
+                    if name:
+                        texts.append(str(name)); ids.append(item_id)
+                for item_id, alias in self.aliases.values():
+                    if alias:
+                        texts.append(str(alias)); ids.append(item_id)
+                self._texts, self._item_ids = texts, ids
+                self._phonetic = None
+                self._dirty = False
+            return self._texts, self._item_ids
+
+    def phonetic(self):
+        """Phonetik-Index über dieselben Entries, lazy nach jedem Neuaufbau."""
+        with self._lock:
+            texts, item_ids = self.choices()
+            if self._phonetic is None:
+                self._phonetic = PhoneticIndex(texts)
+            return self._phonetic, item_ids
+
+    def candidates(self, q: str, limit: int = 5):
+        self.ensure_fresh()
+        return self.search(q, limit)
+
+    async def acandidates(self, q: str, limit: int = 5):
+        """Async: Versionsprüfung ohne Thread, Scoring (CPU) im Executor statt auf dem Event-Loop."""
+        await self.aensure_fresh()
+        return await sync_to_async(self.search, thread_sensitive=False)(q, limit)
+
+    def search(self, q: str, limit: int = 5):
+        """Suche auf dem geladenen Stand, ohne DB-Zugriff."""
+        if getattr(settings, "FUZZY_ENGINE", "memory") == "phonetic":
+            out = self.candidates_phonetic(q, limit)
+            if out:
+                return out
+        return self.candidates_full(q, limit)
+
+    def candidates_phonetic(self, q: str, limit: int = 5):
+        """
+        Vorauswahl über Kölner Phonetik (inkl. Zahlwort-Normalisierung),
+        WRatio nur auf der Shortlist der normalisierten Texte.
+        """
+        phon, item_ids = self.phonetic()
+        shortlist = phon.narrow(q, getattr(settings, "FUZZY_PHONETIC_SHORTLIST", 200))
+        if not len(shortlist):
+            return []
+        sub = [phon.norm[i] for i in shortlist]
+        results = process.extract(normalize_text(q), sub, scorer=fuzz.WRatio, limit=limit * 3)
+        return self.collect(((item_ids[shortlist[idx]], score) for _text, score, idx in results), limit)
+
+    def candidates_full(self, q: str, limit: int = 5):
+        texts, item_ids = self.choices()
+        if not texts:
+            return []
+        results = process.extract(q, texts, scorer=fuzz.WRatio, limit=limit * 3)
+        return self.collect(((item_ids[idx], score) for _text, score, idx in results), limit)
+
+    def candidates_batch(self, queries, limit: int = 5):
+        """
+        Mehrere Queries in einem Rutsch: ein process.cdist je Chunk über das
+        vorgebaute Choice-Array, multi-threaded über FUZZY_WORKERS.
+        """
+        self.ensure_fresh()
+        texts, item_ids = self.choices()
+        if not texts:
+            return [[] for _ in queries]
+
+        workers = getattr(settings, "FUZZY_WORKERS", -1)
+        k = min(limit * 3, len(texts))
+        ids = np.frombuffer(item_ids, dtype=np.int64)
+        out = []
+        for start in range(0, len(queries), BATCH_CHUNK):
+            chunk = queries[start:start + BATCH_CHUNK]
+            scores = process.cdist(chunk, texts, scorer=fuzz.WRatio, dtype=np.float32, workers=workers)
+            for row in scores:
+                top = np.argpartition(row, -k)[-k:]
+                top = top[np.lexsort((top, -row[top]))]  # Score absteigend, bei Gleichstand Index
+                out.append(self.collect(zip(ids[top].tolist(), row[top].tolist()), limit))
+        return out
+
+    def collect(self, scored, limit: int):
+        """(item_id, score)-Paare -> Kandidatenliste, je Item nur einmal."""
+        seen, out = set(), []
+        for item_id, score in scored:
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            info = self.items.get(item_id)
+            if not info:
+                continue
+            out.append({
+                "sku": info[0],
+                "name": info[1],
+                "score": round(float(score) / 100.0, 3),
+            })
+            if len(out) >= limit:
+                break
+        return out
+
+
+fuzzy_index = FuzzyItemIndex()
+
+
+def schedule_change(change):
+    """Nach Commit: Version bumpen und Änderung lokal einspielen."""
+    def run():
+        fuzzy_index.apply_change(bump_version(INDEX_KEY), change)
+    transaction.on_commit(run)
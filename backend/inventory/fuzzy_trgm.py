@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.db import connection, transaction
+from rapidfuzz import process, fuzz
+
+from . import adb
+
+# Schwelle nur für die laufende Transaktion: Verbindungen (persistent bzw. Async-Pool)
+# werden wiederverwendet, ein Session-Setting bliebe für fremde Queries stehen
+THRESHOLD_SQL = "SELECT set_config('pg_trgm.similarity_threshold', %s, true);"
+
+# Treffer über SKU, Name und Aliase für den Suchtext {q}
+_MATCHES = """
+        SELECT id AS item_id, sku AS txt, similarity(sku, {q}) AS sim
+          FROM inventory_item WHERE sku %% {q}
+        UNION ALL
+        SELECT id, name, similarity(name, {q})
+          FROM inventory_item WHERE name %% {q}
+        UNION ALL
+        SELECT item_id, alias, similarity(alias, {q})
+          FROM inventory_itemalias WHERE alias %% {q}
+"""
+
+CANDIDATES_SQL = f"""
+    SELECT c.txt, i.id, i.sku, i.name
+    FROM ({_MATCHES.format(q="%(q)s")}) c
+    JOIN inventory_item i ON i.id = c.item_id
+    ORDER BY c.sim DESC
+    LIMIT %(n)s;
+"""
+
+# Alle Zeilen eines Batches in einer Query: je Suchtext die Top-N per LATERAL
+BATCH_SQL = f"""
+    SELECT q.n, c.txt, i.id, i.sku, i.name
+    FROM unnest(%(qs)s::text[]) WITH ORDINALITY AS q(qtext, n)
+    CROSS JOIN LATERAL (
+        SELECT m.item_id, m.txt
+        FROM ({_MATCHES.format(q="q.qtext")}) m
+        ORDER BY m.sim DESC
+        LIMIT %(n)s
+    ) c
+    JOIN inventory_item i ON i.id = c.item_id;
+"""
+
+
+def _settings():
+    return (getattr(settings, "FUZZY_TRGM_CANDIDATES", 300),
+            str(getattr(settings, "FUZZY_TRGM_THRESHOLD", 0.2)))
+
+
+def trgm_candidates(q: str, limit: int = 5):
+    """
+    Postgres-Variante von fuzzy_candidates:
+    pg_trgm (GIN-Index) holt die Top-N Entries, WRatio rerankt nur diese.
+    Kein Katalog im Worker-Speicher.
+    """
+    fetch, threshold = _settings()
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(THRESHOLD_SQL, [threshold])
+        cur.execute(CANDIDATES_SQL, {"q": q, "n": fetch})
+        rows = cur.fetchall()
+    return rerank(q, rows, limit)
+
+
+def trgm_candidates_batch(queries, limit: int = 5):
+    """trgm_candidates für viele Suchtexte mit einem Roundtrip; Ergebnis in Eingabereihenfolge."""
+    if not queries:
+        return []
+    fetch, threshold = _settings()
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(THRESHOLD_SQL, [threshold])
+        cur.execute(BATCH_SQL, {"qs": list(queries), "n": fetch})
+        rows = cur.fetchall()
+    by_query = [[] for _ in queries]
+    for n, *row in rows:
+        by_query[n - 1].append(row)
+    return [rerank(q, found, limit) for q, found in zip(queries, by_query)]
+
+
+async def atrgm_candidates(q: str, limit: int = 5):
+    """trgm_candidates über den Async-Pool; Schwelle und Suche in derselben Transaktion."""
+    fetch, threshold = _settings()
+    async with adb.pool.connection() as conn, conn.transaction():
+        await adb.execute(conn, THRESHOLD_SQL, [threshold])
+        cur = await adb.execute(conn, CANDIDATES_SQL, {"q": q, "n": fetch})
+        rows = await cur.fetchall()
+    return rerank(q, rows, limit)
+
+
+def rerank(q: str, rows, limit: int):
+    """WRatio über die Postgres-Vorauswahl (txt, item_id, sku, name), je Item einmal."""
+    if not rows:
+        return []
+
+    results = process.extract(q, [r[0] for r in rows], scorer=fuzz.WRatio, limit=limit * 3)
+    seen, out = set(), []
+    for _text, score, idx in results:
+        _txt, item_id, sku, name = rows[idx]
+        if item_id in seen:
+            continue
+        seen.add(item_id)
+        out.append({"sku": sku, "name": name, "score": round(float(score) / 100.0, 3)})
+        if len(out) >= limit:
+            break
+    return out
@@ -0,0 +1,104 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .metrics import cache_hit
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+
+
+def idempotency_key(request, ref_type: str = "") -> str:
+    """
+    Nur der Header Idempotency-Key, je Buchungsart getrennt. ref_id ist kein Key:
+    mehrere Zeilen eines Lieferscheins tragen dieselbe ref_id.
+    """
+    hdr = (request.headers.get(HEADER) or "").strip()
+    if hdr:
+        return f"hdr:{ref_type}:{hdr}"[:200]
+    return ""
+
+
+def ttl() -> timedelta:
+    """Aufbewahrung gespeicherter Antworten; danach gilt ein Key als frei."""
+    return timedelta(hours=getattr(settings, "IDEMPOTENCY_TTL_HOURS", 24))
+
+
+def purge(older_than: timedelta = None) -> int:
+    """Abgelaufene Records löschen (Command idempotency_cleanup)."""
+    cutoff = timezone.now() - (older_than or ttl())
+    deleted, _ = IdempotencyRecord.objects.filter(created__lt=cutoff).delete()
+    return deleted
+
+
+def fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f"{request.path}\n{body}".encode("utf-8")).hexdigest()
+
+
+def _claim(key: str, fp: str) -> bool:
+    """
+    Key reservieren. Läuft ein identischer Request parallel, blockiert das INSERT
+    am Unique-Index, bis dieser committed (-> False) oder zurückrollt (-> True).
+    Ein abgelaufener Record wird übernommen, auch wenn der Cleanup noch nicht lief.
+    """
+    with connection.cursor() as cur:
+        cur.execute("""
+            INSERT INTO inventory_idempotencyrecord (key, fingerprint, status_code, created)
+            VALUES (%s, %s, 0, now())
+            ON CONFLICT (key) WHERE key <> '' DO UPDATE
+                SET fingerprint = EXCLUDED.fingerprint, status_code = 0, response = NULL, created = now()
+                WHERE inventory_idempotencyrecord.created < %s
+            RETURNING id;
+        """, [key, fp, timezone.now() - ttl()])
+        return cur.fetchone() is not None
+
+
+def _replay(rec, fp: str):
+    if rec.fingerprint != fp:
+        return Response({"error": "Idempotency-Key bereits mit anderem Inhalt verwendet."}, status=409)
+    return Response(rec.response, status=rec.status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(ref_type: str = ""):
+    """
+    Decorator für Buchungs-Views: ein wiederholter Request liefert die
+    gespeicherte Originalantwort ohne erneutes Schreiben oder Sperren.
+    Nur 2xx-Antworten werden gespeichert; Fehler dürfen erneut versucht werden.
+    """
+    def deco(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = idempotency_key(request, ref_type)
+            if not key:
+                return view(request, *args, **kwargs)
+            fp = fingerprint(request)
+
+            # Schnellpfad: bereits gebucht -> reiner Lesezugriff
+            rec = (IdempotencyRecord.objects
+                   .filter(key=key, status_code__gt=0, created__gte=timezone.now() - ttl())
+                   .first())
+            if rec:
+                cache_hit("idempotency", True)
+                return _replay(rec, fp)
+
+            with transaction.atomic():
+                if not _claim(key, fp):
+                    cache_hit("idempotency", True)
+                    return _replay(IdempotencyRecord.objects.get(key=key), fp)
+                cache_hit("idempotency", False)
+                resp = view(request, *args, **kwargs)
+                if 200 <= resp.status_code < 300:
+                    IdempotencyRecord.objects.filter(key=key).update(status_code=resp.status_code, response=resp.data)
+                else:
+                    transaction.set_rollback(True)
+            return resp
+        return wrapper
+    return deco
@@ -0,0 +1,232 @@
+import json
+import platform
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from inventory.models import Item, Bin, Inventory, StockLedger
+from inventory.pagination import estimated_count
+from inventory.synthetic import spoken
+from inventory.utils import percentile
+
+READ_SCENARIOS = ("stock", "resolve-item", "stock-moves", "reorder", "list-bins", "list-ledger")
+WRITE_SCENARIOS = ("receive", "issue", "move")
+
+
+def build_request(name, rng, pool, bins):
+    """(method, path, body) für ein Szenario; pool = [(sku, name, bin)], bins = ["LOC-CODE"]."""
+    sku, item_name, bin_code = rng.choice(pool)
+    if name == "stock":
+        return "GET", f"/api/stock/?{urllib.parse.urlencode({'sku': sku})}", None
+    if name == "resolve-item":
+        return "GET", f"/api/resolve-item/?{urllib.parse.urlencode({'q': spoken(item_name, rng)})}", None
+    if name == "stock-moves":
+        return "GET", f"/api/stock-moves/?{urllib.parse.urlencode({'sku': sku, 'limit': 20})}", None
+    if name == "reorder":
+        return "GET", "/api/reorder/suggestions/", None
+    if name == "list-bins":
+        return "GET", "/api/bins/?limit=200", None
+    if name == "list-ledger":
+        return "GET", "/api/ledger/?limit=200", None
+    if name == "receive":
+        return "POST", "/api/stock/receive/", {"sku": sku, "qty": 1, "bin": bin_code}
+    if name == "issue":
+        return "POST", "/api/stock/issue/", {"sku": sku, "qty": 1, "from_bin": bin_code}
+    if name == "move":
+        return "POST", "/api/stock/move/", {"sku": sku, "qty": 1, "from_bin": bin_code, "to_bin": rng.choice(bins)}
+    raise CommandError(f"Unbekanntes Szenario: {name}")
+
+
+class QueryCounter:
+    """execute_wrapper: zählt Queries der aktuellen Thread-Verbindung."""
+
+    def __init__(self):
+        self.n = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.n += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ("Lastbenchmark der API-Endpunkte bei festen Parallelitätsstufen: Durchsatz, p50/p95/p99, "
+            "Queries je Request; Ergebnis als JSON. Achtung: die Buchungsszenarien schreiben in die DB.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenarios", default=",".join(READ_SCENARIOS + WRITE_SCENARIOS),
+                            help=f"Kommagetrennt aus {', '.join(READ_SCENARIOS + WRITE_SCENARIOS)}.")
+        parser.add_argument("--concurrency", default="1,4,16", help="Parallelitätsstufen, z. B. 1,4,16.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests je Szenario und Stufe.")
+        parser.add_argument("--warmup", type=int, default=10, help="Unbewertete Requests je Szenario.")
+        parser.add_argument("--pool", type=int, default=2000, help="Anzahl Bestandszeilen als Stichprobe.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--base-url", help="Gegen laufenden Server messen (z. B. http://127.0.0.1:8000); "
+                                               "ohne: im Prozess über den Django-Testclient, mit Query-Zählung.")
+        parser.add_argument("--output", help="Ergebnis als JSON speichern.")
+        parser.add_argument("--compare", help="Früheres JSON-Ergebnis zum Vergleich.")
+
+    def handle(self, *args, **opts):
+        scenarios = [s.strip() for s in opts["scenarios"].split(",") if s.strip()]
+        unknown = set(scenarios) - set(READ_SCENARIOS + WRITE_SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unbekannte Szenarien: {', '.join(sorted(unknown))}")
+        try:
+            levels = [int(c) for c in opts["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency erwartet Zahlen, z. B. 1,4,16.")
+
+        pool = [(sku, name, f"{loc}-{code}") for sku, name, loc, code in
+                Inventory.objects.filter(qty__gt=0).order_by("id")
+                .values_list("item__sku", "item__name", "bin__location__code", "bin__code")[:opts["pool"]]]
+        bins = [f"{loc}-{code}" for loc, code in
+                Bin.objects.order_by("id").values_list("location__code", "code")[:opts["pool"]]]
+        if not pool:
+            raise CommandError("Keine Bestände vorhanden – zuerst generate_warehouse ausführen.")
+        self.base_url = (opts["base_url"] or "").rstrip("/")
+        rng = random.Random(opts["seed"])
+
+        results = []
+        for name in scenarios:
+            warm = [build_request(name, rng, pool, bins) for _ in range(opts["warmup"])]
+            self.run(warm, 1)
+            for level in levels:
+                reqs = [build_request(name, rng, pool, bins) for _ in range(opts["requests"])]
+                r = self.run(reqs, level)
+                r.update(scenario=name, concurrency=level)
+                results.append(r)
+                self.print_row(r)
+
+        doc = {"meta": self.meta(opts), "results": results}
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                json.dump(doc, f, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Ergebnis gespeichert: {opts['output']}"))
+        if opts["compare"]:
+            self.compare(opts["compare"], results)
+
+    # ------------------- Ausführung -------------------
+
+    def run(self, reqs, level):
+        work = queue.SimpleQueue()
+        for r in reqs:
+            work.put(r)
+        samples, lock = [], threading.Lock()
+
+        def worker():
+            client = None if self.base_url else Client(HTTP_HOST=self.host())
+            counter = QueryCounter()
+            local = []
+            try:
+                with connection.execute_wrapper(counter):
+                    while True:
+                        try:
+                            method, path, body = work.get_nowait()
+                        except queue.Empty:
+                            break
+                        counter.n = 0
+                        t0 = time.perf_counter()
+                        code = self.send(client, method, path, body)
+                        local.append(((time.perf_counter() - t0) * 1000, code,
+                                      None if self.base_url else counter.n))
+            finally:
+                connection.close()
+                with lock:
+                    samples.extend(local)
+
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(level)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+
+        lat = [s[0] for s in samples]
+        queries = [s[2] for s in samples if s[2] is not None]
+        codes = Counter(s[1] for s in samples)
+        return {
+            "requests": len(samples),
+            "errors": sum(n for c, n in codes.items() if not 200 <= c < 300),
+            "status": {str(c): n for c, n in sorted(codes.items())},
+            "rps": round(len(samples) / wall, 1) if wall else 0.0,
+            "p50_ms": round(percentile(lat, 50), 2),
+            "p95_ms": round(percentile(lat, 95), 2),
+            "p99_ms": round(percentile(lat, 99), 2),
+            "mean_ms": round(sum(lat) / len(lat), 2) if lat else 0.0,
+            "queries_mean": round(sum(queries) / len(queries), 1) if queries else None,
+            "queries_max": max(queries) if queries else None,
+        }
+
+    def send(self, client, method, path, body):
+        if client is not None:
+            if method == "GET":
+                return client.get(path).status_code
+            return client.post(path, data=body, content_type="application/json").status_code
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 599
+
+    @staticmethod
+    def host():
+        hosts = [h for h in settings.ALLOWED_HOSTS if h and "*" not in h and not h.startswith(".")]
+        return hosts[0] if hosts else "localhost"
+
+    # ------------------- Ausgabe -------------------
+
+    def print_row(self, r):
+        q = f"  q={r['queries_mean']}/{r['queries_max']}" if r["queries_mean"] is not None else ""
+        self.stdout.write(
+            f"{r['scenario']:13s} c={r['concurrency']:<3d} {r['rps']:8.1f} req/s  "
+            f"p50={r['p50_ms']:8.2f}  p95={r['p95_ms']:8.2f}  p99={r['p99_ms']:8.2f} ms  "
+            f"err={r['errors']}{q}"
+        )
+
+    def meta(self, opts):
+        return {
+            "ts": timezone.now().isoformat(),
+            "mode": "http" if self.base_url else "in-process",
+            "base_url": self.base_url or None,
+            "seed": opts["seed"],
+            "requests": opts["requests"],
+            "python": platform.python_version(),
+            "fuzzy_engine": getattr(settings, "FUZZY_ENGINE", "memory"),
+            "items": Item.objects.count(),
+            "bins": Bin.objects.count(),
+            "inventory_rows": estimated_count(Inventory),
+            "ledger_rows": estimated_count(StockLedger),
+        }
+
+    def compare(self, path, results):
+        try:
+            with open(path, encoding="utf-8") as f:
+                old = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"{path}: {e}")
+        self.stdout.write(f"\nVergleich mit {path} (Δ rps / Δ p95):")
+        for r in results:
+            o = old.get((r["scenario"], r["concurrency"]))
+            if not o:
+                continue
+            d_rps = (r["rps"] / o["rps"] - 1) if o["rps"] else 0.0
+            d_p95 = (r["p95_ms"] / o["p95_ms"] - 1) if o["p95_ms"] else 0.0
+            self.stdout.write(f"  {r['scenario']:13s} c={r['concurrency']:<3d} "
+                              f"rps {d_rps:+7.1%}   p95 {d_p95:+7.1%}")
@@ -0,0 +1,57 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.fuzzy_index import FuzzyItemIndex, fuzzy_index
+from inventory.utils import percentile
+from inventory.synthetic import item_name, spoken
+
+
+class Command(BaseCommand):
+    help = "Benchmark: Latenz und Trefferquote der Fuzzy-Suche (memory vs. phonetic)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--synthetic", type=int, default=0,
+                            help="Synthetischen Katalog mit N Items im Speicher erzeugen (keine DB nötig).")
+        parser.add_argument("--samples", type=int, default=300)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+
+        if opts["synthetic"]:
+            idx = FuzzyItemIndex()
+            for i in range(opts["synthetic"]):
+                idx.upsert_item(i + 1, f"S{i + 1:06d}", item_name(rng))
+        else:
+            idx = fuzzy_index
+            idx.ensure_fresh()
+
+        texts, _ids = idx.choices()
+        if not idx.items:
+            self.stdout.write(self.style.WARNING("Keine Items vorhanden."))
+            return
+
+        t0 = time.perf_counter()
+        idx.phonetic()
+        build_ms = (time.perf_counter() - t0) * 1000
+        self.stdout.write(f"Entries: {len(texts)}  Phonetik-Index aufgebaut in {build_ms:.0f} ms")
+
+        sample = rng.sample(sorted(idx.items.items()), min(opts["samples"], len(idx.items)))
+        queries = [(spoken(name, rng), sku) for _id, (sku, name) in sample]
+
+        for label, fn in (("memory", idx.candidates_full), ("phonetic", idx.candidates_phonetic)):
+            lat, top1, top5 = [], 0, 0
+            for q, sku in queries:
+                t0 = time.perf_counter()
+                cands = fn(q, 5)
+                lat.append((time.perf_counter() - t0) * 1000)
+                skus = [c["sku"] for c in cands]
+                top1 += bool(skus) and skus[0] == sku
+                top5 += sku in skus
+            n = len(queries)
+            self.stdout.write(
+                f"{label:9s} p50={percentile(lat, 50):7.2f} ms  p95={percentile(lat, 95):7.2f} ms  "
+                f"hit@1={top1 / n:6.1%}  hit@5={top5 / n:6.1%}"
+            )
@@ -0,0 +1,107 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from inventory.models import Bin
+from inventory.utils import percentile
+
+ANN_SQL = """
+    SELECT id FROM inventory_bin
+    WHERE embedding IS NOT NULL
+    ORDER BY embedding <=> %s::vector
+    LIMIT %s;
+"""
+
+
+def vector_literal(vec) -> str:
+    return "[" + ",".join(f"{float(x):.7g}" for x in vec) + "]"
+
+
+class Command(BaseCommand):
+    help = ("Benchmark des ANN-Index auf Bin.embedding: recall@k gegen exakte Suche "
+            "und p50/p95-Latenz je probes (ivfflat) bzw. ef_search (hnsw), mit Empfehlung.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=100, help="Anzahl Testanfragen.")
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--noise", type=float, default=0.02,
+                            help="Gauß-Rauschen auf den Stichproben-Vektoren (simuliert neue Anfragen).")
+        parser.add_argument("--values", default="",
+                            help="Kommagetrennte probes/ef_search-Werte (Standard je Indextyp).")
+        parser.add_argument("--target-recall", type=float, default=0.95)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def detect_index(self) -> str:
+        with connection.cursor() as cur:
+            cur.execute("""
+                SELECT indexdef FROM pg_indexes
+                WHERE tablename = 'inventory_bin' AND indexdef ILIKE '%(embedding%';
+            """)
+            defs = " ".join(r[0].lower() for r in cur.fetchall())
+        if "using hnsw" in defs:
+            return "hnsw"
+        if "using ivfflat" in defs:
+            return "ivfflat"
+        raise CommandError("Kein ANN-Index auf inventory_bin.embedding gefunden (erst embed_bins --index ivfflat|hnsw ausführen).")
+
+    def handle(self, *args, **opts):
+        kind = self.detect_index()
+        guc = "ivfflat.probes" if kind == "ivfflat" else "hnsw.ef_search"
+        default_values = "1,2,5,10,20,40" if kind == "ivfflat" else "10,20,40,80,160"
+        values = [int(v) for v in (opts["values"] or default_values).split(",") if v.strip()]
+        k = opts["k"]
+
+        rng = np.random.default_rng(opts["seed"])
+        sample = list(Bin.objects.filter(embedding__isnull=False)
+                      .order_by("?").values_list("embedding", flat=True)[:opts["queries"]])
+        if not sample:
+            raise CommandError("Keine Bins mit Embedding vorhanden.")
+        queries = []
+        for vec in sample:
+            v = np.asarray(vec, dtype=np.float32)
+            v = v + rng.normal(0, opts["noise"], size=v.shape).astype(np.float32)
+            queries.append(vector_literal(v / (np.linalg.norm(v) or 1.0)))
+
+        # Exakte Referenz: Indexscans aus -> Seq Scan + Top-N-Sort
+        truth, exact_lat = [], []
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute("SET LOCAL enable_indexscan = off;")
+            cur.execute("SET LOCAL enable_bitmapscan = off;")
+            for q in queries:
+                t0 = time.perf_counter()
+                cur.execute(ANN_SQL, [q, k])
+                exact_lat.append((time.perf_counter() - t0) * 1000)
+                truth.append({r[0] for r in cur.fetchall()})
+
+        self.stdout.write(f"Index: {kind}  Queries: {len(queries)}  k={k}")
+        self.stdout.write(f"{'exakt':>16s}  recall@{k}=100.0%  p50={percentile(exact_lat, 50):7.2f} ms  "
+                          f"p95={percentile(exact_lat, 95):7.2f} ms")
+
+        results = []
+        for value in values:
+            lat, hits = [], 0
+            with transaction.atomic(), connection.cursor() as cur:
+                cur.execute("SELECT set_config(%s, %s, true);", [guc, str(value)])
+                for q, ref in zip(queries, truth):
+                    t0 = time.perf_counter()
+                    cur.execute(ANN_SQL, [q, k])
+                    lat.append((time.perf_counter() - t0) * 1000)
+                    hits += len(ref & {r[0] for r in cur.fetchall()})
+            recall = hits / max(1, sum(len(t) for t in truth))
+            results.append((value, recall, percentile(lat, 50), percentile(lat, 95)))
+            self.stdout.write(f"{guc}={value:<4d}  recall@{k}={recall:6.1%}  "
+                              f"p50={percentile(lat, 50):7.2f} ms  p95={percentile(lat, 95):7.2f} ms")
+
+        good = [r for r in results if r[1] >= opts["target_recall"]]
+        if good:
+            best = min(good, key=lambda r: (r[3], r[0]))
+            env = "BIN_SEMANTIC_PROBES" if kind == "ivfflat" else "BIN_SEMANTIC_EF_SEARCH"
+            self.stdout.write(self.style.SUCCESS(
+                f"Empfehlung: {guc}={best[0]} (recall {best[1]:.1%}, p95 {best[3]:.2f} ms) -> {env}={best[0]}"
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"Kein Wert erreicht recall {opts['target_recall']:.0%} – größere Werte testen oder Index neu bauen."
+            ))
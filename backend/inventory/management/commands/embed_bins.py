@@ -1,66 +1,203 @@
-from django.core.management.base import BaseCommand
+import hashlib
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connection, transaction
 from django.conf import settings
 from inventory.models import Bin
-from inventory.utils_embeddings import embed_text
+from inventory.utils_embeddings import embed_texts, get_provider
 
 VECTOR_DIM = getattr(settings, "EMBEDDING_DIM", 1536)  # anpassen
 
+INDEX_NAMES = {
+    "ivfflat": "idx_bin_embedding_ivfflat",
+    "hnsw": "idx_bin_embedding_hnsw",
+}
+
+
+def bin_embedding_text(loc: str, code: str) -> str:
+    full = f"{loc}-{code}".strip("-")
+    parts = [
+        loc, code, full,
+        loc.replace("-", " "), code.replace("-", " "), full.replace("-", " "),
+        "lagerplatz fach regal bin platz",
+    ]
+    return " ".join(p for p in parts if p).strip()
+
+
+def text_hash(text: str, model_id: str) -> str:
+    # Modell gehört zum Hash: Modellwechsel erzwingt Neuberechnung
+    return hashlib.sha256(f"{model_id}\n{text}".encode("utf-8")).hexdigest()
+
+
+class RateLimiter:
+    """Einfacher Abstandshalter: höchstens `per_minute` Requests pro Minute über alle Threads."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class Command(BaseCommand):
-    help = "Erzeugt/aktualisiert Embeddings für alle Bins (pgvector)."
+    help = "Erzeugt/aktualisiert Embeddings für alle Bins (pgvector), gebatcht und inkrementell."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=256, help="Texte pro Embedding-Request.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Parallele Requests.")
+        parser.add_argument("--max-rpm", type=int, default=500, help="Max. Requests pro Minute (0 = unbegrenzt).")
+        parser.add_argument("--write-chunk", type=int, default=500, help="Bins pro bulk_update.")
+        parser.add_argument("--force", action="store_true", help="Auch unveränderte Bins neu einbetten.")
+        parser.add_argument("--index", choices=["ivfflat", "hnsw", "none"], default="none",
+                            help="ANN-Indextyp anlegen, die andere Variante wird entfernt "
+                                 "(Default none = bestehenden Index behalten).")
+        parser.add_argument("--lists", type=int, default=0, help="ivfflat lists (0 = ~4*sqrt(n)).")
+        parser.add_argument("--m", type=int, default=16, help="hnsw m.")
+        parser.add_argument("--ef-construction", type=int, default=64, help="hnsw ef_construction.")
+        parser.add_argument("--rebuild", action="store_true", help="Index verwerfen und neu bauen.")
+        parser.add_argument("--maintenance-work-mem", default="", help="z. B. 1GB für schnellere Index-Builds.")
 
     def handle(self, *args, **opts):
-        total = Bin.objects.count()
-        updated = 0
+        if opts["rebuild"] and opts["index"] == "none":
+            raise CommandError("--rebuild braucht --index ivfflat|hnsw.")
+        for opt in ("batch_size", "concurrency", "write_chunk"):
+            if opts[opt] <= 0:
+                raise CommandError(f"--{opt.replace('_', '-')} muss > 0 sein.")
+        started = time.perf_counter()
+        total = 0
+        todo = []  # (bin_id, text, hash)
+        model_id = get_provider().model_id  # einmal je Lauf, nicht je Bin
 
-        # Speicherfreundlich iterieren
-        for b in Bin.objects.select_related("location").iterator(chunk_size=500):
-            loc = (getattr(b.location, "code", "") or "").strip()
-            code = (b.code or "").strip()
+        # Speicherfreundlich iterieren, nur geänderte Texte einsammeln
+        rows = (Bin.objects
+                .values_list("id", "location__code", "code", "embedding_hash")
+                .iterator(chunk_size=2000))
+        for bin_id, loc, code, old_hash in rows:
+            total += 1
+            loc, code = (loc or "").strip(), (code or "").strip()
             if not loc and not code:
                 continue
-
-            full = f"{loc}-{code}".strip("-")
-            parts = [
-                loc, code, full,
-                loc.replace("-", " "), code.replace("-", " "), full.replace("-", " "),
-                "lagerplatz fach regal bin platz",
-            ]
-            text = " ".join(p for p in parts if p).strip()
-
-            vec = embed_text(text)  # sollte eine Sequenz aus floats der Länge VECTOR_DIM liefern
-            if not vec:
-                continue
-
-            # robust casten + Dimension prüfen
-            try:
-                vec_list = [float(x) for x in vec]
-            except Exception:
+            text = bin_embedding_text(loc, code)
+            h = text_hash(text, model_id)
+            if h == old_hash and not opts["force"]:
                 continue
+            todo.append((bin_id, text, h))
 
-            if len(vec_list) != VECTOR_DIM:
-                self.stdout.write(self.style.WARNING(
-                    f"Übersprungen (Dim): Bin {b.pk} hat {len(vec_list)} statt {VECTOR_DIM}"
-                ))
-                continue
+        self.stdout.write(f"Bins: {total}, davon {len(todo)} neu/geändert.")
 
-            b.embedding = vec_list
-            b.save(update_fields=["embedding"])
-            updated += 1
+        updated = 0
+        if todo:
+            updated = self.embed_and_store(todo, opts)
 
-        self.stdout.write(self.style.SUCCESS(f"Bins: {updated}/{total} Embeddings gespeichert."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Bins: {updated}/{total} Embeddings gespeichert in {time.perf_counter() - started:.1f}s."
+        ))
 
         # pgvector-Index (cosine). Voraussetzung: CREATE EXTENSION vector; einmalig in der DB ausführen.
-        # Heuristik für lists: ~4 * sqrt(n)
-        lists = max(4, int(4 * (max(total, 1) ** 0.5)))
+        if opts["index"] != "none":
+            self.ensure_index(opts, total, analyze=bool(updated))
+        elif updated:
+            # Index bleibt wie er ist, nur Planner-Statistiken auffrischen
+            with connection.cursor() as cur:
+                cur.execute("ANALYZE inventory_bin;")
+
+    def ensure_index(self, opts, total: int, analyze: bool):
+        """
+        ivfflat: lists Standard ~4 * sqrt(n)
+        hnsw:    m / ef_construction
+        Nur mit explizitem --index: die andere ANN-Indexvariante wird entfernt,
+        --rebuild baut neu (z. B. nach geänderten Parametern).
+        """
+        kind = opts["index"]
+        other = "hnsw" if kind == "ivfflat" else "ivfflat"
+        name = INDEX_NAMES[kind]
+        if kind == "ivfflat":
+            lists = opts["lists"] or max(4, int(4 * (max(total, 1) ** 0.5)))
+            ddl = f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(lists)})"
+        else:
+            ddl = (f"USING hnsw (embedding vector_cosine_ops) "
+                   f"WITH (m = {int(opts['m'])}, ef_construction = {int(opts['ef_construction'])})")
+
+        started = time.perf_counter()
         with connection.cursor() as cur, transaction.atomic():
-            cur.execute("""
-                CREATE INDEX IF NOT EXISTS idx_bin_embedding_ivfflat
-                ON inventory_bin
-                USING ivfflat (embedding vector_cosine_ops)
-                WITH (lists = %s);
-            """, [lists])
-            # Planner-Statistiken aktualisieren
-            cur.execute("ANALYZE inventory_bin;")
-
-        self.stdout.write(self.style.SUCCESS("ANN-Index geprüft/erstellt und ANALYZE ausgeführt."))
+            if opts["maintenance_work_mem"]:
+                cur.execute("SELECT set_config('maintenance_work_mem', %s, true);", [opts["maintenance_work_mem"]])
+            cur.execute(f"DROP INDEX IF EXISTS {INDEX_NAMES[other]};")
+            if opts["rebuild"]:
+                cur.execute(f"DROP INDEX IF EXISTS {name};")
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON inventory_bin {ddl};")
+            # Planner-Statistiken nur nach Änderungen aktualisieren
+            if analyze or opts["rebuild"]:
+                cur.execute("ANALYZE inventory_bin;")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"ANN-Index {name} geprüft/erstellt ({ddl.split(' WITH ')[1]}) in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def embed_and_store(self, todo, opts) -> int:
+        """
+        Batches parallel einbetten (rate-limitiert), Ergebnisse im Haupt-Thread per bulk_update schreiben.
+        Höchstens 2 * concurrency Batches gleichzeitig unterwegs: fertige Vektoren werden
+        geschrieben und freigegeben, statt bis zum Ende des Laufs im Speicher zu liegen.
+        """
+        size = opts["batch_size"]
+        batches = (todo[i:i + size] for i in range(0, len(todo), size))
+        limiter = RateLimiter(opts["max_rpm"])
+        window = 2 * opts["concurrency"]
+
+        def run(batch):
+            limiter.wait()
+            return batch, embed_texts([t for (_id, t, _h) in batch])
+
+        def results(pool):
+            in_flight = set()
+            for batch in batches:
+                in_flight.add(pool.submit(run, batch))
+                if len(in_flight) >= window:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from done
+            yield from as_completed(in_flight)
+
+        updated, pending = 0, []
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            for fut in results(pool):
+                try:
+                    batch, vectors = fut.result()
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"Batch fehlgeschlagen: {e}"))
+                    continue
+                for (bin_id, _text, h), vec in zip(batch, vectors):
+                    # robust casten + Dimension prüfen
+                    try:
+                        vec_list = [float(x) for x in vec]
+                    except Exception:
+                        continue
+                    if len(vec_list) != VECTOR_DIM:
+                        self.stdout.write(self.style.WARNING(
+                            f"Übersprungen (Dim): Bin {bin_id} hat {len(vec_list)} statt {VECTOR_DIM}"
+                        ))
+                        continue
+                    pending.append(Bin(id=bin_id, embedding=vec_list, embedding_hash=h))
+
+                while len(pending) >= opts["write_chunk"]:
+                    chunk, pending = pending[:opts["write_chunk"]], pending[opts["write_chunk"]:]
+                    Bin.objects.bulk_update(chunk, ["embedding", "embedding_hash"])
+                    updated += len(chunk)
+                    self.stdout.write(f"  {updated}/{len(todo)} geschrieben …")
+
+        if pending:
+            Bin.objects.bulk_update(pending, ["embedding", "embedding_hash"])
+            updated += len(pending)
+        return updated
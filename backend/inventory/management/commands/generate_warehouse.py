@@ -0,0 +1,170 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from inventory import onhand
+from inventory.bin_cache import schedule_invalidate
+from inventory.fuzzy_index import INDEX_KEY
+from inventory.models import Item, ItemAlias, Location, Bin, ReorderPolicy
+from inventory.partitions import month_start, add_months, ensure_month
+from inventory.synthetic import item_name, item_alias, bin_grid
+from inventory.utils_cache import bump_version
+
+BATCH = 5000
+
+
+class Command(BaseCommand):
+    help = ("Erzeugt ein synthetisches Lager (Locations, Bin-Raster, Items mit Aliasen, Bestände "
+            "und mehrjähriges Ledger) – reproduzierbar über --seed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--locations", type=int, default=3, help="Anzahl Locations (erste heißt MAIN).")
+        parser.add_argument("--aisles", type=int, default=10, help="Gänge je Location.")
+        parser.add_argument("--racks", type=int, default=20, help="Regale je Gang.")
+        parser.add_argument("--levels", type=int, default=5, help="Ebenen je Regal.")
+        parser.add_argument("--items", type=int, default=10000)
+        parser.add_argument("--aliases", type=float, default=1.0, help="Aliase je Item (Mittelwert).")
+        parser.add_argument("--stocked", type=float, default=0.7, help="Anteil Items mit Bestand.")
+        parser.add_argument("--bins-per-item", type=int, default=3, help="Max. Bins je Item.")
+        parser.add_argument("--years", type=float, default=2.0, help="Zeitraum des Ledgers in Jahren.")
+        parser.add_argument("--events", type=int, default=20, help="Buchungen je Item mit Bestand (Mittelwert).")
+        parser.add_argument("--policies", type=float, default=0.3, help="Anteil Items mit ReorderPolicy.")
+        parser.add_argument("--prefix", default="SYN", help="SKU-Präfix (muss neu sein).")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        prefix = opts["prefix"]
+        if Item.objects.filter(sku__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Items mit Präfix {prefix}- existieren bereits – anderes --prefix wählen.")
+        self.rng = random.Random(opts["seed"])
+        self.t0 = time.perf_counter()
+
+        with transaction.atomic():
+            bins_by_loc = self.make_bins(opts)
+            items = self.make_items(opts)
+            ledger_rows, inv_rows = self.make_stock(opts, items, bins_by_loc)
+            self.make_policies(opts, items, next(iter(bins_by_loc)))
+            self.step("Summentabellen + Reorder-Alerts")
+            onhand.rebuild()
+            transaction.on_commit(lambda: bump_version(INDEX_KEY))
+            schedule_invalidate()
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE inventory_item, inventory_bin, inventory_inventory, inventory_stockledger;")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fertig in {time.perf_counter() - self.t0:.1f}s: {len(items)} Items, "
+            f"{sum(len(b) for b in bins_by_loc.values())} Bins, {inv_rows} Bestandszeilen, "
+            f"{ledger_rows} Ledger-Zeilen."))
+
+    def step(self, label):
+        self.stdout.write(f"  [{time.perf_counter() - self.t0:6.1f}s] {label}")
+
+    # ------------------- Stammdaten -------------------
+
+    def make_bins(self, opts):
+        """{location_id: [bin_id, ...]} für das komplette Raster aller Locations."""
+        self.step("Locations + Bins")
+        codes = ["MAIN"] + [f"L{n:02d}" for n in range(2, opts["locations"] + 1)]
+        locs = [Location.objects.get_or_create(code=c, defaults={"name": f"Lager {c}"})[0] for c in codes]
+        grid = list(bin_grid(opts["aisles"], opts["racks"], opts["levels"]))
+        objs = []
+        for loc in locs:
+            for code in grid:
+                b = Bin(location=loc, code=code)
+                b.set_code_parts()
+                objs.append(b)
+        Bin.objects.bulk_create(objs, batch_size=BATCH, ignore_conflicts=True)
+
+        by_loc = {loc.id: [] for loc in locs}
+        for bin_id, loc_id in Bin.objects.filter(location__in=locs).values_list("id", "location_id"):
+            by_loc[loc_id].append(bin_id)
+        return by_loc
+
+    def make_items(self, opts):
+        self.step("Items + Aliase")
+        rng, prefix = self.rng, opts["prefix"]
+        items = Item.objects.bulk_create(
+            (Item(sku=f"{prefix}-{n:06d}", name=item_name(rng)) for n in range(1, opts["items"] + 1)),
+            batch_size=BATCH,
+        )
+        aliases = []
+        for item in items:
+            n = int(opts["aliases"]) + (rng.random() < opts["aliases"] % 1)
+            aliases += [ItemAlias(item=item, alias=item_alias(item.name, rng)) for _ in range(n)]
+        ItemAlias.objects.bulk_create(aliases, batch_size=BATCH, ignore_conflicts=True)
+        return items
+
+    def make_policies(self, opts, items, main_id):
+        rng = self.rng
+        policies = [
+            ReorderPolicy(item=item, location_id=main_id if rng.random() < 0.5 else None,
+                          reorder_point=rng.randint(10, 100), reorder_qty=rng.randint(50, 500))
+            for item in items if rng.random() < opts["policies"]
+        ]
+        ReorderPolicy.objects.bulk_create(policies, batch_size=BATCH)
+
+    # ------------------- Bestand + Ledger -------------------
+
+    def make_stock(self, opts, items, bins_by_loc):
+        """
+        Simuliert je Item Zugänge, Entnahmen und Umlagerungen über den Zeitraum;
+        der Endstand wird zum Bestand, Ledger und Bestand sind damit konsistent.
+        """
+        rng = self.rng
+        end = timezone.now()
+        start = end - timedelta(days=365 * opts["years"])
+        span = (end - start).total_seconds()
+
+        self.step("Ledger-Partitionen")
+        with connection.cursor() as cur:
+            month = month_start(start.date())
+            while month <= end.date():
+                ensure_month(cur, month)
+                month = add_months(month, 1)
+
+        self.step("Ledger (COPY)")
+        locs = list(bins_by_loc)
+        balances = {}
+        ledger_rows = 0
+        with connection.cursor() as cur:
+            with cur.cursor.copy("COPY inventory_stockledger (ts, item_id, from_bin_id, to_bin_id, qty, ref_type, ref_id) "
+                                 "FROM STDIN") as copy:
+                for item in items:
+                    if rng.random() >= opts["stocked"]:
+                        continue
+                    loc_bins = bins_by_loc[rng.choice(locs)]
+                    own = rng.sample(loc_bins, min(len(loc_bins), rng.randint(1, opts["bins_per_item"])))
+                    n_events = max(1, int(rng.gauss(opts["events"], opts["events"] / 4)))
+                    stamps = sorted(start + timedelta(seconds=rng.random() * span) for _ in range(n_events))
+                    bal = {b: 0 for b in own}
+                    for n, ts in enumerate(stamps):
+                        stocked = [b for b, q in bal.items() if q > 0]
+                        r = rng.random()
+                        if n == 0 or not stocked or r < 0.4:
+                            b, qty = rng.choice(own), rng.randint(10, 200)
+                            bal[b] += qty
+                            copy.write_row((ts, item.id, None, b, qty, "PO_RECEIPT", f"PO-{rng.randrange(10**6):06d}"))
+                        elif r < 0.85 or len(own) == 1:
+                            b = rng.choice(stocked)
+                            qty = rng.randint(1, bal[b])
+                            bal[b] -= qty
+                            copy.write_row((ts, item.id, b, None, qty, "ISSUE", ""))
+                        else:
+                            src = rng.choice(stocked)
+                            dst = rng.choice([b for b in own if b != src])
+                            qty = rng.randint(1, bal[src])
+                            bal[src] -= qty
+                            bal[dst] += qty
+                            copy.write_row((ts, item.id, src, dst, qty, "MOVE", ""))
+                        ledger_rows += 1
+                    balances.update({(item.id, b): q for b, q in bal.items() if q})
+
+            self.step("Bestände (COPY)")
+            with cur.cursor.copy("COPY inventory_inventory (item_id, bin_id, qty) FROM STDIN") as copy:
+                for (item_id, bin_id), qty in balances.items():
+                    copy.write_row((item_id, bin_id, qty))
+        return ledger_rows, len(balances)
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from inventory import idempotency
+
+
+class Command(BaseCommand):
+    help = "Löscht abgelaufene Idempotency-Records (z. B. stündlich per Cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=0,
+                            help="Älter als so viele Stunden löschen (0 = IDEMPOTENCY_TTL_HOURS).")
+
+    def handle(self, *args, **opts):
+        deleted = idempotency.purge(timedelta(hours=opts["hours"]) if opts["hours"] > 0 else None)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} Idempotency-Record(s) gelöscht."))
@@ -0,0 +1,277 @@
+import csv
+import io
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from psycopg import sql
+
+from inventory import reorder
+from inventory.bincodes import canonical_bin_code, bin_components
+from inventory.bin_cache import schedule_invalidate
+from inventory.fuzzy_index import INDEX_KEY
+from inventory.utils_cache import bump_version
+
+# Staging-Spalten je Datei (alles text, Prüfung/Cast erst im Set-Statement)
+STAGES = {
+    "locations": {"columns": ("code", "name"), "required": ("code",)},
+    "items": {"columns": ("sku", "name", "description", "uom"), "required": ("sku", "name")},
+    "aliases": {"columns": ("sku", "alias"), "required": ("sku", "alias")},
+    "bins": {"columns": ("location", "code"), "required": ("location", "code")},
+    "stock": {"columns": ("sku", "location", "bin", "qty"), "required": ("sku", "location", "bin", "qty")},
+}
+BIN_DERIVED = ("code_canonical", "aisle", "rack", "level", "slot")
+
+UPSERT_LOCATIONS = """
+    INSERT INTO inventory_location (code, name)
+    SELECT DISTINCT ON (code) code, name
+    FROM (SELECT trim(code) AS code, COALESCE(trim(name), '') AS name FROM import_locations) s
+    WHERE code <> ''
+    ORDER BY code
+    ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name
+    WHERE EXCLUDED.name <> '' AND inventory_location.name <> EXCLUDED.name;
+"""
+
+UPSERT_ITEMS = """
+    INSERT INTO inventory_item (sku, name, description, uom, active)
+    SELECT DISTINCT ON (sku) sku, name, description, uom, true
+    FROM (SELECT trim(sku) AS sku, trim(name) AS name, COALESCE(description, '') AS description,
+                 COALESCE(NULLIF(trim(uom), ''), 'pcs') AS uom
+          FROM import_items) s
+    WHERE sku <> '' AND name <> ''
+    ORDER BY sku
+    ON CONFLICT (sku) DO UPDATE SET {updates}
+    WHERE ({current}) IS DISTINCT FROM ({excluded});
+"""
+
+UPSERT_ALIASES = """
+    INSERT INTO inventory_itemalias (item_id, alias)
+    SELECT DISTINCT i.id, trim(s.alias)
+    FROM import_aliases s JOIN inventory_item i ON i.sku = trim(s.sku)
+    WHERE trim(s.alias) <> ''
+    ON CONFLICT (item_id, alias) DO NOTHING;
+"""
+
+UPSERT_BINS = """
+    INSERT INTO inventory_bin (location_id, code, code_canonical, aisle, rack, level, slot, embedding_hash)
+    SELECT DISTINCT ON (l.id, s.code) l.id, s.code, COALESCE(s.code_canonical, ''),
+           COALESCE(s.aisle, ''), COALESCE(s.rack, ''), COALESCE(s.level, ''), COALESCE(s.slot, ''), ''
+    FROM import_bins s JOIN inventory_location l ON l.code = s.location
+    WHERE s.code <> ''
+    ORDER BY l.id, s.code
+    ON CONFLICT (location_id, code) DO NOTHING;
+"""
+
+# Anfangsbestand = Zielbestand je (Item, Bin); gebucht wird nur die Differenz zum aktuellen Stand,
+# damit ein erneuter Import nichts doppelt bucht.
+OPENING_SQL = """
+    CREATE TEMP TABLE import_opening ON COMMIT DROP AS
+    SELECT i.id AS item_id, b.id AS bin_id, b.location_id, SUM(s.qty::numeric) AS qty
+    FROM import_stock s
+    JOIN inventory_item i ON i.sku = trim(s.sku)
+    JOIN inventory_location l ON l.code = trim(s.location)
+    JOIN inventory_bin b ON b.location_id = l.id AND b.code = trim(s.bin)
+    GROUP BY i.id, b.id, b.location_id;
+
+    CREATE TEMP TABLE import_opening_delta ON COMMIT DROP AS
+    SELECT o.item_id, o.bin_id, o.location_id, o.qty - COALESCE(inv.qty, 0) AS d
+    FROM import_opening o
+    LEFT JOIN inventory_inventory inv ON inv.item_id = o.item_id AND inv.bin_id = o.bin_id
+    WHERE o.qty <> COALESCE(inv.qty, 0);
+"""
+
+APPLY_OPENING_SQL = """
+    INSERT INTO inventory_stockledger (ts, item_id, from_bin_id, to_bin_id, qty, ref_type, ref_id)
+    SELECT now(), item_id,
+           CASE WHEN d < 0 THEN bin_id END, CASE WHEN d > 0 THEN bin_id END,
+           abs(d), 'OPENING', %(ref)s
+    FROM import_opening_delta;
+
+    INSERT INTO inventory_inventory (item_id, bin_id, qty)
+    SELECT item_id, bin_id, qty FROM import_opening
+    ON CONFLICT (item_id, bin_id) DO UPDATE SET qty = EXCLUDED.qty
+    WHERE inventory_inventory.qty <> EXCLUDED.qty;
+
+    INSERT INTO inventory_onhandlocation (item_id, location_id, qty)
+    SELECT item_id, location_id, SUM(d) FROM import_opening_delta GROUP BY item_id, location_id
+    ON CONFLICT (item_id, location_id) DO UPDATE SET qty = inventory_onhandlocation.qty + EXCLUDED.qty;
+
+    INSERT INTO inventory_onhanditem (item_id, qty)
+    SELECT item_id, SUM(d) FROM import_opening_delta GROUP BY item_id
+    ON CONFLICT (item_id) DO UPDATE SET qty = inventory_onhanditem.qty + EXCLUDED.qty;
+"""
+
+# Zeilen, die keinem Stammsatz zugeordnet werden konnten
+REJECTS = {
+    "aliases": "SELECT count(*) FROM import_aliases s WHERE NOT EXISTS "
+               "(SELECT 1 FROM inventory_item i WHERE i.sku = trim(s.sku))",
+    "bins": "SELECT count(*) FROM import_bins s WHERE NOT EXISTS "
+            "(SELECT 1 FROM inventory_location l WHERE l.code = s.location)",
+    "stock": "SELECT (SELECT count(*) FROM import_stock) - "
+             "(SELECT count(*) FROM import_stock s JOIN inventory_item i ON i.sku = trim(s.sku) "
+             " JOIN inventory_location l ON l.code = trim(s.location) "
+             " JOIN inventory_bin b ON b.location_id = l.id AND b.code = trim(s.bin))",
+}
+
+
+def _statements(script):
+    return [s for s in script.split(";") if s.strip()]
+
+
+class Command(BaseCommand):
+    help = ("Massenimport (CSV mit Kopfzeile) für Locations, Items, Aliase, Bins und Anfangsbestände "
+            "über COPY in Staging-Tabellen und mengenbasierte Upserts – alles in einer Transaktion.")
+
+    def add_arguments(self, parser):
+        for name, spec in STAGES.items():
+            parser.add_argument(f"--{name}", metavar="CSV", help=f"Spalten: {', '.join(spec['columns'])}")
+        parser.add_argument("--delimiter", default=",", help="Feldtrenner (Standard ,).")
+        parser.add_argument("--ref", help="ref_id der Anfangsbestands-Buchungen (Standard import-<Zeitstempel>).")
+
+    def handle(self, *args, **opts):
+        if not any(opts.get(name) for name in STAGES):
+            raise CommandError("Mindestens eine Datei angeben (--locations/--items/--aliases/--bins/--stock).")
+        if len(opts["delimiter"]) != 1 or opts["delimiter"] in "\"\r\n":
+            raise CommandError("--delimiter muss ein einzelnes Zeichen sein.")
+        self.delimiter = opts["delimiter"]
+        ref = opts["ref"] or f"import-{timezone.now():%Y%m%d%H%M%S}"
+
+        self.report, self.copied = [], 0
+        t_all = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cur:
+            for name in STAGES:
+                if opts.get(name):
+                    getattr(self, f"load_{name}")(cur, opts[name], ref)
+            if opts.get("stock"):
+                with self.phase("reorder-alerts"):
+                    reorder.rebuild()
+            # Prozesslokale Caches aller Worker neu laden lassen
+            if opts.get("items") or opts.get("aliases"):
+                transaction.on_commit(lambda: bump_version(INDEX_KEY))
+            if opts.get("locations") or opts.get("bins"):
+                schedule_invalidate()
+        total = time.perf_counter() - t_all
+
+        for line in self.report:
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f"Import abgeschlossen in {total:.1f}s: {self.copied} CSV-Zeilen "
+            f"({self.copied / total if total else 0:,.0f} Zeilen/s)."))
+
+    # ------------------- Hilfen -------------------
+
+    @contextmanager
+    def phase(self, label):
+        """Zeit und Zeilen einer Stufe für den Durchsatzbericht messen."""
+        stat = {"rows": None, "note": ""}
+        t0 = time.perf_counter()
+        yield stat
+        dt = time.perf_counter() - t0
+        rows = stat["rows"]
+        rate = f", {rows / dt:,.0f}/s" if rows and dt else ""
+        done = f"{rows} Zeilen" if rows is not None else "fertig"
+        self.report.append(f"  {label:<22} {done} in {dt:.2f}s{rate}{stat['note']}")
+
+    def copy_in(self, cur, name, path, derive=None):
+        """CSV per COPY in eine temporäre Staging-Tabelle laden; liefert die Kopfzeile."""
+        spec = STAGES[name]
+        table = f"import_{name}"
+        columns = list(spec["columns"]) + (list(BIN_DERIVED) if derive else [])
+        cur.execute(f"CREATE TEMP TABLE {table} ({', '.join(f'{c} text' for c in columns)}) ON COMMIT DROP;")
+
+        try:
+            f = open(path, "rb")
+        except OSError as e:
+            raise CommandError(f"{path}: {e}")
+        with f, self.phase(f"copy {name}") as ph:
+            header_line = f.readline().decode("utf-8-sig")
+            header = [h.strip().lower() for h in next(csv.reader([header_line], delimiter=self.delimiter), [])]
+            unknown = set(header) - set(spec["columns"])
+            missing = set(spec["required"]) - set(header)
+            if unknown or missing:
+                raise CommandError(f"{path}: unbekannte Spalten {sorted(unknown)}, fehlend {sorted(missing)}")
+
+            raw = cur.cursor  # psycopg-Cursor für COPY
+            if derive is None:
+                stmt = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, DELIMITER {})").format(
+                    sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, header)),
+                    sql.Literal(self.delimiter))
+                with raw.copy(stmt) as copy:
+                    while chunk := f.read(1 << 20):
+                        copy.write(chunk)
+            else:
+                stmt = sql.SQL("COPY {} ({}) FROM STDIN").format(
+                    sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, header + list(BIN_DERIVED))))
+                reader = csv.reader(io.TextIOWrapper(f, encoding="utf-8", newline=""), delimiter=self.delimiter)
+                with raw.copy(stmt) as copy:
+                    for row in reader:
+                        if not row:
+                            continue
+                        values = ([v.strip() or None for v in row] + [None] * len(header))[:len(header)]
+                        copy.write_row(values + derive(dict(zip(header, values))))
+            ph["rows"] = raw.rowcount
+        cur.execute(f"ANALYZE {table};")  # Temp-Tabellen haben sonst keine Statistik für die Joins
+        self.copied += max(ph["rows"], 0)
+        return header
+
+    def upsert(self, cur, label, statement, params=None, reject=None):
+        with self.phase(label) as ph:
+            cur.execute(statement, params)
+            ph["rows"] = cur.rowcount
+            if reject:
+                self.note_rejects(cur, ph, reject)
+
+    @staticmethod
+    def note_rejects(cur, ph, name):
+        cur.execute(REJECTS[name])
+        skipped = cur.fetchone()[0]
+        if skipped:
+            ph["note"] = f"  ({skipped} ohne Zuordnung übersprungen)"
+
+    # ------------------- Stufen -------------------
+
+    def load_locations(self, cur, path, ref):
+        self.copy_in(cur, "locations", path)
+        self.upsert(cur, "upsert locations", UPSERT_LOCATIONS)
+
+    def load_items(self, cur, path, ref):
+        header = self.copy_in(cur, "items", path)
+        # nur Spalten überschreiben, die in der Datei vorkommen
+        cols = ["name"] + [c for c in ("description", "uom") if c in header]
+        self.upsert(cur, "upsert items", UPSERT_ITEMS.format(
+            updates=", ".join(f"{c} = EXCLUDED.{c}" for c in cols),
+            current=", ".join(f"inventory_item.{c}" for c in cols),
+            excluded=", ".join(f"EXCLUDED.{c}" for c in cols),
+        ))
+
+    def load_aliases(self, cur, path, ref):
+        self.copy_in(cur, "aliases", path)
+        self.upsert(cur, "upsert aliases", UPSERT_ALIASES, reject="aliases")
+
+    def load_bins(self, cur, path, ref):
+        def derive(row):
+            code = row.get("code") or ""
+            parts = bin_components(code)
+            return [canonical_bin_code(code)] + [parts.get(k) or None for k in BIN_DERIVED[1:]]
+
+        self.copy_in(cur, "bins", path, derive=derive)
+        self.upsert(cur, "upsert bins", UPSERT_BINS, reject="bins")
+
+    def load_stock(self, cur, path, ref):
+        self.copy_in(cur, "stock", path)
+        # Bestandstabelle bis zum Commit sperren, damit die berechnete Differenz gültig bleibt
+        cur.execute("LOCK TABLE inventory_inventory IN SHARE ROW EXCLUSIVE MODE;")
+        with self.phase("opening diff") as ph:
+            for stmt in _statements(OPENING_SQL):
+                cur.execute(stmt)
+            cur.execute("SELECT count(*) FROM import_opening_delta;")
+            ph["rows"] = cur.fetchone()[0]
+            self.note_rejects(cur, ph, "stock")
+        with self.phase("opening postings") as ph:
+            stmts = _statements(APPLY_OPENING_SQL)
+            cur.execute(stmts[0], {"ref": ref})
+            ph["rows"] = cur.rowcount
+            for stmt in stmts[1:]:
+                cur.execute(stmt)
@@ -0,0 +1,34 @@
+from datetime import date
+
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+
+from inventory.partitions import DEFAULT_PARTITION, month_start, add_months, partition_name, ensure_month
+
+
+class Command(BaseCommand):
+    help = "Legt die Monatspartitionen des StockLedger im Voraus an (z. B. täglich per Cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=3, help="Anzahl zukünftiger Monate (Standard 3).")
+
+    def handle(self, *args, **opts):
+        start = month_start(date.today())
+        created = []
+        for n in range(opts["ahead"] + 1):
+            month = add_months(start, n)
+            # je Monat eine kurze Transaktion: ATTACH sperrt die Elterntabelle nur kurz
+            with transaction.atomic(), connection.cursor() as cur:
+                if ensure_month(cur, month):
+                    created.append(partition_name(month))
+
+        for name in created:
+            self.stdout.write(f"  angelegt: {name}")
+        with connection.cursor() as cur:
+            cur.execute(f"SELECT count(*) FROM {DEFAULT_PARTITION};")
+            stray = cur.fetchone()[0]
+        if stray:
+            self.stdout.write(self.style.WARNING(
+                f"{stray} Buchung(en) in {DEFAULT_PARTITION} – Partitionen für diese Monate fehlen."))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(created)} Partition(en) angelegt, bis einschließlich {add_months(start, opts['ahead']):%Y-%m} vorhanden."))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import onhand
+
+
+class Command(BaseCommand):
+    help = "Prüft die Bestands-Summentabellen gegen inventory_inventory (--rebuild baut sie neu auf)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Summen komplett neu berechnen.")
+        parser.add_argument("--limit", type=int, default=20, help="Max. gemeldete Abweichungen.")
+
+    def handle(self, *args, **opts):
+        if opts["rebuild"]:
+            t0 = time.perf_counter()
+            onhand.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Summentabellen neu aufgebaut in {time.perf_counter() - t0:.1f}s."))
+
+        diffs = onhand.verify(limit=opts["limit"])
+        if not diffs:
+            self.stdout.write(self.style.SUCCESS("Summentabellen stimmen mit dem Bestand überein."))
+            return
+        for level, item_id, location_id, summary, actual in diffs:
+            self.stdout.write(f"  {level:8s} item={item_id} location={location_id or '-'}: "
+                              f"summary={summary} actual={actual}")
+        raise CommandError(f"{len(diffs)} Abweichung(en) gefunden – mit --rebuild korrigieren.")
@@ -0,0 +1,31 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import checkpoints
+
+
+class Command(BaseCommand):
+    help = "Schreibt die täglichen Bestands-Checkpoints ab dem letzten Lauf fort (z. B. nachts per Cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--until", help="Letzter Tag (YYYY-MM-DD), Standard: gestern.")
+
+    def handle(self, *args, **opts):
+        until = None
+        if opts["until"]:
+            try:
+                until = date.fromisoformat(opts["until"])
+            except ValueError:
+                raise CommandError("--until erwartet YYYY-MM-DD.")
+
+        t0 = time.perf_counter()
+        done = checkpoints.build(until=until)
+        if not done:
+            self.stdout.write("Checkpoints sind aktuell.")
+            return
+        for day, changed in done:
+            self.stdout.write(f"  {day}: {changed} Bin-Bestände geändert")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(done)} Tag(e) fortgeschrieben in {time.perf_counter() - t0:.1f}s."))
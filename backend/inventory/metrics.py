@@ -0,0 +1,192 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.db import connection
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Sekunden; deckt Cache-Treffer (ms) bis langsame Buchungen/Exporte ab
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _fmt(v) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield from self._samples(key, value)
+
+    def _samples(self, key, value):
+        yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Gesetzter Wert oder – mit fn – beim Scrape berechnet (fn liefert {label-tuple: wert})."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        if self.fn is not None:
+            try:
+                values = self.fn()
+            except Exception:
+                values = {}  # DB nicht erreichbar: Scrape trotzdem beantworten
+            with self._lock:
+                self._values = dict(values)
+        yield from super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def _samples(self, key, state):
+        counts, total, sum_ = state
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _fmt(float(bound)))])} {cumulative}"
+        yield f"{self.name}_bucket{_labels(self.labelnames, key, [('le', '+Inf')])} {total}"
+        yield f"{self.name}_count{_labels(self.labelnames, key)} {total}"
+        yield f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(float(sum_))}"
+
+
+class Registry:
+    """
+    Prozesslokale Metriken im Prometheus-Textformat (ohne externe Bibliothek).
+    Mehrere Worker liefern je eigene Werte; Prometheus aggregiert über die Instanzen.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ------------------- Metriken -------------------
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "warehouse_http_request_duration_seconds", "Dauer je Request nach Route",
+    ("method", "route", "status")))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    "warehouse_http_request_queries", "SQL-Queries je Request nach Route",
+    ("route",), buckets=QUERY_BUCKETS))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "warehouse_cache_requests_total", "Cache-Zugriffe (result=hit|miss)", ("cache", "result")))
+
+
+def cache_hit(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _db_connections():
+    """Server-Verbindungen dieser Datenbank nach Zustand (active, idle, idle in transaction …)."""
+    with connection.cursor() as cur:
+        cur.execute("""
+            SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity
+            WHERE datname = current_database() GROUP BY 1
+        """)
+        return {(state,): n for state, n in cur.fetchall()}
+
+
+def _db_max_connections():
+    with connection.cursor() as cur:
+        cur.execute("SELECT current_setting('max_connections')::int")
+        return {(): cur.fetchone()[0]}
+
+
+def _db_pool():
+    """psycopg-Pool-Statistik, falls DATABASES[...]['OPTIONS']['pool'] gesetzt ist."""
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        return {}
+    stats = pool.get_stats()
+    return {(k,): stats.get(k, 0) for k in ("pool_min", "pool_max", "pool_size", "pool_available",
+                                             "requests_waiting")}
+
+
+REGISTRY.register(Gauge("warehouse_db_connections", "Verbindungen in pg_stat_activity nach Zustand",
+                        ("state",), fn=_db_connections))
+REGISTRY.register(Gauge("warehouse_db_max_connections", "max_connections des Servers", fn=_db_max_connections))
+REGISTRY.register(Gauge("warehouse_db_pool", "Connection-Pool dieses Workers", ("stat",), fn=_db_pool))
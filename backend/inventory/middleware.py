@@ -0,0 +1,193 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import REQUEST_LATENCY, REQUEST_QUERIES
+
+log = logging.getLogger("inventory.perf")
+
+# Statistik des laufenden Requests; ContextVars wandern mit durch sync_to_async/async_to_sync
+_current_stats: ContextVar = ContextVar("perf_stats", default=None)
+
+
+class QueryStats:
+    """Anzahl, DB-Zeit und Wiederholungen je SQL-Template (Parameter getrennt)."""
+    __slots__ = ("count", "db_time", "templates")
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.templates = Counter()
+
+    def add(self, sql, elapsed: float):
+        self.db_time += elapsed
+        self.count += 1
+        self.templates[sql] += 1
+
+    def repeated(self, threshold: int):
+        """SELECT-Templates, die im selben Request >= threshold mal liefen (typisch N+1)."""
+        return [(sql, n) for sql, n in self.templates.most_common()
+                if n >= threshold and sql.lstrip()[:6].upper() == "SELECT"]
+
+
+def record_query(sql, elapsed: float):
+    """Query dem laufenden Request zurechnen (auch für Queries außerhalb des Django-ORM)."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(sql, elapsed)
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_query(sql, time.perf_counter() - t0)
+
+
+def _install(conn):
+    if _execute_wrapper not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_execute_wrapper)
+
+
+# Jede (auch nachträglich in sync_to_async-Threads erzeugte) Verbindung zählt mit
+connection_created.connect(lambda sender, connection, **kw: _install(connection), weak=False)
+
+
+class PerfMiddleware:
+    """
+    Misst je Request Queries, DB-Zeit, View-Zeit und Render-Zeit (DRF-Serialisierung
+    beim response.render()). Ausgabe als Server-Timing-Header, als JSON-Logzeile
+    (Logger inventory.perf) und als Histogramm je Route für /metrics;
+    wiederholte SELECT-Templates werden als N+1 gemeldet.
+    Sync und async: unter ASGI entsteht dadurch kein Thread-Wechsel je Request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, "PERF_NPLUSONE_THRESHOLD", 5)
+        self.slow_ms = getattr(settings, "PERF_SLOW_MS", 500)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Hooks als Coroutine, sonst adaptiert Django sie per sync_to_async
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        _install(connection)
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        request._perf = {"view_start": None, "view_end": None}
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, t0)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        request._perf = {"view_start": None, "view_end": None}
+        t0 = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, t0)
+
+    def finish(self, request, response, stats, t0):
+        t_end = time.perf_counter()
+        marks = request._perf
+        view_start = marks["view_start"] or t0
+        view_end = marks["view_end"] or t_end
+        timings = {
+            "total": (t_end - t0) * 1000,
+            "view": (view_end - view_start) * 1000,
+            "render": (t_end - view_end) * 1000,
+            "db": stats.db_time * 1000,
+        }
+        nplus1 = stats.repeated(self.threshold)
+
+        # Route-Muster statt Pfad: begrenzte Label-Kardinalität (SKU/IDs stecken nur im Pfad)
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "<unmatched>"
+        REQUEST_LATENCY.observe(t_end - t0, method=request.method, route=route, status=response.status_code)
+        REQUEST_QUERIES.observe(stats.count, route=route)
+
+        parts = [f'db;dur={timings["db"]:.1f};desc="{stats.count} queries"']
+        parts += [f"{k};dur={timings[k]:.1f}" for k in ("view", "render", "total")]
+        if nplus1:
+            parts.append(f'nplus1;desc="{len(nplus1)} templates"')
+        response["Server-Timing"] = ", ".join(parts)
+
+        level = logging.WARNING if nplus1 or timings["total"] >= self.slow_ms else logging.INFO
+        if log.isEnabledFor(level):
+            entry = {
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "queries": stats.count,
+                **{f"{k}_ms": round(v, 1) for k, v in timings.items()},
+            }
+            if nplus1:
+                entry["nplus1"] = [{"sql": sql[:200], "count": n} for sql, n in nplus1[:3]]
+            log.log(level, json.dumps(entry, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perf["view_start"] = time.perf_counter()
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._perf["view_start"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # View ist fertig, gerendert (serialisiert) wird erst danach
+        request._perf["view_end"] = time.perf_counter()
+        return response
+
+    async def _aprocess_template_response(self, request, response):
+        request._perf["view_end"] = time.perf_counter()
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, zusätzlich async-fähig. Die Originalklasse ist nur sync; unter ASGI
+    liefe sonst jeder Request (nicht nur statische Dateien) über einen Thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('inventory', '0005_cacheversion'),
+    ]
+
+    operations = [
+        migrations.RunSQL("CREATE EXTENSION IF NOT EXISTS pg_trgm;"),
+        # GIN-Trigramm-Indizes für die trgm-Engine von fuzzy_candidates
+        migrations.RunSQL(
+            """
+            CREATE INDEX IF NOT EXISTS idx_item_sku_trgm ON inventory_item USING gin (sku gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS idx_item_name_trgm ON inventory_item USING gin (name gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS idx_itemalias_alias_trgm ON inventory_itemalias USING gin (alias gin_trgm_ops);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS idx_item_sku_trgm;
+            DROP INDEX IF EXISTS idx_item_name_trgm;
+            DROP INDEX IF EXISTS idx_itemalias_alias_trgm;
+            """,
+        ),
+    ]
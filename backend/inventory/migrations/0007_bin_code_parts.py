@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:36
+
+import re
+
+from django.db import migrations, models
+
+
+# Stand von inventory.bincodes bei Erstellung dieser Migration (eingefroren,
+# spätere Änderungen am Modul dürfen das Backfill nicht verändern)
+def _tokens(code):
+    return [str(int(t)) if t.isdigit() else t.upper() for t in re.findall(r"[A-Za-z]+|\d+", code or "")]
+
+
+def canonical_bin_code(code):
+    return "-".join(_tokens(code))
+
+
+def bin_components(code):
+    t = _tokens(code)
+    return {
+        "aisle": t[0] if len(t) > 0 else "",
+        "rack": t[1] if len(t) > 1 else "",
+        "level": t[2] if len(t) > 2 else "",
+        "slot": "-".join(t[3:]),
+    }
+
+
+def fill_code_parts(apps, schema_editor):
+    Bin = apps.get_model("inventory", "Bin")
+    batch = []
+    for b in Bin.objects.only("id", "code").iterator(chunk_size=2000):
+        b.code_canonical = canonical_bin_code(b.code)
+        for k, v in bin_components(b.code).items():
+            setattr(b, k, v)
+        batch.append(b)
+        if len(batch) >= 2000:
+            Bin.objects.bulk_update(batch, ["code_canonical", "aisle", "rack", "level", "slot"])
+            batch = []
+    if batch:
+        Bin.objects.bulk_update(batch, ["code_canonical", "aisle", "rack", "level", "slot"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_enable_pg_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bin',
+            name='aisle',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='bin',
+            name='code_canonical',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='bin',
+            name='level',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='bin',
+            name='rack',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='bin',
+            name='slot',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.RunPython(fill_code_parts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bin',
+            index=models.Index(fields=['code_canonical'], name='bin_code_canon_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='bin',
+            index=models.Index(fields=['aisle', 'rack', 'level', 'slot'], name='bin_components_idx'),
+        ),
+    ]
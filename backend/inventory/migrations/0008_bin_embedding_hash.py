@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_bin_code_parts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bin',
+            name='embedding_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_bin_embedding_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnHandItem',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='on_hand', serialize=False, to='inventory.item')),
+                ('qty', models.DecimalField(decimal_places=3, default=0, max_digits=18)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OnHandLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty', models.DecimalField(decimal_places=3, default=0, max_digits=18)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.item')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.location')),
+            ],
+            options={
+                'unique_together': {('item', 'location')},
+            },
+        ),
+        # Erstbefüllung aus dem aktuellen Bestand
+        migrations.RunSQL(
+            """
+            INSERT INTO inventory_onhandlocation (item_id, location_id, qty)
+                SELECT inv.item_id, b.location_id, SUM(inv.qty)
+                FROM inventory_inventory inv
+                JOIN inventory_bin b ON b.id = inv.bin_id
+                GROUP BY inv.item_id, b.location_id;
+            INSERT INTO inventory_onhanditem (item_id, qty)
+                SELECT item_id, SUM(qty) FROM inventory_inventory GROUP BY item_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
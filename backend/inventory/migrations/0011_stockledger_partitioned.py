@@ -0,0 +1,124 @@
+from datetime import date
+
+from django.db import migrations, models
+
+# DDL-Stand bei Erstellung dieser Migration, bewusst nicht aus inventory.partitions importiert:
+# spätere Änderungen dort dürfen diese Migration nicht verändern.
+PARENT = "inventory_stockledger"
+DEFAULT_PARTITION = f"{PARENT}_default"
+MONTHS_AHEAD = 3
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    m = d.month - 1 + n
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def create_month(cur, start: date):
+    # frisch angelegte Tabelle: Default-Partition ist leer, nichts umzuziehen
+    end = add_months(start, 1)
+    cur.execute(f"CREATE TABLE {PARENT}_p{start:%Y%m} PARTITION OF {PARENT} FOR VALUES FROM (%s) TO (%s);",
+                [start, end])
+
+COLUMNS = """
+    id bigint NOT NULL DEFAULT nextval('inventory_stockledger_id_seq_new'),
+    ts timestamp with time zone NOT NULL,
+    qty numeric(18, 3) NOT NULL,
+    ref_type varchar(50) NOT NULL,
+    ref_id varchar(100) NOT NULL,
+    from_bin_id bigint NULL REFERENCES inventory_bin (id) DEFERRABLE INITIALLY DEFERRED,
+    item_id bigint NOT NULL REFERENCES inventory_item (id) DEFERRABLE INITIALLY DEFERRED,
+    to_bin_id bigint NULL REFERENCES inventory_bin (id) DEFERRABLE INITIALLY DEFERRED
+"""
+
+BASE_INDEXES = f"""
+    CREATE INDEX inventory_stockledger_from_bin_id ON {PARENT} (from_bin_id);
+    CREATE INDEX inventory_stockledger_to_bin_id ON {PARENT} (to_bin_id);
+    CREATE INDEX ledger_ref_idx ON {PARENT} (ref_type, ref_id) WHERE NOT (ref_id = '');
+"""
+
+# Verlauf je Artikel bzw. gesamt, passend zu ORDER BY ts DESC, id DESC
+HISTORY_INDEXES = f"""
+    CREATE INDEX ledger_item_ts_idx ON {PARENT} (item_id, ts DESC);
+    CREATE INDEX ledger_ts_idx ON {PARENT} (ts DESC, id DESC);
+"""
+
+
+def _run(cur, script):
+    for stmt in filter(str.strip, script.split(";")):
+        cur.execute(stmt)
+
+
+def partition_ledger(apps, schema_editor):
+    """
+    Ledger in eine nach Monat (ts) partitionierte Tabelle umbauen.
+    PK muss den Partitionsschlüssel enthalten -> (id, ts); id kommt weiter aus einer Sequenz.
+    """
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(f"ALTER TABLE {PARENT} RENAME TO {PARENT}_old;")
+        cur.execute(f"SELECT min(ts), COALESCE(max(id), 0) FROM {PARENT}_old;")
+        first_ts, max_id = cur.fetchone()
+        cur.execute("CREATE SEQUENCE inventory_stockledger_id_seq_new;")
+        cur.execute("SELECT setval('inventory_stockledger_id_seq_new', %s, false);", [max_id + 1])
+        cur.execute(f"CREATE TABLE {PARENT} ({COLUMNS}, PRIMARY KEY (id, ts)) PARTITION BY RANGE (ts);")
+        cur.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT;")
+
+        start = month_start(first_ts.date() if first_ts else date.today())
+        last = add_months(month_start(date.today()), MONTHS_AHEAD)
+        while start <= last:
+            create_month(cur, start)
+            start = add_months(start, 1)
+
+        cur.execute(f"""
+            INSERT INTO {PARENT} (id, ts, qty, ref_type, ref_id, from_bin_id, item_id, to_bin_id)
+            SELECT id, ts, qty, ref_type, ref_id, from_bin_id, item_id, to_bin_id FROM {PARENT}_old;
+        """)
+        cur.execute(f"DROP TABLE {PARENT}_old;")
+        cur.execute("ALTER SEQUENCE inventory_stockledger_id_seq_new RENAME TO inventory_stockledger_id_seq;")
+        cur.execute(f"ALTER SEQUENCE inventory_stockledger_id_seq OWNED BY {PARENT}.id;")
+        # Indizes erst nach dem Umkopieren; auf der Elterntabelle angelegt gelten sie für alle Partitionen
+        _run(cur, BASE_INDEXES + HISTORY_INDEXES)
+        cur.execute(f"ANALYZE {PARENT};")
+
+
+def unpartition_ledger(apps, schema_editor):
+    with schema_editor.connection.cursor() as cur:
+        cur.execute(f"ALTER TABLE {PARENT} RENAME TO {PARENT}_part;")
+        cur.execute("ALTER SEQUENCE inventory_stockledger_id_seq OWNED BY NONE;")
+        cur.execute("ALTER SEQUENCE inventory_stockledger_id_seq RENAME TO inventory_stockledger_id_seq_new;")
+        for idx in ("ledger_item_ts_idx", "ledger_ts_idx", "inventory_stockledger_from_bin_id",
+                    "inventory_stockledger_to_bin_id", "ledger_ref_idx"):
+            cur.execute(f"DROP INDEX {idx};")
+        cur.execute(f"CREATE TABLE {PARENT} ({COLUMNS}, PRIMARY KEY (id));")
+        cur.execute(f"INSERT INTO {PARENT} SELECT id, ts, qty, ref_type, ref_id, from_bin_id, item_id, to_bin_id FROM {PARENT}_part;")
+        cur.execute(f"DROP TABLE {PARENT}_part CASCADE;")
+        cur.execute("ALTER SEQUENCE inventory_stockledger_id_seq_new RENAME TO inventory_stockledger_id_seq;")
+        cur.execute(f"ALTER SEQUENCE inventory_stockledger_id_seq OWNED BY {PARENT}.id;")
+        _run(cur, BASE_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_idempotency'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(partition_ledger, unpartition_ledger)],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='stockledger',
+                    index=models.Index(fields=['item', '-ts'], name='ledger_item_ts_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='stockledger',
+                    index=models.Index(fields=['-ts', '-id'], name='ledger_ts_idx'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_stockledger_partitioned'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckpointRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('cutoff', models.DateTimeField()),
+                ('changed', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('qty', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('bin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.bin')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bin', 'item', '-day'], name='checkpoint_bin_idx')],
+                'unique_together': {('item', 'bin', 'day')},
+            },
+        ),
+    ]
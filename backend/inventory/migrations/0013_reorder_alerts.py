@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Eingefrorene Kopie von inventory.reorder.REBUILD_SQL (Stand dieser Migration):
+# spätere Änderungen an reorder.py dürfen die Erstbefüllung nicht verändern.
+REBUILD_SQL = """
+    DELETE FROM inventory_reorderalert;
+    WITH ev AS (
+        SELECT rp.id, rp.item_id, rp.location_id, s.on_hand, rp.reorder_point,
+               GREATEST(rp.reorder_qty, rp.reorder_point - s.on_hand) AS suggested_qty
+        FROM inventory_reorderpolicy rp
+        LEFT JOIN inventory_onhanditem oi
+               ON rp.location_id IS NULL AND oi.item_id = rp.item_id
+        LEFT JOIN inventory_onhandlocation ol
+               ON ol.item_id = rp.item_id AND ol.location_id = rp.location_id
+        CROSS JOIN LATERAL (SELECT COALESCE(oi.qty, ol.qty, 0) AS on_hand) s
+    )
+    INSERT INTO inventory_reorderalert
+        (policy_id, item_id, location_id, on_hand, reorder_point, suggested_qty, updated)
+    SELECT id, item_id, location_id, on_hand, reorder_point, suggested_qty, now()
+    FROM ev WHERE on_hand <= reorder_point;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_stock_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderAlert',
+            fields=[
+                ('policy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='alert', serialize=False, to='inventory.reorderpolicy')),
+                ('on_hand', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('reorder_point', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('suggested_qty', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.item')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='inventory.location')),
+            ],
+        ),
+        # Erstbefüllung aus den Summentabellen
+        migrations.RunSQL(REBUILD_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
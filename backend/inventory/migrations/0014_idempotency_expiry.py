@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_reorder_alerts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='idempotencyrecord',
+            index=models.Index(fields=['created'], name='idempotency_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_idempotency_expiry'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockledger',
+            name='ledger_ref_idx',
+        ),
+    ]
@@ -1,6 +1,10 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
 from pgvector.django import VectorField
 
+from .bincodes import canonical_bin_code, bin_components
+
 class Item(models.Model):
     sku = models.CharField(max_length=100, unique=True)
     name = models.CharField(max_length=200)
@@ -28,10 +32,30 @@ class Bin(models.Model):
     location = models.ForeignKey(Location, on_delete=models.CASCADE)
     code = models.CharField(max_length=50)
     embedding = VectorField(dimensions=1536, null=True, blank=True)  # NEU
+    embedding_hash = models.CharField(max_length=64, blank=True, editable=False)  # sha256 des eingebetteten Texts
+    # Aus code abgeleitet (siehe bincodes.py), für indexgestützte Auflösung
+    code_canonical = models.CharField(max_length=50, blank=True, editable=False)
+    aisle = models.CharField(max_length=50, blank=True, editable=False)
+    rack = models.CharField(max_length=50, blank=True, editable=False)
+    level = models.CharField(max_length=50, blank=True, editable=False)
+    slot = models.CharField(max_length=50, blank=True, editable=False)
     class Meta:
         unique_together = (('location','code'),)
+        indexes = [
+            models.Index(fields=["code_canonical"], name="bin_code_canon_idx", opclasses=["varchar_pattern_ops"]),
+            models.Index(fields=["aisle", "rack", "level", "slot"], name="bin_components_idx"),
+        ]
     def __str__(self): return f"{self.location.code}-{self.code}"
 
+    def set_code_parts(self):
+        self.code_canonical = canonical_bin_code(self.code)
+        for k, v in bin_components(self.code).items():
+            setattr(self, k, v)
+
+    def save(self, *args, **kwargs):
+        self.set_code_parts()
+        super().save(*args, **kwargs)
+
 class ReorderPolicy(models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     location = models.ForeignKey(Location, on_delete=models.CASCADE, null=True, blank=True)
@@ -41,6 +65,19 @@ class ReorderPolicy(models.Model):
     class Meta:
         unique_together = (('item','location'),)
 
+class ReorderAlert(models.Model):
+    """
+    Policy, deren Bestand aktuell <= reorder_point ist. Wird bei jeder Buchung
+    (für die berührten Item/Location-Paare) und bei Policy-Änderungen fortgeschrieben.
+    """
+    policy = models.OneToOneField(ReorderPolicy, on_delete=models.CASCADE, primary_key=True, related_name="alert")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, null=True, blank=True)
+    on_hand = models.DecimalField(max_digits=18, decimal_places=3)
+    reorder_point = models.DecimalField(max_digits=18, decimal_places=3)
+    suggested_qty = models.DecimalField(max_digits=18, decimal_places=3)
+    updated = models.DateTimeField(auto_now=True)
+
 class StockLedger(models.Model):
     ts = models.DateTimeField(auto_now_add=True)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
@@ -49,6 +86,12 @@ class StockLedger(models.Model):
     qty = models.DecimalField(max_digits=18, decimal_places=3)
     ref_type = models.CharField(max_length=50, blank=True)
     ref_id = models.CharField(max_length=100, blank=True)
+    class Meta:
+        indexes = [
+            # Tabelle ist monatsweise nach ts partitioniert (Migration 0011, Command ledger_partitions)
+            models.Index(fields=["item", "-ts"], name="ledger_item_ts_idx"),
+            models.Index(fields=["-ts", "-id"], name="ledger_ts_idx"),
+        ]
 
 class Inventory(models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
@@ -58,4 +101,71 @@ class Inventory(models.Model):
         unique_together = (('item','bin'),)
 
 
+class OnHandLocation(models.Model):
+    """Gepflegter Bestand je (Item, Location) – wird in derselben Transaktion wie die Buchung aktualisiert."""
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    qty = models.DecimalField(max_digits=18, decimal_places=3, default=0)
+    class Meta:
+        unique_together = (('item','location'),)
+
+class OnHandItem(models.Model):
+    """Gepflegter Gesamtbestand je Item."""
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name="on_hand")
+    qty = models.DecimalField(max_digits=18, decimal_places=3, default=0)
+
+
+class StockCheckpoint(models.Model):
+    """
+    Bin-Bestand am Ende von `day`, aus dem Ledger fortgeschrieben.
+    Es wird nur geschrieben, wenn sich der Bestand an dem Tag geändert hat:
+    Stand zu Tag D = jüngste Zeile mit day <= D (Command stock_checkpoints).
+    """
+    day = models.DateField()
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    bin = models.ForeignKey(Bin, on_delete=models.CASCADE)
+    qty = models.DecimalField(max_digits=18, decimal_places=3)
+    class Meta:
+        unique_together = (('item', 'bin', 'day'),)
+        indexes = [
+            models.Index(fields=["bin", "item", "-day"], name="checkpoint_bin_idx"),
+        ]
+
+
+class CheckpointRun(models.Model):
+    """Abgeschlossener Checkpoint: enthält alle Ledger-Buchungen mit ts < cutoff."""
+    day = models.DateField(unique=True)
+    cutoff = models.DateTimeField()
+    changed = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Gespeichertes Ergebnis einer Buchung je Idempotency-Key (Header, je Buchungsart).
+    Wiederholte Requests bekommen die Originalantwort, bis IDEMPOTENCY_TTL_HOURS abgelaufen sind
+    (Command idempotency_cleanup löscht alte Records).
+    """
+    key = models.CharField(max_length=200)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(default=0)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key"], condition=~Q(key=""), name="idempotency_key_uniq"),
+        ]
+        indexes = [models.Index(fields=["created"], name="idempotency_created_idx")]
+
+
+class CacheVersion(models.Model):
+    """
+    Versionszähler für prozesslokale Caches (z. B. Fuzzy-Index).
+    Jeder Worker vergleicht seine Version mit der DB und lädt bei Abweichung neu.
+    """
+    key = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    def __str__(self): return f"{self.key}@{self.version}"
+
+
 # Create your models here.
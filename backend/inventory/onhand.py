@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from . import reorder
+
+REBUILD_SQL = """
+    DELETE FROM inventory_onhandlocation;
+    DELETE FROM inventory_onhanditem;
+    INSERT INTO inventory_onhandlocation (item_id, location_id, qty)
+        SELECT inv.item_id, b.location_id, SUM(inv.qty)
+        FROM inventory_inventory inv
+        JOIN inventory_bin b ON b.id = inv.bin_id
+        GROUP BY inv.item_id, b.location_id;
+    INSERT INTO inventory_onhanditem (item_id, qty)
+        SELECT item_id, SUM(qty) FROM inventory_inventory GROUP BY item_id;
+"""
+
+
+def apply_deltas(item_id: int, by_location: dict):
+    """
+    Summen für ein Item fortschreiben: {location_id: delta}.
+    Ein Statement (Upsert per CTE), muss in der Buchungstransaktion laufen.
+    """
+    apply_batch({(item_id, loc): d for loc, d in by_location.items()})
+
+
+def apply_batch(deltas: dict):
+    """
+    Summen für viele Items in einem Statement: {(item_id, location_id): delta}.
+    Danach werden die Reorder-Alerts der berührten Paare neu bewertet.
+    """
+    loc_rows = sorted((k, d) for k, d in deltas.items() if d)  # feste Sperrreihenfolge
+    if not loc_rows:
+        return
+    per_item = {}
+    for (item_id, _loc), d in loc_rows:
+        per_item[item_id] = per_item.get(item_id, Decimal("0")) + d
+    item_rows = sorted((i, d) for i, d in per_item.items() if d)
+
+    params = []
+    for (item_id, loc), d in loc_rows:
+        params += [item_id, loc, d]
+    sql = f"""
+        INSERT INTO inventory_onhandlocation (item_id, location_id, qty)
+        VALUES {", ".join(["(%s, %s, %s)"] * len(loc_rows))}
+        ON CONFLICT (item_id, location_id)
+        DO UPDATE SET qty = inventory_onhandlocation.qty + EXCLUDED.qty
+    """
+    if item_rows:
+        sql = f"""
+            WITH loc AS ({sql})
+            INSERT INTO inventory_onhanditem (item_id, qty)
+            VALUES {", ".join(["(%s, %s)"] * len(item_rows))}
+            ON CONFLICT (item_id) DO UPDATE SET qty = inventory_onhanditem.qty + EXCLUDED.qty
+        """
+        for item_id, d in item_rows:
+            params += [item_id, d]
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+    reorder.evaluate_pairs(k for k, _d in loc_rows)
+
+
+def rebuild():
+    """Summentabellen (und Reorder-Alerts) komplett aus inventory_inventory neu aufbauen."""
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute("LOCK TABLE inventory_onhandlocation, inventory_onhanditem IN EXCLUSIVE MODE;")
+        for stmt in filter(str.strip, REBUILD_SQL.split(";")):
+            cur.execute(stmt)
+        reorder.rebuild()
+
+
+def verify(limit: int = 20):
+    """Abweichungen Summentabelle vs. Aggregat: [(ebene, item_id, location_id, summary, actual)]."""
+    with connection.cursor() as cur:
+        cur.execute("""
+            WITH actual AS (
+                SELECT inv.item_id, b.location_id, SUM(inv.qty) AS qty
+                FROM inventory_inventory inv JOIN inventory_bin b ON b.id = inv.bin_id
+                GROUP BY inv.item_id, b.location_id
+            )
+            SELECT 'location', COALESCE(s.item_id, a.item_id), COALESCE(s.location_id, a.location_id),
+                   COALESCE(s.qty, 0), COALESCE(a.qty, 0)
+            FROM inventory_onhandlocation s
+            FULL JOIN actual a ON a.item_id = s.item_id AND a.location_id = s.location_id
+            WHERE COALESCE(s.qty, 0) <> COALESCE(a.qty, 0)
+            UNION ALL
+            SELECT 'item', COALESCE(s.item_id, a.item_id), NULL, COALESCE(s.qty, 0), COALESCE(a.qty, 0)
+            FROM inventory_onhanditem s
+            FULL JOIN (SELECT item_id, SUM(qty) AS qty FROM inventory_inventory GROUP BY item_id) a
+                   ON a.item_id = s.item_id
+            WHERE COALESCE(s.qty, 0) <> COALESCE(a.qty, 0)
+            LIMIT %s;
+        """, [limit])
+        return cur.fetchall()
@@ -0,0 +1,246 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Unterhalb dieser Schätzung wird exakt gezählt (billig und genau)
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimated_count(model):
+    """
+    Zeilenzahl aus der Planer-Statistik (pg_class.reltuples), bei partitionierten
+    Tabellen über alle Partitionen summiert. None, wenn noch nie analysiert.
+    """
+    with connection.cursor() as cur:
+        cur.execute("""
+            SELECT sum(c.reltuples) FILTER (WHERE c.reltuples >= 0)::bigint
+            FROM pg_class c
+            WHERE c.oid = %s::regclass
+               OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass);
+        """, [model._meta.db_table] * 2)
+        row = cur.fetchone()
+    return row[0] if row and row[0] else None
+
+
+def _estimate(queryset):
+    """Schätzung nur für ungefilterte Querysets; sonst None."""
+    if queryset.query.where:
+        return None
+    est = estimated_count(queryset.model)
+    return est if est is not None and est >= ESTIMATE_THRESHOLD else None
+
+
+class EstimatedPage(Page):
+    """Seite mit geschätztem count: ob es weitergeht, entscheidet die eine Zeile zu viel."""
+
+    def __init__(self, object_list, number, paginator, more: bool):
+        super().__init__(object_list, number, paginator)
+        self.more = more
+
+    def has_next(self):
+        return self.more
+
+    # Nachbarseiten nicht gegen num_pages (aus der Schätzung) validieren
+    def next_page_number(self):
+        if not self.more:
+            raise EmptyPage(self.paginator.error_messages["no_results"])
+        return self.number + 1
+
+    def previous_page_number(self):
+        if self.number <= 1:
+            raise EmptyPage(self.paginator.error_messages["min_page"])
+        return self.number - 1
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    estimated = False
+
+    @cached_property
+    def count(self):
+        est = _estimate(self.object_list) if hasattr(self.object_list, "query") else None
+        if est is None:
+            return super().count
+        self.estimated = True
+        return est
+
+    def page(self, number):
+        """
+        Bei geschätztem count nach echten Zeilen schneiden: eine zu niedrige Schätzung
+        darf keine hinteren Seiten abschneiden, eine zu hohe keine leeren liefern.
+        """
+        if not self.count or not self.estimated:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        return EstimatedPage(rows[:self.per_page], number, self, more=len(rows) > self.per_page)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Seitennummern wie bisher, "count" bei großen Tabellen aber geschätzt statt COUNT(*)."""
+    django_paginator_class = EstimatedCountPaginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor-Pagination über die bestehende Sortierung des Querysets
+    (z. B. sku; location__code, code; -ts) plus id als Tiebreaker.
+    Jede Seite ist ein Index-Range-Scan ab dem letzten Schlüssel: kein COUNT(*), kein OFFSET.
+    Sortierfelder dürfen nicht NULL sein. "count" ist eine Schätzung (None bei Filtern).
+    """
+    page_size = 50
+    page_size_query_param = "limit"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+
+    def get_ordering(self, queryset):
+        fields = list(queryset.query.order_by) or ["id"]
+        if fields[-1].lstrip("-") not in ("id", "pk"):
+            fields.append("-id" if fields[0].startswith("-") else "id")
+        return fields
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        self.count = _estimate(queryset)
+        size = self.get_page_size(request)
+
+        qs = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                qs = qs.filter(self.after(decode_values(cursor)))
+            except ValueError:
+                raise NotFound("Invalid cursor")
+
+        rows = list(qs[:size + 1])
+        page = rows[:size]
+        self.next_cursor = (encode_values([self.value(page[-1], f) for f in self.ordering])
+                            if len(rows) > size else None)
+        return page
+
+    def after(self, values):
+        """WHERE-Bedingung "Schlüssel liegt hinter values" für gemischte Sortierrichtungen."""
+        if len(values) != len(self.ordering):
+            raise ValueError("cursor does not match ordering")
+        cond, prefix = Q(), {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            op = "lt" if field.startswith("-") else "gt"
+            cond |= Q(**prefix, **{f"{name}__{op}": value})
+            prefix[name] = value
+        # redundante Schranke auf dem ersten Feld, damit der Planer einen Range-Scan nutzt
+        first = self.ordering[0]
+        bound = {f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]}
+        return Q(**bound) & cond
+
+    @staticmethod
+    def value(obj, field):
+        if isinstance(obj, dict):  # Zeilen aus .values() (ValuesSerializer)
+            return obj[field.lstrip("-")]
+        for part in field.lstrip("-").split("__"):
+            obj = getattr(obj, part)
+        return obj
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"count": self.count, "next": self.get_next_link(), "previous": None, "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "nullable": True},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class OptionalKeysetPagination(KeysetPagination):
+    """
+    Keyset nur auf Wunsch: mit ?cursor= oder ?limit= wie KeysetPagination, sonst
+    Seitennummern (?page=N) über EstimatedCountPagination – bestehende Clients bleiben unverändert.
+    """
+    fallback_class = EstimatedCountPagination
+
+    def use_keyset(self, request) -> bool:
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None if self.use_keyset(request) else self.fallback_class()
+        if self.fallback is None:
+            return super().paginate_queryset(queryset, request, view)
+        return self.fallback.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.fallback is None:
+            return super().get_paginated_response(data)
+        return self.fallback.get_paginated_response(data)
+
+
+def encode_values(values) -> str:
+    # volle Mikrosekunden (DjangoJSONEncoder kürzt auf Millisekunden -> Zeilen würden übersprungen)
+    raw = json.dumps(values, separators=(",", ":"),
+                     default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_values(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def encode_cursor(ts: datetime, pk: int) -> str:
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{pk}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(ts, id) aus einem Cursor; ValueError bei ungültigem Wert."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, pk = raw.split("|")
+        return datetime.fromisoformat(ts), int(pk)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def keyset_before(qs, cursor: str):
+    """Zeilen strikt nach dem Cursor in der Reihenfolge (-ts, -id)."""
+    ts, pk = decode_cursor(cursor)
+    return qs.filter(Q(ts__lt=ts) | Q(ts=ts, id__lt=pk))
@@ -0,0 +1,48 @@
+from datetime import date
+
+PARENT = "inventory_stockledger"
+DEFAULT_PARTITION = f"{PARENT}_default"
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    m = d.month - 1 + n
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def partition_name(start: date) -> str:
+    return f"{PARENT}_p{start:%Y%m}"
+
+
+def existing_partitions(cursor) -> set:
+    cursor.execute("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = %s;
+    """, [PARENT])
+    return {r[0] for r in cursor.fetchall()}
+
+
+def ensure_month(cursor, start: date) -> bool:
+    """
+    Monatspartition anlegen (falls fehlend). Zeilen, die bereits in der
+    Default-Partition gelandet sind, werden vorher umgezogen. True = neu angelegt.
+    Muss in einer Transaktion laufen.
+    """
+    name = partition_name(start)
+    if name in existing_partitions(cursor):
+        return False
+    end = add_months(start, 1)
+    cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);")
+    cursor.execute(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE ts >= %s AND ts < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved;
+    """, [start, end])
+    cursor.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s);", [start, end])
+    return True
@@ -0,0 +1,153 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+# ------------------- Normalisierung (Zahlwörter, Umlaute) -------------------
+
+_UMLAUTS = str.maketrans({"ä": "a", "ö": "o", "ü": "u", "ß": "s"})
+
+_UNITS = {
+    "null": 0, "eins": 1, "zwei": 2, "zwo": 2, "drei": 3, "vier": 4,
+    "funf": 5, "sechs": 6, "sieben": 7, "acht": 8, "neun": 9, "zehn": 10, "elf": 11,
+    "zwolf": 12, "dreizehn": 13, "vierzehn": 14, "funfzehn": 15, "sechzehn": 16,
+    "siebzehn": 17, "achtzehn": 18, "neunzehn": 19,
+}
+_TENS = {
+    "zwanzig": 20, "dreisig": 30, "vierzig": 40, "funfzig": 50,
+    "sechzig": 60, "siebzig": 70, "achtzig": 80, "neunzig": 90,
+}
+# "ein"/"eine" sind meist Artikel ("eine Schraube"); als Zahl nur vor einer Einheit ("ein Stück")
+_ARTICLES = {"ein", "eine", "einen"}
+_UNIT_WORDS = {"stuck", "stk", "mal", "paar", "packung", "karton", "rolle", "meter", "mm", "cm", "kg"}
+_COMPOUND = re.compile(r"^(?:(%s)und)?(%s)$" % ("|".join(list(_UNITS) + ["ein"]), "|".join(_TENS)))
+
+
+def number_word(tok: str, next_tok: str = None):
+    """
+    'vier' -> '4', 'vierundzwanzig' -> '24', sonst None. Erwartet umlautfreie Kleinschreibung.
+    'ein'/'eine' nur mit folgender Einheit (next_tok) als '1'.
+    """
+    if tok in _ARTICLES:
+        return "1" if next_tok in _UNIT_WORDS else None
+    if tok in _UNITS:
+        return str(_UNITS[tok])
+    if tok == "hundert":
+        return "100"
+    m = _COMPOUND.match(tok)
+    if m:
+        return str(_TENS[m.group(2)] + (_UNITS.get(m.group(1), 1) if m.group(1) else 0))
+    return None
+
+
+def tokenize(s: str):
+    """
+    Kleinschreibung, Umlaute falten, Ziffern von Buchstaben trennen, Zahlwörter -> Ziffern.
+    'Schraube M vier zwölf' und 'Schraube M4x12' ergeben beide ['schraube', 'm', '4', ..., '12'].
+    """
+    t = (s or "").lower().translate(_UMLAUTS)
+    toks = re.findall(r"[a-z]+|\d+", t)
+    return [number_word(tok, toks[i + 1] if i + 1 < len(toks) else None) or tok
+            for i, tok in enumerate(toks)]
+
+
+def normalize_text(s: str) -> str:
+    return " ".join(tokenize(s))
+
+
+# ------------------- Kölner Phonetik -------------------
+
+def koelner_phonetik(word: str) -> str:
+    """Kölner Phonetik eines Worts (nur Buchstaben werden kodiert)."""
+    w = re.sub(r"[^a-z]", "", (word or "").lower().translate(_UMLAUTS))
+    if not w:
+        return ""
+    codes = []
+    for i, ch in enumerate(w):
+        prev = w[i - 1] if i > 0 else ""
+        nxt = w[i + 1] if i + 1 < len(w) else ""
+        if ch in "aeijouy":
+            c = "0"
+        elif ch == "h":
+            c = ""
+        elif ch == "b":
+            c = "1"
+        elif ch == "p":
+            c = "3" if nxt == "h" else "1"
+        elif ch in "dt":
+            c = "8" if nxt in ("c", "s", "z") else "2"
+        elif ch in "fvw":
+            c = "3"
+        elif ch in "gkq":
+            c = "4"
+        elif ch == "c":
+            if i == 0:
+                c = "4" if nxt in tuple("ahkloqrux") else "8"
+            elif prev in ("s", "z"):
+                c = "8"
+            else:
+                c = "4" if nxt in tuple("ahkoqux") else "8"
+        elif ch == "x":
+            c = "8" if prev in ("c", "k", "q") else "48"
+        elif ch == "l":
+            c = "5"
+        elif ch in "mn":
+            c = "6"
+        elif ch == "r":
+            c = "7"
+        elif ch in "sz":
+            c = "8"
+        else:
+            c = ""
+        codes.append(c)
+
+    raw = "".join(codes)
+    collapsed = []
+    for c in raw:
+        if not collapsed or collapsed[-1] != c:
+            collapsed.append(c)
+    if not collapsed:
+        return ""
+    return collapsed[0] + "".join(c for c in collapsed[1:] if c != "0")
+
+
+def token_codes(tokens):
+    """Ziffern-Token bleiben wörtlich, Wörter werden phonetisch kodiert."""
+    out = []
+    for tok in tokens:
+        code = tok if tok.isdigit() else koelner_phonetik(tok)
+        if code:
+            out.append(code)
+    return out
+
+
+# ------------------- Index -------------------
+
+class PhoneticIndex:
+    """
+    Invertierter Index phonetischer Codes -> Entry-Positionen.
+    narrow() liefert die Entries mit den meisten gemeinsamen Codes als Vorauswahl
+    für das Fuzzy-Scoring.
+    """
+
+    def __init__(self, texts):
+        self.norm = []
+        postings = defaultdict(list)
+        for idx, text in enumerate(texts):
+            tokens = tokenize(text)
+            self.norm.append(" ".join(tokens))
+            for code in set(token_codes(tokens)):
+                postings[code].append(idx)
+        self.postings = {c: np.asarray(v, dtype=np.int32) for c, v in postings.items()}
+        self.size = len(texts)
+
+    def narrow(self, q: str, shortlist: int = 200):
+        codes = set(token_codes(tokenize(q)))
+        arrays = [self.postings[c] for c in codes if c in self.postings]
+        if not arrays:
+            return np.empty(0, dtype=np.int32)
+        hits = np.bincount(np.concatenate(arrays), minlength=self.size)
+        found = np.flatnonzero(hits)
+        if len(found) > shortlist:
+            found = found[np.argpartition(hits[found], -shortlist)[-shortlist:]]
+        return np.sort(found)
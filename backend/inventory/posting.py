@@ -0,0 +1,152 @@
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from .models import StockLedger
+from . import onhand
+
+ADD_SQL = """
+    INSERT INTO inventory_inventory (item_id, bin_id, qty) VALUES (%s, %s, %s)
+    ON CONFLICT (item_id, bin_id) DO UPDATE SET qty = inventory_inventory.qty + EXCLUDED.qty
+    RETURNING qty;
+"""
+
+# Prüfung und Abbuchung in einem Statement: Zeilensperre + qty >= Menge
+TAKE_SQL = """
+    UPDATE inventory_inventory SET qty = qty - %s
+    WHERE item_id = %s AND bin_id = %s AND qty >= %s
+    RETURNING qty;
+"""
+
+
+class InsufficientStock(Exception):
+    def __init__(self, available):
+        super().__init__("insufficient stock in from_bin")
+        self.available = available
+
+
+def _add(cur, item_id, bin_id, qty) -> Decimal:
+    cur.execute(ADD_SQL, [item_id, bin_id, qty])
+    return cur.fetchone()[0]
+
+
+def _take(cur, item_id, bin_id, qty) -> Decimal:
+    cur.execute(TAKE_SQL, [qty, item_id, bin_id, qty])
+    row = cur.fetchone()
+    if row is None:
+        cur.execute("SELECT qty FROM inventory_inventory WHERE item_id = %s AND bin_id = %s;", [item_id, bin_id])
+        found = cur.fetchone()
+        raise InsufficientStock(found[0] if found else Decimal("0"))
+    return row[0]
+
+
+def post_receive(item, b, qty: Decimal, ref_id: str = "", ref_type: str = "PO_RECEIPT") -> Decimal:
+    """Wareneingang: Ledger + Upsert auf den Bin-Bestand. Liefert neuen Bin-Bestand."""
+    with transaction.atomic(), connection.cursor() as cur:
+        StockLedger.objects.create(item=item, to_bin=b, qty=qty, ref_type=ref_type, ref_id=ref_id)
+        new_qty = _add(cur, item.id, b.id, qty)
+        onhand.apply_deltas(item.id, {b.location_id: qty})
+    return new_qty
+
+
+def post_issue(item, b_from, qty: Decimal, ref_id: str = "", ref_type: str = "ISSUE") -> Decimal:
+    """Entnahme: bucht nur, wenn genug Bestand da ist (sonst InsufficientStock, nichts geschrieben)."""
+    with transaction.atomic(), connection.cursor() as cur:
+        new_qty = _take(cur, item.id, b_from.id, qty)
+        StockLedger.objects.create(item=item, from_bin=b_from, to_bin=None, qty=qty,
+                                   ref_type=ref_type, ref_id=ref_id)
+        onhand.apply_deltas(item.id, {b_from.location_id: -qty})
+    return new_qty
+
+
+def post_move(item, b_from, b_to, qty: Decimal, ref_id: str = "", ref_type: str = "MOVE"):
+    """
+    Umlagerung. Beide Bestandszeilen werden in Bin-ID-Reihenfolge gesperrt,
+    damit gegenläufige Umlagerungen nicht verklemmen. Liefert (from_qty, to_qty).
+    """
+    with transaction.atomic(), connection.cursor() as cur:
+        if b_from.id == b_to.id:
+            _take(cur, item.id, b_from.id, qty)
+            from_qty = to_qty = _add(cur, item.id, b_to.id, qty)
+        elif b_from.id < b_to.id:
+            from_qty = _take(cur, item.id, b_from.id, qty)
+            to_qty = _add(cur, item.id, b_to.id, qty)
+        else:
+            to_qty = _add(cur, item.id, b_to.id, qty)
+            from_qty = _take(cur, item.id, b_from.id, qty)
+        StockLedger.objects.create(item=item, from_bin=b_from, to_bin=b_to, qty=qty,
+                                   ref_type=ref_type, ref_id=ref_id)
+        deltas = {b_from.location_id: -qty}
+        deltas[b_to.location_id] = deltas.get(b_to.location_id, Decimal("0")) + qty
+        onhand.apply_deltas(item.id, deltas)
+    return from_qty, to_qty
+
+
+# ------------------- Sammelbuchung -------------------
+
+REF_TYPES = {"receive": "PO_RECEIPT", "move": "MOVE", "issue": "ISSUE"}
+
+
+def post_batch(lines, atomic: bool = True):
+    """
+    Viele Buchungszeilen in EINER Transaktion:
+      lines: [{"type", "item_id", "from_bin", "to_bin", "qty", "ref_id"}] (Bins als Objekte oder None)
+    - betroffene Bestandszeilen werden einmal sortiert gesperrt (FOR UPDATE)
+    - Bestandsprüfung zeilenweise in Reihenfolge gegen den laufenden Saldo
+    - Ledger per bulk_create, Bestände und Summen je ein Upsert
+    Liefert (results, committed). atomic=True: bei einem Fehler wird nichts gebucht.
+    """
+    results = [None] * len(lines)
+    with transaction.atomic(), connection.cursor() as cur:
+        pairs = sorted({(l["item_id"], b.id) for l in lines for b in (l["from_bin"], l["to_bin"]) if b is not None})
+        balance = {}
+        if pairs:
+            params = [x for p in pairs for x in p]
+            cur.execute(f"""
+                SELECT item_id, bin_id, qty FROM inventory_inventory
+                WHERE (item_id, bin_id) IN (VALUES {", ".join(["(%s, %s)"] * len(pairs))})
+                ORDER BY item_id, bin_id
+                FOR UPDATE;
+            """, params)
+            balance = {(i, b): q for i, b, q in cur.fetchall()}
+
+        inv_delta, loc_delta, ledger = {}, {}, []
+        for n, l in enumerate(lines):
+            item_id, qty, src, dst = l["item_id"], l["qty"], l["from_bin"], l["to_bin"]
+            if src is not None:
+                have = balance.get((item_id, src.id), Decimal("0"))
+                if have < qty:
+                    results[n] = {"status": "error", "error": "insufficient stock in from_bin",
+                                  "available": str(have)}
+                    continue
+            for b, d in ((src, -qty), (dst, qty)):
+                if b is None:
+                    continue
+                key = (item_id, b.id)
+                balance[key] = balance.get(key, Decimal("0")) + d
+                inv_delta[key] = inv_delta.get(key, Decimal("0")) + d
+                lkey = (item_id, b.location_id)
+                loc_delta[lkey] = loc_delta.get(lkey, Decimal("0")) + d
+            ledger.append(StockLedger(item_id=item_id, from_bin=src, to_bin=dst, qty=qty,
+                                      ref_type=REF_TYPES[l["type"]], ref_id=l.get("ref_id") or ""))
+            results[n] = {"status": "ok"}
+
+        failed = any(r["status"] != "ok" for r in results)
+        if atomic and failed:
+            return results, False
+        if not ledger:
+            return results, False
+
+        StockLedger.objects.bulk_create(ledger, batch_size=1000)
+        rows = sorted((k, d) for k, d in inv_delta.items() if d)
+        if rows:
+            params = []
+            for (item_id, bin_id), d in rows:
+                params += [item_id, bin_id, d]
+            cur.execute(f"""
+                INSERT INTO inventory_inventory (item_id, bin_id, qty)
+                VALUES {", ".join(["(%s, %s, %s)"] * len(rows))}
+                ON CONFLICT (item_id, bin_id) DO UPDATE SET qty = inventory_inventory.qty + EXCLUDED.qty;
+            """, params)
+        onhand.apply_batch(loc_delta)
+    return results, True
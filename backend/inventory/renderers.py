@@ -0,0 +1,30 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+_fallback = JSONEncoder()
+
+
+def _default(obj):
+    # Was orjson nicht nativ kann (Decimal, Lazy-Strings, QuerySets …) wie DRFs JSONEncoder
+    return _fallback.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON über orjson statt json.dumps, Werte wie bei DRFs JSONRenderer
+    (UTC als "Z", Decimal als Zahl). indent im Accept-Header ergibt 2 Leerzeichen.
+    """
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        options = _OPTIONS
+        params = dict(p.strip().split("=", 1) for p in (accepted_media_type or "").split(";")[1:] if "=" in p)
+        if params.get("indent") or (renderer_context or {}).get("indent"):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=options)
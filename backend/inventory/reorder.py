@@ -0,0 +1,60 @@
+from django.db import connection
+
+# Bewertung einer Policy-Menge gegen die Summentabellen (global: onhanditem, je Location: onhandlocation)
+EVAL_SQL = """
+    WITH ev AS (
+        SELECT rp.id, rp.item_id, rp.location_id, s.on_hand, rp.reorder_point,
+               GREATEST(rp.reorder_qty, rp.reorder_point - s.on_hand) AS suggested_qty
+        FROM ({policies}) rp
+        LEFT JOIN inventory_onhanditem oi
+               ON rp.location_id IS NULL AND oi.item_id = rp.item_id
+        LEFT JOIN inventory_onhandlocation ol
+               ON ol.item_id = rp.item_id AND ol.location_id = rp.location_id
+        CROSS JOIN LATERAL (SELECT COALESCE(oi.qty, ol.qty, 0) AS on_hand) s
+    ),
+    cleared AS (
+        DELETE FROM inventory_reorderalert a USING ev
+        WHERE a.policy_id = ev.id AND ev.on_hand > ev.reorder_point
+    )
+    INSERT INTO inventory_reorderalert
+        (policy_id, item_id, location_id, on_hand, reorder_point, suggested_qty, updated)
+    SELECT id, item_id, location_id, on_hand, reorder_point, suggested_qty, now()
+    FROM ev WHERE on_hand <= reorder_point
+    ON CONFLICT (policy_id) DO UPDATE SET
+        item_id = EXCLUDED.item_id, location_id = EXCLUDED.location_id,
+        on_hand = EXCLUDED.on_hand, reorder_point = EXCLUDED.reorder_point,
+        suggested_qty = EXCLUDED.suggested_qty, updated = EXCLUDED.updated;
+"""
+
+ALL_POLICIES = "SELECT * FROM inventory_reorderpolicy"
+
+REBUILD_SQL = "DELETE FROM inventory_reorderalert;" + EVAL_SQL.format(policies=ALL_POLICIES)
+
+
+def evaluate_pairs(pairs):
+    """
+    Policies der berührten (item_id, location_id)-Paare neu bewerten:
+    die Location-Policy und die globale Policy (location NULL) des Items.
+    Läuft in der Buchungstransaktion direkt nach dem Summen-Upsert.
+    """
+    pairs = sorted(set(pairs))
+    if not pairs:
+        return
+    policies = f"""
+        SELECT DISTINCT rp.* FROM inventory_reorderpolicy rp
+        JOIN (VALUES {", ".join(["(%s, %s)"] * len(pairs))}) t(item_id, location_id)
+          ON rp.item_id = t.item_id AND (rp.location_id IS NULL OR rp.location_id = t.location_id)
+    """
+    with connection.cursor() as cur:
+        cur.execute(EVAL_SQL.format(policies=policies), [x for p in pairs for x in p])
+
+
+def evaluate_policy(policy_id: int):
+    with connection.cursor() as cur:
+        cur.execute(EVAL_SQL.format(policies=f"{ALL_POLICIES} WHERE id = %s"), [policy_id])
+
+
+def rebuild():
+    """Alle Policies neu bewerten (nach Massenimporten oder onhand_summary --rebuild)."""
+    with connection.cursor() as cur:
+        cur.execute(REBUILD_SQL)
@@ -12,6 +12,7 @@ class StockResponseSerializer(serializers.Serializer):
     on_hand = serializers.DecimalField(max_digits=18, decimal_places=3)
     bins = InventoryBinSerializer(many=True)
 
+from django.db import models
 from rest_framework import serializers
 from .models import Item, Location, Bin, ReorderPolicy, StockLedger, Inventory
 
@@ -34,6 +35,9 @@ class BinSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bin
         fields = "__all__"
+        read_only_fields = ("code_canonical", "aisle", "rack", "level", "slot", "embedding_hash")
+        # 1536 Floats: schreibbar, aber nicht in jeder Antwort (lesen per ?fields=embedding)
+        extra_kwargs = {"embedding": {"write_only": True}}
 
 class ReorderPolicySerializer(serializers.ModelSerializer):
     class Meta:
@@ -50,3 +54,68 @@ class InventorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Inventory
         fields = "__all__"
+
+
+# ------------------- Lese-Serializer (Listen) -------------------
+
+class ValuesSerializer:
+    """
+    Lese-Serializer ohne DRF-Feldmaschinerie: ein .values()-Query mit genau den
+    gewählten Spalten, Ausgabe als Dicts. Feldnamen und Werte wie beim ModelSerializer
+    (Fremdschlüssel als id, Decimal als String). Schwere Felder (exclude_default)
+    nur auf Anfrage; ?fields=a,b wählt eine Teilmenge (Sparse Fieldset).
+    """
+    model = None
+    fields = ()
+    exclude_default = ()
+    fields_param = "fields"
+
+    def __init__(self, request):
+        raw = request.query_params.get(self.fields_param) if request is not None else None
+        if raw:
+            wanted = {f.strip() for f in raw.split(",") if f.strip()}
+            unknown = sorted(wanted - set(self.fields))
+            if unknown:
+                raise ValueError(f"unknown fields: {', '.join(unknown)}")
+            self.selected = [f for f in self.fields if f in wanted]
+        else:
+            self.selected = [f for f in self.fields if f not in self.exclude_default]
+        self.decimals = [f for f in self.selected
+                         if isinstance(self.model._meta.get_field(f), models.DecimalField)]
+
+    def queryset(self, queryset, extra=()):
+        """values() mit den gewählten Feldern plus extra (z. B. Sortierschlüssel für den Cursor)."""
+        return queryset.values(*dict.fromkeys([*self.selected, *extra]))
+
+    def to_representation(self, rows):
+        selected, decimals = self.selected, self.decimals
+        out = []
+        for row in rows:
+            obj = {f: row[f] for f in selected}
+            for f in decimals:
+                if obj[f] is not None:
+                    obj[f] = format(obj[f], "f")
+            out.append(obj)
+        return out
+
+
+class ItemListSerializer(ValuesSerializer):
+    model = Item
+    fields = ("id", "sku", "name", "description", "uom", "active")
+
+
+class BinListSerializer(ValuesSerializer):
+    model = Bin
+    fields = ("id", "location", "code", "embedding", "embedding_hash",
+              "code_canonical", "aisle", "rack", "level", "slot")
+    exclude_default = ("embedding",)
+
+
+class StockLedgerListSerializer(ValuesSerializer):
+    model = StockLedger
+    fields = ("id", "ts", "item", "from_bin", "to_bin", "qty", "ref_type", "ref_id")
+
+
+class InventoryListSerializer(ValuesSerializer):
+    model = Inventory
+    fields = ("id", "item", "bin", "qty")
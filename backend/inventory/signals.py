@@ -0,0 +1,58 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Item, ItemAlias, Bin, Location, ReorderPolicy
+from .fuzzy_index import schedule_change
+from .bin_cache import schedule_invalidate
+from . import reorder
+
+
+# ------------------- Fuzzy-Index -------------------
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, **kwargs):
+    item_id, sku, name = instance.pk, instance.sku, instance.name
+    schedule_change(lambda idx: idx.upsert_item(item_id, sku, name))
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    item_id = instance.pk
+    schedule_change(lambda idx: idx.remove_item(item_id))
+
+
+@receiver(post_save, sender=ItemAlias)
+def alias_saved(sender, instance, **kwargs):
+    alias_id, item_id, alias = instance.pk, instance.item_id, instance.alias
+    schedule_change(lambda idx: idx.upsert_alias(alias_id, item_id, alias))
+
+
+@receiver(post_delete, sender=ItemAlias)
+def alias_deleted(sender, instance, **kwargs):
+    alias_id = instance.pk
+    schedule_change(lambda idx: idx.remove_alias(alias_id))
+
+
+# ------------------- Bin-Cache -------------------
+
+@receiver(post_save, sender=Bin)
+def bin_saved(sender, instance, update_fields=None, **kwargs):
+    # z. B. embed_bins speichert nur embedding -> Cache bleibt gültig
+    if update_fields and not {"code", "location"} & set(update_fields):
+        return
+    schedule_invalidate()
+
+
+@receiver(post_delete, sender=Bin)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def bin_location_changed(sender, instance, **kwargs):
+    schedule_invalidate()
+
+
+# ------------------- Reorder-Alerts -------------------
+
+@receiver(post_save, sender=ReorderPolicy)
+def reorder_policy_saved(sender, instance, **kwargs):
+    # gleiche Transaktion wie das Speichern; Löschen räumt der CASCADE ab
+    reorder.evaluate_policy(instance.pk)
@@ -0,0 +1,62 @@
+"""Bausteine für synthetische Testdaten (Generator und Benchmarks)."""
+import random
+import re
+import string
+
+_WORDS = {0: "null", 1: "eins", 2: "zwei", 3: "drei", 4: "vier", 5: "fünf", 6: "sechs", 7: "sieben",
+          8: "acht", 9: "neun", 10: "zehn", 11: "elf", 12: "zwölf", 16: "sechzehn", 20: "zwanzig",
+          25: "fünfundzwanzig", 30: "dreißig", 40: "vierzig", 50: "fünfzig"}
+
+NOUNS = ["Schraube", "Mutter", "Scheibe", "Dübel", "Winkel", "Schelle", "Kabelbinder",
+         "Gewindestange", "Senkkopfschraube", "Sechskantmutter", "Unterlegscheibe", "Hutmutter"]
+ATTRS = ["verzinkt", "Edelstahl", "A2", "A4", "schwarz", "Messing", "DIN 912", "DIN 934", "ISO 7089"]
+
+# umgangssprachliche Kurzformen für Aliase
+_SHORT = {"Schraube": "Schr.", "Senkkopfschraube": "Senkkopf", "Sechskantmutter": "6kt-Mutter",
+          "Unterlegscheibe": "U-Scheibe", "Gewindestange": "Gewindest.", "Kabelbinder": "Binder"}
+
+
+def item_name(rng: random.Random) -> str:
+    d, l = rng.choice([3, 4, 5, 6, 8, 10, 12]), rng.choice([8, 10, 12, 16, 20, 25, 30, 40, 50])
+    return f"{rng.choice(NOUNS)} M{d}x{l} {rng.choice(ATTRS)}"
+
+
+def item_alias(name: str, rng: random.Random) -> str:
+    """Alias wie aus dem Lageralltag: Kurzform, ohne Norm, Maß umgestellt."""
+    noun, size, *rest = name.split(" ")
+    noun = _SHORT.get(noun, noun) if rng.random() < 0.5 else noun
+    variant = rng.randrange(3)
+    if variant == 0:
+        return f"{size} {noun}"
+    if variant == 1:
+        return f"{noun} {size.replace('x', ' x ')}"
+    return f"{noun} {size} {' '.join(rest)}".lower()
+
+
+def aisle_code(n: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA ..."""
+    s = ""
+    n += 1
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = string.ascii_uppercase[r] + s
+    return s
+
+
+def bin_grid(aisles: int, racks: int, levels: int):
+    """Bin-Codes im Format A-01-02 (Gang-Regal-Ebene)."""
+    for a in range(aisles):
+        for r in range(1, racks + 1):
+            for l in range(1, levels + 1):
+                yield f"{aisle_code(a)}-{r:02d}-{l:02d}"
+
+
+def spoken(text: str, rng: random.Random) -> str:
+    """Simuliert eine Sprach-Transkription: Zahlen als Wörter, Satzzeichen weg, ein Tippfehler."""
+    t = re.sub(r"(?<=[A-Za-z])(?=\d)|(?<=\d)(?=[A-Za-z])", " ", text)
+    t = re.sub(r"\d+", lambda m: _WORDS.get(int(m.group(0)), m.group(0)), t)
+    t = re.sub(r"[-_/x×]+", " ", t)
+    if len(t) > 6 and rng.random() < 0.5:
+        i = rng.randrange(1, len(t) - 1)
+        t = t[:i] + t[i + 1] + t[i] + t[i + 2:]
+    return re.sub(r"\s+", " ", t).strip()
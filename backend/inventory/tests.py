@@ -1,3 +1,839 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from io import StringIO
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from rest_framework.test import APIClient
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.core.management import call_command, CommandError
+from django.test import (TestCase, TransactionTestCase, SimpleTestCase, RequestFactory, AsyncRequestFactory,
+                         override_settings)
+
+from .models import (Item, ItemAlias, Location, Bin, Inventory, StockLedger, OnHandItem, OnHandLocation,
+                     ReorderPolicy, ReorderAlert)
+from .posting import post_receive, post_issue, post_move, post_batch, InsufficientStock
+from . import checkpoints, onhand
+from .serializers import InventorySerializer
+from .fuzzy_index import FuzzyItemIndex, INDEX_KEY
+from .utils_cache import current_version
+from .phonetics import koelner_phonetik, number_word, tokenize
+from .bin_cache import BinCache, BIN_KEY, bin_cache
+from . import adb, exports, views
+from .synthetic import aisle_code, bin_grid, item_name, item_alias, spoken
+from .utils import percentile
+from .middleware import PerfMiddleware, record_query
+from . import metrics as prom
+from .management.commands.bench_api import build_request, READ_SCENARIOS, WRITE_SCENARIOS
+
+WRITERS = 50
+
+
+def run_parallel(fn, n=WRITERS):
+    """fn(i) in n Threads gleichzeitig starten; jeder Thread mit eigener DB-Verbindung."""
+    barrier = threading.Barrier(n)
+    errors = []
+
+    def worker(i):
+        try:
+            barrier.wait()
+            fn(i)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+class PostingConcurrencyTests(TransactionTestCase):
+    """Stresstest: 50 parallele Schreiber auf dieselbe SKU, keine verlorenen Updates."""
+
+    def setUp(self):
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        loc = Location.objects.create(code="MAIN")
+        self.a = Bin.objects.create(location=loc, code="A-01-01")
+        self.b = Bin.objects.create(location=loc, code="A-01-02")
+
+    def qty(self, b):
+        return Inventory.objects.get(item=self.item, bin=b).qty
+
+    def test_parallel_receipts_lose_no_updates(self):
+        per_writer = 5
+
+        def receive(_i):
+            for _ in range(per_writer):
+                post_receive(self.item, self.a, Decimal("1"))
+
+        self.assertEqual(run_parallel(receive), [])
+        expected = Decimal(WRITERS * per_writer)
+        self.assertEqual(self.qty(self.a), expected)
+        self.assertEqual(OnHandItem.objects.get(item=self.item).qty, expected)
+        self.assertEqual(StockLedger.objects.filter(item=self.item).count(), WRITERS * per_writer)
+
+    def test_parallel_issues_never_go_negative(self):
+        post_receive(self.item, self.a, Decimal("100"))
+        ok = []
+
+        def issue(_i):
+            try:
+                post_issue(self.item, self.a, Decimal("3"))
+                ok.append(1)
+            except InsufficientStock:
+                pass
+
+        self.assertEqual(run_parallel(issue), [])
+        self.assertEqual(len(ok), 33)
+        self.assertEqual(self.qty(self.a), Decimal("1"))
+        self.assertEqual(OnHandItem.objects.get(item=self.item).qty, Decimal("1"))
+
+    def test_opposite_moves_do_not_deadlock(self):
+        post_receive(self.item, self.a, Decimal("500"))
+        post_receive(self.item, self.b, Decimal("500"))
+
+        def move(i):
+            src, dst = (self.a, self.b) if i % 2 else (self.b, self.a)
+            post_move(self.item, src, dst, Decimal("2"))
+
+        self.assertEqual(run_parallel(move), [])
+        self.assertEqual(self.qty(self.a) + self.qty(self.b), Decimal("1000"))
+        self.assertEqual(self.qty(self.a), Decimal("500"))
+        self.assertEqual(OnHandItem.objects.get(item=self.item).qty, Decimal("1000"))
+
+
+class ReorderAlertTests(TestCase):
+    """Alert-Tabelle folgt Buchungen und Policy-Änderungen ohne Vollneuberechnung."""
+
+    def setUp(self):
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        self.loc = Location.objects.create(code="MAIN")
+        self.bin = Bin.objects.create(location=self.loc, code="A-01-01")
+        self.policy = ReorderPolicy.objects.create(item=self.item, location=self.loc,
+                                                   reorder_point=Decimal("10"), reorder_qty=Decimal("50"))
+
+    def test_policy_without_stock_is_alerted(self):
+        alert = ReorderAlert.objects.get(policy=self.policy)
+        self.assertEqual(alert.on_hand, Decimal("0"))
+        self.assertEqual(alert.suggested_qty, Decimal("50"))
+
+    def test_postings_update_alert(self):
+        post_receive(self.item, self.bin, Decimal("5"))
+        self.assertEqual(ReorderAlert.objects.get(policy=self.policy).on_hand, Decimal("5"))
+        post_receive(self.item, self.bin, Decimal("20"))
+        self.assertFalse(ReorderAlert.objects.filter(policy=self.policy).exists())
+        post_issue(self.item, self.bin, Decimal("16"))
+        self.assertEqual(ReorderAlert.objects.get(policy=self.policy).on_hand, Decimal("9"))
+
+    def test_policy_change_reevaluates(self):
+        post_receive(self.item, self.bin, Decimal("8"))
+        self.policy.reorder_point = Decimal("5")
+        self.policy.save()
+        self.assertFalse(ReorderAlert.objects.filter(policy=self.policy).exists())
+
+
+class ResolveBinTests(TestCase):
+    """Ranking von resolve_bin: LOC-BIN vor MAIN vor anderer Location vor Teileingabe, semantisch zuletzt."""
+
+    def setUp(self):
+        bin_cache.invalidate()  # on_commit läuft in TestCase nicht, Cache sonst vom Vortest
+        main, self.side = Location.objects.create(code="MAIN"), Location.objects.create(code="SIDE")
+        self.main_a = Bin.objects.create(location=main, code="A-01-01")
+        self.main_b = Bin.objects.create(location=main, code="A-01-02")
+        self.side_a = Bin.objects.create(location=self.side, code="A-01-01")
+        self.side_only = Bin.objects.create(location=self.side, code="C-03-01")
+        self.semantic = mock.patch.object(views, "semantic_bin_candidates", return_value=[])
+        self.sem = self.semantic.start()
+        self.addCleanup(self.semantic.stop)
+
+    def test_exact_canonical(self):
+        self.assertEqual(views.resolve_bin("a 1 1"), self.main_a)      # MAIN vor SIDE
+        self.assertEqual(views.resolve_bin("Bin A01-01"), self.main_a)
+        self.assertEqual(views.resolve_bin("SIDE-A-01-01"), self.side_a)  # LOC-BIN vor MAIN
+        self.assertEqual(views.resolve_bin("C-3-1"), self.side_only)      # andere Location
+        self.sem.assert_not_called()
+
+    def test_exact_without_cache(self):
+        with mock.patch.object(bin_cache, "lookup", return_value=None):
+            self.assertEqual(views.resolve_bin("A-1-1"), self.main_a)
+            self.assertEqual(views.resolve_bin("SIDE-A-01-01"), self.side_a)
+
+    def test_prefix_prefers_main_and_shortest(self):
+        self.assertEqual(views.resolve_bin("A-01"), self.main_a)
+        self.assertEqual(views.resolve_bin("C-03"), self.side_only)
+        self.sem.assert_not_called()
+
+    def test_semantic_only_after_structural_miss(self):
+        # Tippfehler ohne strukturellen Treffer: erst jetzt die Embedding-Suche, mit Mindestscore
+        hit = {"bin": "A-01-02", "location": "MAIN", "code": "MAIN-A-01-02", "score": 0.9, "bin_obj": self.main_b}
+        self.sem.return_value = [hit]
+        self.assertEqual(views.resolve_bin("Regal Ah eins zwo"), self.main_b)
+        self.sem.assert_called_once()
+        self.sem.return_value = [{**hit, "score": 0.5}]
+        with self.assertRaises(Http404):
+            views.resolve_bin("Regal Ah eins zwo")
+        with self.assertRaises(Http404):
+            views.resolve_bin("Regal Ah eins zwo", semantic=False)
+        self.assertEqual(self.sem.call_count, 2)
+
+
+class BinPostingTests(TestCase):
+    """Buchungen übernehmen keinen semantischen Bin-Treffer, Lesepfade schon."""
+
+    def setUp(self):
+        bin_cache.invalidate()
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        loc = Location.objects.create(code="MAIN")
+        self.bin = Bin.objects.create(location=loc, code="A-01-01")
+        self.hit = {"bin": "A-01-01", "location": "MAIN", "code": "MAIN-A-01-01", "score": 0.97,
+                    "bin_obj": self.bin}
+
+    def receive(self):
+        return self.client.post("/api/stock/receive/", {"sku": "M4-12", "qty": 1, "bin": "A-01-07"},
+                                content_type="application/json")
+
+    def test_read_path_accepts_semantic_match(self):
+        with mock.patch.object(views, "semantic_bin_candidates", return_value=[self.hit]):
+            self.assertEqual(views.resolve_bin("A-01-07"), self.bin)
+
+    def test_posting_never_accepts_semantic_match(self):
+        with mock.patch.object(views, "semantic_bin_candidates", return_value=[self.hit]) as sem:
+            resp = self.receive()
+        self.assertEqual(resp.status_code, 404)
+        self.assertNotIn("candidates", resp.json()["data"])
+        sem.assert_not_called()
+        self.assertFalse(Inventory.objects.exists())
+
+    @override_settings(BIN_SEMANTIC_POSTING_SUGGEST=True)
+    def test_posting_returns_candidates_to_confirm(self):
+        with mock.patch.object(views, "semantic_bin_candidates", return_value=[self.hit]):
+            resp = self.receive()
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(resp.json()["data"]["candidates"][0]["code"], "MAIN-A-01-01")
+        self.assertFalse(Inventory.objects.exists())
+
+
+    def test_postings_batch_resolves_bins_and_rejects_bad_lines(self):
+        lines = [{"type": "receive", "sku": "M4-12", "qty": 2, "bin": "MAIN-A-01-01"},
+                 {"type": "receive", "sku": ["M4-12"], "qty": 1, "bin": "A-01-01"},
+                 {"type": "receive", "sku": "M4-12", "qty": 1, "bin": {"code": "A-01-01"}},
+                 {"type": "receive", "sku": "M4-12", "qty": 1, "bin": "A-01-07"}]
+        with mock.patch.object(views, "semantic_bin_candidates", return_value=[self.hit]) as sem:
+            resp = self.client.post("/api/stock/postings/", {"mode": "best_effort", "lines": lines},
+                                    content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()["data"]["results"]
+        self.assertEqual([r["status"] for r in results], ["ok", "error", "error", "error"])
+        self.assertIn("must be strings", results[1]["error"])
+        sem.assert_not_called()
+        self.assertEqual(Inventory.objects.get(bin=self.bin).qty, Decimal("2"))
+
+
+class IdempotencyTests(TestCase):
+    """Nur der Header ist ein Key; gleiche ref_id auf mehreren Zeilen bucht jede Zeile."""
+
+    def setUp(self):
+        bin_cache.invalidate()
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        loc = Location.objects.create(code="MAIN")
+        self.a = Bin.objects.create(location=loc, code="A-01-01")
+        Bin.objects.create(location=loc, code="A-01-02")
+
+    def receive(self, bin_code, **headers):
+        return self.client.post("/api/stock/receive/", {"sku": "M4-12", "qty": 1, "bin": bin_code, "ref_id": "LS-1"},
+                                content_type="application/json", headers=headers)
+
+    def test_same_ref_id_is_not_a_key(self):
+        self.assertEqual(self.receive("A-01-01").status_code, 200)
+        self.assertEqual(self.receive("A-01-02").status_code, 200)
+        self.assertEqual(OnHandItem.objects.get(item=self.item).qty, Decimal("2"))
+
+    def test_header_replays_and_expires(self):
+        first = self.receive("A-01-01", **{"Idempotency-Key": "k1"})
+        replay = self.receive("A-01-01", **{"Idempotency-Key": "k1"})
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(self.receive("A-01-02", **{"Idempotency-Key": "k1"}).status_code, 409)
+        with override_settings(IDEMPOTENCY_TTL_HOURS=0):
+            self.assertNotIn("Idempotent-Replayed", self.receive("A-01-01", **{"Idempotency-Key": "k1"}))
+        self.assertEqual(Inventory.objects.get(bin=self.a).qty, Decimal("2"))
+
+
+class AsyncReadViewTests(TransactionTestCase):
+    """Async-Lesepfade liefern dieselben Antworten wie die DRF-Views (eigene Verbindung, daher committed)."""
+
+    def setUp(self):
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        loc = Location.objects.create(code="MAIN")
+        a = Bin.objects.create(location=loc, code="A-01-01")
+        b = Bin.objects.create(location=loc, code="A-01-02")
+        post_receive(self.item, a, Decimal("12"))
+        post_move(self.item, a, b, Decimal("5"))
+        post_issue(self.item, b, Decimal("1"))
+
+    def compare(self, sync_view, async_view, path):
+        resp = sync_view(RequestFactory().get(path))
+        resp.render()
+
+        async def run():
+            try:
+                return await async_view(AsyncRequestFactory().get(path))
+            finally:
+                await adb.pool.close()
+
+        aresp = async_to_sync(run)()
+        self.assertEqual(aresp.status_code, resp.status_code)
+        self.assertEqual(json.loads(aresp.content), json.loads(resp.content))
+        return json.loads(aresp.content)
+
+    def test_stock(self):
+        data = self.compare(views.stock, views.stock_async, "/api/stock/?sku=M4-12")
+        self.assertEqual(data["data"]["on_hand"], "11.000")
+
+    def test_stock_zero_on_hand(self):
+        Item.objects.create(sku="M5-20", name="Schraube M5x20")  # ohne OnHandItem-Zeile
+        data = self.compare(views.stock, views.stock_async, "/api/stock/?sku=M5-20")
+        self.assertEqual(data["data"]["on_hand"], "0.000")
+        post_issue(self.item, Bin.objects.get(code="A-01-01"), Decimal("7"))
+        post_issue(self.item, Bin.objects.get(code="A-01-02"), Decimal("4"))  # Zeile mit 0
+        data = self.compare(views.stock, views.stock_async, "/api/stock/?sku=M4-12")
+        self.assertEqual(data["data"]["on_hand"], "0.000")
+
+    def test_head_and_options(self):
+        async def run(method):
+            try:
+                return await views.stock_async(AsyncRequestFactory().generic(method, "/api/stock/?sku=M4-12"))
+            finally:
+                await adb.pool.close()
+
+        self.assertEqual(async_to_sync(run)("HEAD").status_code, 200)
+        resp = async_to_sync(run)("OPTIONS")
+        self.assertEqual((resp.status_code, resp["Allow"]), (200, "GET, HEAD, OPTIONS"))
+        self.assertEqual(async_to_sync(run)("POST").status_code, 405)
+
+    def test_stock_moves_with_cursor(self):
+        first = self.compare(views.stock_moves, views.stock_moves_async, "/api/stock-moves/?sku=M4-12&limit=2")
+        cursor = first["data"]["next_cursor"]
+        self.assertIsNotNone(cursor)
+        self.compare(views.stock_moves, views.stock_moves_async,
+                     f"/api/stock-moves/?sku=M4-12&limit=2&cursor={cursor}")
+
+    def test_stock_moves_bad_limit(self):
+        for limit in ("abc", "", "2.5"):
+            data = self.compare(views.stock_moves, views.stock_moves_async,
+                                f"/api/stock-moves/?sku=M4-12&limit={limit}")
+            self.assertEqual(data, {"error": "limit must be integer"})
+
+
+class LeanListTests(TestCase):
+    """Listen über .values(): Ausgabe wie ModelSerializer, embedding nur auf Anfrage, ?fields=."""
+
+    def setUp(self):
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        loc = Location.objects.create(code="MAIN")
+        self.bin = Bin.objects.create(location=loc, code="A-01-01", embedding=[0.5] * 1536)
+        post_receive(self.item, self.bin, Decimal("12"))
+
+    def test_bins_without_embedding_by_default(self):
+        row = self.client.get("/api/bins/").json()["results"][0]
+        self.assertNotIn("embedding", row)
+        self.assertEqual(row["location"], self.bin.location_id)
+        row = self.client.get("/api/bins/?fields=id,embedding").json()["results"][0]
+        self.assertEqual(set(row), {"id", "embedding"})
+        self.assertEqual(len(row["embedding"]), 1536)
+
+    def test_inventory_matches_model_serializer(self):
+        row = self.client.get("/api/inventory/").json()["results"][0]
+        self.assertEqual(row, InventorySerializer(Inventory.objects.get()).data)
+
+    def test_keyset_only_on_request(self):
+        Item.objects.create(sku="M5-20", name="Schraube M5x20")
+        data = self.client.get("/api/items/?page=1").json()
+        self.assertEqual((data["count"], data["next"]), (2, None))
+        data = self.client.get("/api/items/?limit=1").json()
+        self.assertEqual([r["sku"] for r in data["results"]], ["M4-12"])
+        self.assertIn("cursor=", data["next"])
+        data = self.client.get(data["next"]).json()
+        self.assertEqual([r["sku"] for r in data["results"]], ["M5-20"])
+        self.assertIsNone(data["next"])
+
+    def test_retrieve_invalid_pk_is_404(self):
+        self.assertEqual(self.client.get(f"/api/items/{self.item.id}/").json()["sku"], "M4-12")
+        self.assertEqual(self.client.get("/api/items/abc/").status_code, 404)
+
+    def test_page_numbers_with_low_estimate(self):
+        # veraltete Statistik: Schätzung weit unter der echten Zeilenzahl
+        Item.objects.bulk_create(Item(sku=f"X-{n:03d}", name="Scheibe") for n in range(60))
+        with mock.patch("inventory.pagination._estimate", return_value=3):
+            first = self.client.get("/api/items/")
+            self.assertEqual(first.status_code, 200)
+            self.assertIn("page=2", first.json()["next"])
+            last = self.client.get(first.json()["next"]).json()
+        self.assertEqual(len(first.json()["results"]) + len(last["results"]), 61)
+        self.assertIsNone(last["next"])
+        self.assertIsNotNone(last["previous"])
+
+    def test_unknown_field_is_rejected(self):
+        self.assertEqual(self.client.get("/api/items/?fields=sku,nope").status_code, 400)
+
+
+class PhoneticsTests(SimpleTestCase):
+    """Kölner Phonetik (Referenzbeispiele) und Zahlwort-Normalisierung."""
+
+    def test_koelner_phonetik(self):
+        self.assertEqual(koelner_phonetik("Müller-Lüdenscheidt"), "65752682")
+        self.assertEqual(koelner_phonetik("Wikipedia"), "3412")
+        self.assertEqual(koelner_phonetik("Breschnew"), "17863")
+        self.assertEqual(koelner_phonetik("Schraube"), koelner_phonetik("Schrauhbe"))
+        self.assertEqual(koelner_phonetik("123"), "")
+
+    def test_number_word(self):
+        self.assertEqual(number_word("vier"), "4")
+        self.assertEqual(number_word("zwolf"), "12")
+        self.assertEqual(number_word("vierundzwanzig"), "24")
+        self.assertEqual(number_word("einundzwanzig"), "21")
+        self.assertEqual(number_word("hundert"), "100")
+        self.assertIsNone(number_word("schraube"))
+
+    def test_articles_stay_words(self):
+        self.assertIsNone(number_word("eine", "schraube"))
+        self.assertEqual(number_word("ein", "stuck"), "1")
+        self.assertEqual(tokenize("eine Schraube M vier zwölf"), ["eine", "schraube", "m", "4", "12"])
+        self.assertEqual(tokenize("ein Stück M4x12"), ["1", "stuck", "m", "4", "x", "12"])
+        self.assertEqual(tokenize("ein M vier"), ["ein", "m", "4"])
+
+
+@override_settings(FUZZY_ENGINE="memory")
+class FuzzyIndexVersionTests(TestCase):
+    """Item-/Alias-Änderungen bumpen die Version erst nach Commit; ein anderer Prozess-Index lädt neu."""
+
+    def test_changes_bump_version_and_other_index_reloads(self):
+        other = FuzzyItemIndex()  # steht für den Index eines anderen Workers
+        other.ensure_fresh()
+        v0 = current_version(INDEX_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+            self.assertEqual(current_version(INDEX_KEY), v0)
+        self.assertEqual(current_version(INDEX_KEY), v0 + 1)
+        self.assertEqual(other.candidates("M4-12", limit=1)[0]["sku"], "M4-12")
+        self.assertEqual(other.version, v0 + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alias = ItemAlias.objects.create(item=item, alias="Senkkopf vier zwölf")
+        other.ensure_fresh()
+        self.assertEqual(other.aliases, {alias.id: (item.id, "Senkkopf vier zwölf")})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertEqual(current_version(INDEX_KEY), v0 + 4)  # kaskadierter Alias + Item
+        self.assertEqual(other.candidates("M4-12"), [])
+
+
+@override_settings(BIN_CACHE_CHECK_INTERVAL=0)
+class BinCacheInvalidationTests(TestCase):
+    """Bin-/Location-Änderungen bumpen die Cache-Version nach Commit; andere Worker laden neu."""
+
+    def setUp(self):
+        self.loc = Location.objects.create(code="MAIN")
+        self.other = BinCache()  # Cache eines anderen Workers
+        self.other.ensure_fresh()
+
+    def changed(self, fn):
+        v0 = current_version(BIN_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = fn()
+            self.assertEqual(current_version(BIN_KEY), v0)  # vor dem Commit unverändert
+        self.assertEqual(current_version(BIN_KEY), v0 + 1)
+        return result
+
+    def test_bin_and_location_changes_invalidate(self):
+        b = self.changed(lambda: Bin.objects.create(location=self.loc, code="A-01-01"))
+        self.assertEqual(self.other.lookup("A-1-1").id, b.id)
+        self.assertIsNone(bin_cache.version)  # eigener Cache sofort verworfen
+
+        b.code = "A-01-02"
+        self.changed(b.save)
+        self.assertIsNone(self.other.lookup("A-01-01"))
+        self.assertEqual(self.other.lookup("A-01-02").id, b.id)
+
+        self.loc.code = "HALLE"
+        self.changed(self.loc.save)
+        self.assertEqual(self.other.lookup("HALLE-A-01-02").location.code, "HALLE")
+
+        self.changed(b.delete)
+        self.assertIsNone(self.other.lookup("A-01-02"))
+
+    def test_embedding_update_keeps_cache(self):
+        b = self.changed(lambda: Bin.objects.create(location=self.loc, code="A-01-01"))
+        v = current_version(BIN_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            b.embedding_hash = "x"
+            b.save(update_fields=["embedding_hash"])
+        self.assertEqual(current_version(BIN_KEY), v)
+
+
+class OnHandSummaryTests(TestCase):
+    """Summentabellen folgen Einzel- und Sammelbuchungen; verify/--rebuild finden und beheben Abweichungen."""
+
+    def setUp(self):
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        self.main, self.side = Location.objects.create(code="MAIN"), Location.objects.create(code="SIDE")
+        self.a = Bin.objects.create(location=self.main, code="A-01-01")
+        self.b = Bin.objects.create(location=self.side, code="B-01-01")
+
+    def test_postings_keep_sums(self):
+        post_receive(self.item, self.a, Decimal("10"))
+        post_move(self.item, self.a, self.b, Decimal("4"))
+        post_batch([{"type": "issue", "item_id": self.item.id, "qty": Decimal("1"), "from_bin": self.b,
+                     "to_bin": None, "ref_id": ""},
+                    {"type": "receive", "item_id": self.item.id, "qty": Decimal("2"), "from_bin": None,
+                     "to_bin": self.a, "ref_id": ""}], atomic=True)
+        self.assertEqual(OnHandItem.objects.get(item=self.item).qty, Decimal("11"))
+        self.assertEqual(OnHandLocation.objects.get(item=self.item, location=self.main).qty, Decimal("8"))
+        self.assertEqual(OnHandLocation.objects.get(item=self.item, location=self.side).qty, Decimal("3"))
+        self.assertEqual(onhand.verify(), [])
+
+    def test_verify_and_rebuild(self):
+        post_receive(self.item, self.a, Decimal("10"))
+        OnHandItem.objects.filter(item=self.item).update(qty=Decimal("7"))
+        with self.assertRaises(CommandError):
+            call_command("onhand_summary", stdout=StringIO())
+        call_command("onhand_summary", "--rebuild", stdout=StringIO())
+        self.assertEqual(OnHandItem.objects.get(item=self.item).qty, Decimal("10"))
+
+
+class StockAsOfTests(TestCase):
+    """Checkpoints werden tageweise fortgeschrieben; as-of = Checkpoint plus Ledger-Delta."""
+
+    def setUp(self):
+        bin_cache.invalidate()
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        loc = Location.objects.create(code="MAIN")
+        self.a = Bin.objects.create(location=loc, code="A-01-01")
+        self.b = Bin.objects.create(location=loc, code="A-01-02")
+        today = timezone.localdate()
+        self.d1, self.d2, self.d3 = today - timedelta(days=5), today - timedelta(days=4), today - timedelta(days=2)
+        post_receive(self.item, self.a, Decimal("10"))
+        self.backdate(self.d1)
+        post_move(self.item, self.a, self.b, Decimal("4"))
+        self.backdate(self.d2)
+        post_issue(self.item, self.b, Decimal("1"))
+        self.backdate(self.d3)
+
+    @staticmethod
+    def at(day, hour=10):
+        return timezone.make_aware(datetime.combine(day, time(hour)))
+
+    def backdate(self, day):
+        last = StockLedger.objects.order_by("-id").values_list("id", flat=True).first()
+        StockLedger.objects.filter(id=last).update(ts=self.at(day))
+
+    def test_build_is_incremental(self):
+        self.assertEqual(checkpoints.build(until=self.d1), [(self.d1, 1)])
+        self.assertEqual(checkpoints.build(until=self.d2), [(self.d2, 2)])
+        self.assertEqual(checkpoints.build(until=self.d2), [])
+        done = checkpoints.build(until=self.d3)
+        self.assertEqual(done[-1], (self.d3, 1))
+        self.assertTrue(all(changed == 0 for _day, changed in done[:-1]))
+
+    def test_checkpoint_plus_delta(self):
+        at_d3 = self.at(self.d3, 12)
+        expected = [(self.item.id, self.a.id, Decimal("6")), (self.item.id, self.b.id, Decimal("3"))]
+        self.assertEqual(checkpoints.stock_as_of(at_d3, item_id=self.item.id), (None, expected))  # nur Ledger
+
+        checkpoints.build(until=self.d2)
+        self.assertEqual(checkpoints.stock_as_of(at_d3, item_id=self.item.id), (self.d2, expected))
+        day, rows = checkpoints.stock_as_of(self.at(self.d2, 9), bin_id=self.a.id)
+        self.assertEqual(day, self.d1)
+        self.assertEqual(rows, [(self.item.id, self.a.id, Decimal("10"))])
+
+    def test_view_does_not_substitute_bins(self):
+        hit = {"bin": "A-01-01", "location": "MAIN", "code": "MAIN-A-01-01", "score": 0.99, "bin_obj": self.a}
+        with mock.patch.object(views, "semantic_bin_candidates", return_value=[hit]) as sem:
+            resp = self.client.get(f"/api/stock/as-of/?at={self.d3.isoformat()}&bin=A-01-09")
+        self.assertEqual(resp.status_code, 404)
+        sem.assert_not_called()
+
+
+class ExportTests(TransactionTestCase):
+    """Streaming-Export: Wasserzeichen, CSV/NDJSON, async Pfad (Server-Side-Cursor) wie der sync Pfad."""
+
+    def setUp(self):
+        bin_cache.invalidate()
+        self.item = Item.objects.create(sku="M4-12", name="Schraube M4x12")
+        loc = Location.objects.create(code="MAIN")
+        a = Bin.objects.create(location=loc, code="A-01-01")
+        b = Bin.objects.create(location=loc, code="A-01-02")
+        post_receive(self.item, a, Decimal("12"))
+        post_move(self.item, a, b, Decimal("5"))
+        post_issue(self.item, b, Decimal("1"))
+        # zwei Zeilen mit gleichem ts (Wasserzeichen über id), alle älter als LEDGER_EXPORT_LAG
+        self.ids = list(StockLedger.objects.order_by("id").values_list("id", flat=True))
+        self.t0 = timezone.now() - timedelta(hours=1)
+        StockLedger.objects.filter(id__in=self.ids[:2]).update(ts=self.t0)
+        StockLedger.objects.filter(id=self.ids[2]).update(ts=self.t0 + timedelta(minutes=1))
+
+    def export(self, path, asynchronous=False):
+        with override_settings(ASYNC_READ_VIEWS=asynchronous):
+            resp = views.export_ledger(RequestFactory().get(path))
+        self.assertEqual(resp.is_async, asynchronous)
+        if not asynchronous:
+            return resp, b"".join(resp.streaming_content).decode()
+
+        async def run():
+            try:
+                return b"".join([chunk async for chunk in resp.streaming_content])
+            finally:
+                await adb.pool.close()
+        return resp, async_to_sync(run)().decode()
+
+    def test_watermark_filters(self):
+        def ids(**kw):
+            return [row[0] for row in exports.ledger_rows(**kw)]
+
+        self.assertEqual(ids(), self.ids)
+        self.assertEqual(ids(since_ts=self.t0), self.ids[2:])
+        self.assertEqual(ids(since_ts=self.t0, since_id=self.ids[0]), self.ids[1:])
+        self.assertEqual(ids(since_id=self.ids[1]), self.ids[2:])
+        self.assertEqual(ids(until_ts=self.t0 + timedelta(seconds=1)), self.ids[:2])
+        self.assertEqual(ids(limit=2), self.ids[:2])
+        # frische Buchung liegt noch im Lag-Fenster
+        post_issue(self.item, Bin.objects.get(code="A-01-01"), Decimal("1"))
+        self.assertEqual(ids(), self.ids)
+
+    def test_ndjson(self):
+        resp, body = self.export("/api/export/ledger/")
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["id"] for r in rows], self.ids)
+        self.assertEqual(rows[0], {
+            "id": self.ids[0], "ts": self.t0.isoformat(), "sku": "M4-12", "from_location": None,
+            "from_bin": None, "to_location": "MAIN", "to_bin": "A-01-01", "qty": "12.000",
+            "ref_type": rows[0]["ref_type"], "ref_id": rows[0]["ref_id"]})
+
+    def test_csv(self):
+        resp, body = self.export(f"/api/export/ledger/?fmt=csv&since_ts={self.t0.isoformat()}"
+                                 f"&since_id={self.ids[0]}".replace("+", "%2B"))
+        self.assertEqual(resp["Content-Disposition"], 'attachment; filename="ledger.csv"')
+        rows = list(csv.reader(StringIO(body)))
+        self.assertEqual(rows[0], list(exports.LEDGER_COLUMNS))
+        self.assertEqual([int(r[0]) for r in rows[1:]], self.ids[1:])
+        self.assertEqual(rows[1][3:7], ["MAIN", "A-01-01", "MAIN", "A-01-02"])
+
+    def test_async_server_side_cursor_matches_sync(self):
+        # kleine Fetches und Blöcke, damit mehrere Runden durch Cursor und Puffer laufen
+        with mock.patch.object(exports, "CHUNK_SIZE", 1), mock.patch.object(exports, "FLUSH_BYTES", 1):
+            for fmt in ("ndjson", "csv"):
+                path = f"/api/export/ledger/?fmt={fmt}"
+                self.assertEqual(self.export(path, asynchronous=True)[1], self.export(path)[1])
+
+    def test_bad_params(self):
+        for path in ("/api/export/ledger/?fmt=xml", "/api/export/ledger/?since_id=abc",
+                     "/api/export/ledger/?since_ts=gestern"):
+            self.assertEqual(views.export_ledger(RequestFactory().get(path)).status_code, 400)
+        resp = views.export_inventory(RequestFactory().get("/api/export/inventory/?since_id=1"))
+        self.assertEqual(resp.status_code, 400)
+
+
+class ImportWarehouseTests(TransactionTestCase):
+    """import_warehouse: COPY + Upserts; ein erneuter Import bucht nur die Differenz (Staging-Tabellen leben bis zum Commit)."""
+
+    def setUp(self):
+        bin_cache.invalidate()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.files = {
+            "locations": self.csv("locations", "code,name\nMAIN,Hauptlager\n"),
+            "items": self.csv("items", "sku,name,uom\nM4-12,Schraube M4x12,pcs\nM5-20,Schraube M5x20,\n"),
+            "aliases": self.csv("aliases", "sku,alias\nM4-12,vierer\nXX-99,niemand\n"),
+            "bins": self.csv("bins", "location,code\nMAIN,a-1-1\nMAIN,A-01-02\n"),
+        }
+
+    def csv(self, name, text):
+        path = os.path.join(self.dir, f"{name}.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def run_import(self, stock, **files):
+        self.csv("stock", "sku,location,bin,qty\n" + stock)
+        args = [f"--{k}={v}" for k, v in files.items()] + [f"--stock={os.path.join(self.dir, 'stock.csv')}"]
+        call_command("import_warehouse", *args, stdout=StringIO())
+
+    def opening(self):
+        return list(StockLedger.objects.filter(ref_type="OPENING").order_by("id")
+                    .values_list("item__sku", "from_bin__code", "to_bin__code", "qty"))
+
+    def test_master_data(self):
+        self.run_import("M4-12,MAIN,a-1-1,12\n", **self.files)
+        self.assertEqual(Item.objects.get(sku="M5-20").uom, "pcs")
+        self.assertEqual(list(ItemAlias.objects.values_list("alias", flat=True)), ["vierer"])
+        b = Bin.objects.get(code="a-1-1")
+        self.assertEqual((b.code_canonical, b.aisle, b.rack, b.level, b.slot), ("A-1-1", "A", "1", "1", ""))
+        # Stammdaten erneut: keine Duplikate
+        self.run_import("M4-12,MAIN,a-1-1,12\n", **self.files)
+        self.assertEqual((Item.objects.count(), ItemAlias.objects.count(), Bin.objects.count()), (2, 1, 2))
+
+    def test_reimport_books_only_the_delta(self):
+        stock = "M4-12,MAIN,a-1-1,12\nM4-12,MAIN,A-01-02,3\nM5-20,MAIN,a-1-1,7\n"
+        self.run_import(stock, **self.files)
+        self.assertEqual(len(self.opening()), 3)
+        self.assertEqual(OnHandItem.objects.get(item__sku="M4-12").qty, Decimal("15"))
+
+        self.run_import(stock)
+        self.assertEqual(len(self.opening()), 3)
+        self.assertEqual(OnHandItem.objects.get(item__sku="M4-12").qty, Decimal("15"))
+
+        # Zielbestand geändert: nur die Differenz wird gebucht
+        self.run_import("M4-12,MAIN,a-1-1,8\nM4-12,MAIN,A-01-02,3\nM5-20,MAIN,a-1-1,9\n")
+        self.assertEqual(self.opening()[3:], [("M4-12", "a-1-1", None, Decimal("4")),
+                                              ("M5-20", None, "a-1-1", Decimal("2"))])
+        self.assertEqual(Inventory.objects.get(item__sku="M4-12", bin__code="a-1-1").qty, Decimal("8"))
+        self.assertEqual(OnHandItem.objects.get(item__sku="M4-12").qty, Decimal("11"))
+        self.assertEqual(OnHandLocation.objects.get(item__sku="M5-20").qty, Decimal("9"))
+        self.assertEqual(onhand.verify(), [])
+
+    def test_unknown_column_is_rejected(self):
+        path = self.csv("items_bad", "sku,name,farbe\nM4-12,Schraube,rot\n")
+        with self.assertRaises(CommandError):
+            call_command("import_warehouse", f"--items={path}", stdout=StringIO())
+        self.assertFalse(Item.objects.exists())
+
+
+class SyntheticTests(SimpleTestCase):
+    """Bausteine für Generator und Benchmarks: Formate und Reproduzierbarkeit über den Seed."""
+
+    def test_aisle_code(self):
+        self.assertEqual([aisle_code(n) for n in (0, 25, 26, 27, 701, 702)], ["A", "Z", "AA", "AB", "ZZ", "AAA"])
+
+    def test_bin_grid(self):
+        grid = list(bin_grid(2, 3, 2))
+        self.assertEqual(len(grid), len(set(grid)), 12)
+        self.assertEqual((grid[0], grid[-1]), ("A-01-01", "B-03-02"))
+
+    def test_same_seed_same_data(self):
+        def sample(seed):
+            rng = random.Random(seed)
+            names = [item_name(rng) for _ in range(20)]
+            return names, [item_alias(n, rng) for n in names], [spoken(n, rng) for n in names]
+
+        self.assertEqual(sample(7), sample(7))
+        self.assertNotEqual(sample(7)[0], sample(8)[0])
+
+    def test_spoken(self):
+        rng = mock.Mock(random=mock.Mock(return_value=0.9))  # ohne Tippfehler
+        self.assertEqual(spoken("Schraube M4x12 verzinkt", rng), "Schraube M vier zwölf verzinkt")
+
+    def test_build_request(self):
+        rng, pool, bins = random.Random(1), [("M4-12", "Schraube M4x12 A2", "MAIN-A-01-01")], ["MAIN-A-01-02"]
+        for name in READ_SCENARIOS:
+            method, path, body = build_request(name, rng, pool, bins)
+            self.assertEqual((method, body), ("GET", None))
+            self.assertTrue(path.startswith("/api/"))
+        for name in WRITE_SCENARIOS:
+            method, _path, body = build_request(name, rng, pool, bins)
+            self.assertEqual((method, body["sku"], body["qty"]), ("POST", "M4-12", 1))
+        self.assertEqual(build_request("move", rng, pool, bins)[2]["to_bin"], "MAIN-A-01-02")
+        with self.assertRaises(CommandError):
+            build_request("delete", rng, pool, bins)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 50), percentile(values, 99), percentile([], 95)), (51, 99, 0.0))
+
+
+class GenerateWarehouseTests(TestCase):
+    """generate_warehouse: Ledger und Bestand passen zusammen, Summentabellen stimmen."""
+
+    def test_small_warehouse(self):
+        args = ["--locations=2", "--aisles=2", "--racks=2", "--levels=2", "--items=30", "--years=0.2",
+                "--events=5", "--prefix=TST"]
+        call_command("generate_warehouse", *args, stdout=StringIO())
+        self.assertEqual(Item.objects.filter(sku__startswith="TST-").count(), 30)
+        self.assertEqual(Bin.objects.count(), 16)
+
+        balance = {}
+        for item_id, src, dst, qty in StockLedger.objects.values_list("item_id", "from_bin_id", "to_bin_id", "qty"):
+            if src:
+                balance[item_id, src] = balance.get((item_id, src), 0) - qty
+            if dst:
+                balance[item_id, dst] = balance.get((item_id, dst), 0) + qty
+        self.assertTrue(balance)
+        self.assertEqual({k: v for k, v in balance.items() if v},
+                         {(i, b): q for i, b, q in Inventory.objects.values_list("item_id", "bin_id", "qty")})
+        self.assertEqual(onhand.verify(), [])
+
+        with self.assertRaises(CommandError):
+            call_command("generate_warehouse", *args, stdout=StringIO())
+
+
+@override_settings(PERF_NPLUSONE_THRESHOLD=3, PERF_SLOW_MS=10_000)
+class PerfMiddlewareTests(SimpleTestCase):
+    """Server-Timing-Header und N+1-Erkennung; Queries werden über record_query zugerechnet."""
+
+    ITEM_SQL = "SELECT * FROM inventory_item WHERE id = %s"
+
+    def view(self, n):
+        def get_response(request):
+            for _ in range(n):
+                record_query(self.ITEM_SQL, 0.001)
+            record_query("UPDATE inventory_item SET name = %s", 0.001)
+            return HttpResponse("ok")
+        return get_response
+
+    def timing(self, resp):
+        return dict(part.split(";", 1) for part in resp["Server-Timing"].split(", "))
+
+    def test_server_timing_header(self):
+        with self.assertLogs("inventory.perf", "INFO") as logs:
+            resp = PerfMiddleware(self.view(2))(RequestFactory().get("/api/stock/"))
+        timing = self.timing(resp)
+        self.assertEqual(set(timing), {"db", "view", "render", "total"})
+        self.assertTrue(timing["db"].endswith('desc="3 queries"'))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((logs.records[0].levelname, entry["queries"], entry["path"]), ("INFO", 3, "/api/stock/"))
+
+    def test_repeated_select_is_flagged(self):
+        with self.assertLogs("inventory.perf", "WARNING") as logs:
+            resp = PerfMiddleware(self.view(3))(RequestFactory().get("/api/stock/"))
+        self.assertEqual(self.timing(resp)["nplus1"], 'desc="1 templates"')
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["nplus1"], [{"sql": self.ITEM_SQL, "count": 3}])
+
+    def test_async(self):
+        get_response = self.view(4)
+
+        async def aget_response(request):
+            return get_response(request)
+
+        with self.assertLogs("inventory.perf", "WARNING"):
+            resp = async_to_sync(PerfMiddleware(aget_response))(AsyncRequestFactory().get("/api/stock/"))
+        self.assertIn("nplus1", self.timing(resp))
+        self.assertTrue(self.timing(resp)["db"].endswith('desc="5 queries"'))
+
+
+class MetricsViewTests(TestCase):
+    """/metrics nur mit Anmeldung, dann Prometheus-Textformat."""
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("scrape", password="x"))
+        resp = client.get("/metrics")
+        self.assertEqual((resp.status_code, resp["Content-Type"]), (200, prom.CONTENT_TYPE))
+        self.assertIn(b"# TYPE warehouse_http_request_duration_seconds histogram", resp.content)
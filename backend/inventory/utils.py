@@ -1,3 +1,4 @@
+from django.http import JsonResponse
 from rest_framework.response import Response
 
 def speak(payload: dict, speech_text: str, http_status: int = 200):
@@ -6,3 +7,17 @@ def speak(payload: dict, speech_text: str, http_status: int = 200):
     Frontend liest `speech_text` für TTS und `data` für UI-Render.
     """
     return Response({"speech_text": speech_text, "data": payload}, status=http_status)
+
+
+def speak_json(payload: dict, speech_text: str, http_status: int = 200):
+    """speak() für async Views ohne DRF: gleiches Schema als JsonResponse."""
+    return JsonResponse({"speech_text": speech_text, "data": payload}, status=http_status,
+                        json_dumps_params={"ensure_ascii": False})
+
+
+def percentile(values, p: float) -> float:
+    """Perzentil (nearest rank) für Benchmarks; 0.0 bei leerer Liste."""
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
@@ -0,0 +1,30 @@
+from django.db import connection
+
+from . import adb
+
+VERSION_SQL = "SELECT version FROM inventory_cacheversion WHERE key = %s"
+
+
+def current_version(key: str) -> int:
+    """Aktuelle Version eines Caches (0, wenn noch nie gebumpt)."""
+    with connection.cursor() as cur:
+        cur.execute(VERSION_SQL, [key])
+        row = cur.fetchone()
+    return int(row[0]) if row else 0
+
+
+async def acurrent_version(key: str) -> int:
+    """current_version über den Async-Pool (ASGI-Lesepfade)."""
+    row = await adb.fetchone(VERSION_SQL, [key])
+    return int(row[0]) if row else 0
+
+
+def bump_version(key: str) -> int:
+    """Erhöht die Version atomar und liefert den neuen Wert."""
+    with connection.cursor() as cur:
+        cur.execute("""
+            INSERT INTO inventory_cacheversion (key, version) VALUES (%s, 1)
+            ON CONFLICT (key) DO UPDATE SET version = inventory_cacheversion.version + 1
+            RETURNING version;
+        """, [key])
+        return int(cur.fetchone()[0])
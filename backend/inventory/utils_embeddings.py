@@ -1,20 +1,107 @@
 import os
 from typing import List
-from openai import OpenAI
+
+import numpy as np
 
 EMBED_MODEL = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
+# openai | local  (local: offline, deterministisch, z. B. CI / Staging ohne Netz)
+EMBED_PROVIDER = os.getenv("EMBED_PROVIDER", "openai")
+EMBED_DIM = int(os.getenv("EMBEDDING_DIM", "1536"))
+
+
+class EmbeddingProvider:
+    """Schnittstelle: viele Texte rein, gleich viele Vektoren (Länge dim) raus."""
+    model_id = ""
+    dim = EMBED_DIM
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    model_id = EMBED_MODEL
+
+    def __init__(self):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        resp = self.client.embeddings.create(model=self.model_id, input=list(texts))
+        return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
+
+
+class LocalHashEmbeddingProvider(EmbeddingProvider):
+    """
+    Gehashte Zeichen-n-Gramme (feature hashing mit Vorzeichen), L2-normiert.
+    Rein NumPy, pro Batch ein np.add.at – keine Netzwerkzugriffe, keine Kosten.
+    """
+    model_id = "local-hash-ngram-v1"
+    ngram_sizes = (2, 3, 4)
+
+    _PRIME = np.uint64(1099511628211)
+    _OFFSET = np.uint64(14695981039346656037)
+
+    @staticmethod
+    def _mix(h: np.ndarray) -> np.ndarray:
+        # splitmix64-Finalizer für gleichmäßige Verteilung
+        h = h ^ (h >> np.uint64(30))
+        h = h * np.uint64(0xBF58476D1CE4E5B9)
+        h = h ^ (h >> np.uint64(27))
+        h = h * np.uint64(0x94D049BB133111EB)
+        return h ^ (h >> np.uint64(31))
+
+    def _hashes(self, text: str) -> np.ndarray:
+        b = np.frombuffer(f" {text.lower()} ".encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        out = []
+        for n in self.ngram_sizes:
+            m = len(b) - n + 1
+            if m <= 0:
+                continue
+            h = np.full(m, self._OFFSET, dtype=np.uint64)
+            for k in range(n):
+                h = (h ^ b[k:k + m]) * self._PRIME
+            out.append(self._mix(h + np.uint64(n)))
+        return np.concatenate(out) if out else np.empty(0, dtype=np.uint64)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        mat = np.zeros((len(texts), self.dim), dtype=np.float32)
+        hashes = [self._hashes(t or "") for t in texts]
+        rows = np.repeat(np.arange(len(texts)), [len(h) for h in hashes])
+        if len(rows):
+            h = np.concatenate(hashes)
+            cols = (h % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where((h >> np.uint64(63)) & np.uint64(1), 1.0, -1.0).astype(np.float32)
+            np.add.at(mat, (rows, cols), signs)
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        mat /= np.where(norms > 0, norms, 1.0)
+        return mat.tolist()
+
+
+PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalHashEmbeddingProvider,
+}
+
+_provider = None
+def get_provider() -> EmbeddingProvider:
+    global _provider
+    if _provider is None:
+        try:
+            _provider = PROVIDERS[EMBED_PROVIDER]()
+        except KeyError:
+            raise ValueError(f"Unbekannter EMBED_PROVIDER: {EMBED_PROVIDER!r} (erlaubt: {', '.join(PROVIDERS)})")
+    return _provider
 
-_client = None
-def _client_lazy():
-    global _client
-    if _client is None:
-        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    return _client
 
 def embed_text(text: str) -> List[float]:
     text = (text or "").strip()
     if not text:
         return []
-    cli = _client_lazy()
-    resp = cli.embeddings.create(model=EMBED_MODEL, input=text)
-    return resp.data[0].embedding
+    return get_provider().embed([text])[0]
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Batch-Variante: ein Aufruf für viele Texte, Reihenfolge bleibt erhalten."""
+    if not texts:
+        return []
+    return get_provider().embed(list(texts))
@@ -1,11 +1,21 @@
 # inventory/views.py
 
 import re
+import logging
+from datetime import timedelta
+from functools import wraps
 from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import connection, transaction
-from django.http import JsonResponse, Http404
+from django.db.models import Q, Case, When, Value, IntegerField
+from django.db.models.functions import Length
+from django.http import JsonResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
 from django.contrib.auth.models import User
 
 from rest_framework import status, viewsets, mixins
@@ -17,14 +27,31 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from rapidfuzz import process, fuzz
+from pgvector.django import CosineDistance
 
-from .models import Item, Location, Bin, ReorderPolicy, StockLedger, Inventory, ItemAlias
+from .models import Item, Location, Bin, ReorderPolicy, StockLedger, Inventory, OnHandItem
 from .serializers import (
     ItemSerializer, LocationSerializer, BinSerializer,
-    ReorderPolicySerializer, StockLedgerSerializer, InventorySerializer
+    ReorderPolicySerializer, StockLedgerSerializer, InventorySerializer,
+    ItemListSerializer, BinListSerializer, StockLedgerListSerializer, InventoryListSerializer,
 )
-from .utils import speak
+from .utils import speak, speak_json
+from . import adb
+from .idempotency import idempotent
+from .pagination import OptionalKeysetPagination, encode_cursor, decode_cursor, keyset_before
+from .posting import post_receive, post_move, post_issue, post_batch, InsufficientStock
+from .utils_embeddings import embed_text
+from .bincodes import canonical_bin_code, bin_components
+from .bin_cache import bin_cache
+from .checkpoints import stock_as_of, day_start
+from .exports import (
+    streaming_export, ledger_rows, inventory_rows, LEDGER_COLUMNS, INVENTORY_COLUMNS, CONTENT_TYPES
+)
+from .fuzzy_index import fuzzy_index
+from .fuzzy_trgm import trgm_candidates, trgm_candidates_batch, atrgm_candidates
+from . import metrics as prom
+
+log = logging.getLogger(__name__)
 
 # ------------------- Auth ----------------------------#
 
@@ -61,46 +88,58 @@ class LogoutView(APIView):
 # ------------------- Fuzzy Kandidaten -------------------
 
 def fuzzy_candidates(q: str, limit: int = 5):
-    items = list(Item.objects.all().values("id", "sku", "name"))
-    aliases = list(ItemAlias.objects.select_related("item").values("item_id", "alias"))
-    by_id = {i["id"]: i for i in items}
+    if getattr(settings, "FUZZY_ENGINE", "memory") == "trgm":
+        return trgm_candidates(q, limit=limit)
+    return fuzzy_index.candidates(q, limit=limit)
 
-    entries = []
-    entries += [(str(i["sku"]), i["id"]) for i in items if i["sku"]]
-    entries += [(str(i["name"]), i["id"]) for i in items if i["name"]]
-    entries += [(str(a["alias"]), a["item_id"]) for a in aliases if a["alias"]]
 
-    if not entries:
-        return []
-
-    texts = [t for (t, _id) in entries]
-    results = process.extract(q, texts, scorer=fuzz.WRatio, limit=limit * 3)
+# ------------------- ViewSets (CRUD) -------------------
 
-    seen, out = set(), []
-    for choice_text, score, idx in results:
-        item_id = entries[idx][1]
-        if item_id in seen:
-            continue
-        seen.add(item_id)
-        info = by_id.get(item_id)
-        if not info:
-            continue
-        out.append({
-            "sku": info["sku"],
-            "name": info["name"],
-            "score": round(float(score) / 100.0, 3),
-        })
-        if len(out) >= limit:
-            break
-    return out
+class ValuesReadMixin:
+    """
+    list/retrieve über read_serializer_class (.values(), ohne DRF-Felder, ?fields=…);
+    Schreiben bleibt beim ModelSerializer.
+    """
+    read_serializer_class = None
 
+    def list(self, request, *args, **kwargs):
+        try:
+            ser = self.read_serializer_class(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset())
+        # Sortierschlüssel mitselektieren, der Keyset-Cursor wird daraus gebildet
+        ordering = getattr(self.paginator, "get_ordering", None)
+        keys = [f.lstrip("-") for f in ordering(queryset)] if ordering else []
+        rows = ser.queryset(queryset, keys)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(ser.to_representation(page))
+        return Response(ser.to_representation(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            ser = self.read_serializer_class(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            # wie generics.get_object_or_404: ungültiger pk (z. B. "abc") ist 404, kein 500
+            queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup]})
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        row = ser.queryset(queryset).first()
+        if row is None:
+            raise Http404
+        return Response(ser.to_representation([row])[0])
 
-# ------------------- ViewSets (CRUD) -------------------
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Item.objects.all().order_by("sku")
     serializer_class = ItemSerializer
+    read_serializer_class = ItemListSerializer
     permission_classes = [AllowAny]
+    pagination_class = OptionalKeysetPagination
     search_fields = ["sku", "name"]
 
 
@@ -110,10 +149,12 @@ class LocationViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
 
-class BinViewSet(viewsets.ModelViewSet):
+class BinViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Bin.objects.select_related("location").all().order_by("location__code", "code")
     serializer_class = BinSerializer
+    read_serializer_class = BinListSerializer
     permission_classes = [AllowAny]
+    pagination_class = OptionalKeysetPagination
 
 
 class ReorderPolicyViewSet(viewsets.ModelViewSet):
@@ -122,20 +163,26 @@ class ReorderPolicyViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
 
-class StockLedgerViewSet(mixins.ListModelMixin,
+class StockLedgerViewSet(ValuesReadMixin,
+                         mixins.ListModelMixin,
                          mixins.RetrieveModelMixin,
                          viewsets.GenericViewSet):
-    queryset = StockLedger.objects.select_related("item", "from_bin", "to_bin").all().order_by("-ts")
+    queryset = StockLedger.objects.select_related("item", "from_bin", "to_bin").all().order_by("-ts", "-id")
     serializer_class = StockLedgerSerializer
+    read_serializer_class = StockLedgerListSerializer
     permission_classes = [AllowAny]
+    pagination_class = OptionalKeysetPagination
 
 
-class InventoryViewSet(mixins.ListModelMixin,
+class InventoryViewSet(ValuesReadMixin,
+                       mixins.ListModelMixin,
                        mixins.RetrieveModelMixin,
                        viewsets.GenericViewSet):
-    queryset = Inventory.objects.select_related("item", "bin", "bin__location").all()
+    queryset = Inventory.objects.select_related("item", "bin", "bin__location").all().order_by("item_id", "bin_id")
     serializer_class = InventorySerializer
+    read_serializer_class = InventoryListSerializer
     permission_classes = [AllowAny]
+    pagination_class = OptionalKeysetPagination
 
 
 # ------------------- Health -------------------
@@ -146,6 +193,13 @@ def health(request):
     return JsonResponse({"status": "ok"})
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def metrics(request):
+    """Prometheus-Scrape (Textformat); Werte dieses Worker-Prozesses. Nur mit JWT – Routen und Pool-Stände sind intern."""
+    return HttpResponse(prom.REGISTRY.render(), content_type=prom.CONTENT_TYPE)
+
+
 # ------------------- Bin-Normalisierung & -Auflösung -------------------
 
 def normalize_bin_input(s):
@@ -162,12 +216,24 @@ def normalize_bin_input(s):
 
 
 
-def resolve_bin(code_raw: str) -> Bin:
+class BinNotFound(Http404):
+    """Bin nicht auflösbar; candidates = semantische Vorschläge zum Bestätigen (nicht übernommen)."""
+
+    def __init__(self, msg, candidates=()):
+        super().__init__(msg)
+        self.candidates = list(candidates)
+
+
+def resolve_bin(code_raw: str, semantic: bool = True) -> Bin:
     """
-    Sucht Bin:
-      1) Exakt <LOC>-<BIN>
-      2) Falls kein LOC: nimmt MAIN als Default
-      3) Teilstring-Suche (erst in MAIN, sonst global)
+    Sucht Bin in EINER indexgestützten Abfrage über code_canonical/Komponenten.
+    Ranking:
+      0) Exakt <LOC>-<BIN>
+      1) Exakt in MAIN (Default-Location)
+      2) Exakt in anderer Location
+      3) Teileingabe (Gang/Regal/Ebene als Präfix), erst MAIN, dann global
+    Bei Gleichstand entscheidet der kürzeste Code, dann die Location.
+    semantic=False: ohne Embedding-Fallback (Buchungen, siehe resolve_posting_bin).
     """
     if not isinstance(code_raw, str):
         raise Http404("Kein Lagerplatz angegeben.")
@@ -176,36 +242,177 @@ def resolve_bin(code_raw: str) -> Bin:
     if not code:
         raise Http404("Kein Lagerplatz angegeben.")
 
+    canon = canonical_bin_code(code)
+    if not canon:
+        raise Http404("Kein Lagerplatz angegeben.")
+
+    # Exakte Treffer (LOC-BIN, MAIN-Default) ohne Query aus dem Prozess-Cache
+    cached = bin_cache.lookup(code)
+    if cached:
+        return cached
+
     parts = code.split('-')
+    match = Q(code_canonical=canon)
+    rank = [When(location__code="MAIN", code_canonical=canon, then=1),
+            When(code_canonical=canon, then=2)]
 
-    # 1) Vollständiger Location+Bin-Code
+    # Vollständiger Location+Bin-Code
     if len(parts) >= 4:
-        loc_code = parts[0]
-        bin_code = "-".join(parts[1:])
+        loc_code, bin_canon = parts[0], canonical_bin_code("-".join(parts[1:]))
+        match |= Q(location__code=loc_code, code_canonical=bin_canon)
+        rank.insert(0, When(location__code=loc_code, code_canonical=bin_canon, then=0))
+
+    # Teileingabe: angegebene Komponenten als Präfix (bin_components_idx)
+    comp = bin_components(code)
+    given = [k for k in ("aisle", "rack", "level", "slot") if comp[k]]
+    if len(given) < 4:
+        match |= Q(**{k: comp[k] for k in given})
+        rank.append(When(location__code="MAIN", then=3))
+
+    bin_obj = (Bin.objects
+               .select_related("location")
+               .filter(match)
+               .annotate(rank=Case(*rank, default=Value(4), output_field=IntegerField()),
+                         code_len=Length("code_canonical"))
+               .order_by("rank", "code_len", "code_canonical", "location__code", "code", "id")
+               .first())
+    if bin_obj:
+        return bin_obj
+
+    # Letzter Versuch: semantische Suche über Bin.embedding
+    if semantic and getattr(settings, "BIN_SEMANTIC_FALLBACK", True):
         try:
-            loc = Location.objects.get(code=loc_code)
-            return Bin.objects.get(location=loc, code=bin_code)
-        except (Location.DoesNotExist, Bin.DoesNotExist):
-            pass
-
-    # 2) Default-Location MAIN
-    try:
-        main = Location.objects.get(code="MAIN")
-        bin_obj = Bin.objects.filter(location=main, code=code).first()
-        if bin_obj:
-            return bin_obj
-        # 3) Teilstring-Suche
-        bin_obj = (Bin.objects.filter(location=main, code__icontains=code).first()
-                   or Bin.objects.filter(code__icontains=code).first())
-        if bin_obj:
-            return bin_obj
-    except Location.DoesNotExist:
-        pass
+            cands = semantic_bin_candidates(code_raw, limit=1)
+        except Exception as e:
+            log.warning("Semantische Bin-Suche fehlgeschlagen: %s", e)
+            cands = []
+        if cands and cands[0]["score"] >= getattr(settings, "BIN_SEMANTIC_MIN_SCORE", 0.85):
+            return cands[0]["bin_obj"]
 
     # Kein Treffer
     raise Http404(f"Bin {code_raw} nicht gefunden.")
 
 
+def resolve_bins(codes) -> dict:
+    """
+    Mehrere Bin-Codes auf einmal (Sammelbuchung), Ranking wie resolve_bin:
+    exakte Codes aus dem Bin-Cache bzw. in EINER Abfrage, nur Teileingaben einzeln
+    über resolve_bin. Ohne semantischen Fallback; nicht auflösbar -> None.
+    """
+    found, todo = {}, {}
+    for raw in codes:
+        code = normalize_bin_input(raw)
+        canon = canonical_bin_code(code) if code else ""
+        if not canon:
+            found[raw] = None
+            continue
+        cached = bin_cache.lookup(code)
+        if cached:
+            found[raw] = cached
+            continue
+        parts = code.split('-')
+        loc = (parts[0], canonical_bin_code("-".join(parts[1:]))) if len(parts) >= 4 else None
+        todo[raw] = (canon, loc)
+
+    if todo:
+        canons = {c for c, _ in todo.values()} | {loc[1] for _, loc in todo.values() if loc}
+        by_canon = {}
+        for b in Bin.objects.select_related("location").filter(code_canonical__in=canons):
+            by_canon.setdefault(b.code_canonical, []).append(b)
+
+        def rank(b, canon, loc):
+            if loc and (b.location.code, b.code_canonical) == loc:
+                return 0
+            return 1 if b.location.code == "MAIN" else 2
+
+        for raw, (canon, loc) in todo.items():
+            hits = [b for b in by_canon.get(canon, []) if b.code_canonical == canon]
+            if loc:
+                hits += [b for b in by_canon.get(loc[1], []) if b.location.code == loc[0]]
+            if hits:
+                found[raw] = min(hits, key=lambda b: (rank(b, canon, loc), len(b.code_canonical),
+                                                      b.code_canonical, b.location.code, b.code, b.id))
+                continue
+            # Teileingabe (Gang/Regal/Ebene): einzeln mit Komponenten-Ranking
+            try:
+                found[raw] = resolve_bin(raw, semantic=False)
+            except Http404:
+                found[raw] = None
+    return found
+
+
+def resolve_posting_bin(code_raw: str) -> Bin:
+    """
+    Bin für Buchungen: nur exakte bzw. Teil-Treffer, ein semantischer Treffer wird nie
+    übernommen (ein vertippter Platz landete sonst beim Nachbarn). Mit
+    BIN_SEMANTIC_POSTING_SUGGEST trägt die BinNotFound Vorschläge samt Score zum Bestätigen.
+    """
+    try:
+        return resolve_bin(code_raw, semantic=False)
+    except Http404 as e:
+        cands = []
+        if isinstance(code_raw, str) and getattr(settings, "BIN_SEMANTIC_POSTING_SUGGEST", False):
+            try:
+                cands = semantic_bin_candidates(code_raw, limit=3)
+            except Exception as ex:
+                log.warning("Semantische Bin-Suche fehlgeschlagen: %s", ex)
+        raise BinNotFound(str(e), [{k: v for k, v in c.items() if k != "bin_obj"} for c in cands]) from None
+
+
+def bin_candidates(e: Http404) -> dict:
+    """Bin-Vorschläge einer BinNotFound für die Fehlerantwort (leer, wenn keine)."""
+    cands = getattr(e, "candidates", None)
+    return {"candidates": cands} if cands else {}
+
+
+def semantic_bin_candidates(phrase: str, limit: int = 5, probes: int = None):
+    """
+    Cosine-Nearest-Neighbour über Bin.embedding (ivfflat- oder hnsw-Index aus embed_bins).
+    ivfflat.probes / hnsw.ef_search gelten nur für diese Transaktion.
+    """
+    text = (normalize_bin_input(phrase) or "").replace("-", " ")
+    vec = embed_text(text)
+    if not vec:
+        return []
+    probes = probes or getattr(settings, "BIN_SEMANTIC_PROBES", 10)
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute("SELECT set_config('ivfflat.probes', %s, true), set_config('hnsw.ef_search', %s, true);",
+                    [str(int(probes)), str(getattr(settings, "BIN_SEMANTIC_EF_SEARCH", 40))])
+        rows = list(Bin.objects
+                    .select_related("location")
+                    .filter(embedding__isnull=False)
+                    .annotate(distance=CosineDistance("embedding", vec))
+                    .order_by("distance")[:limit])
+    return [{
+        "bin": b.code,
+        "location": b.location.code,
+        "code": f"{b.location.code}-{b.code}",
+        "score": round(1.0 - float(b.distance), 3),
+        "bin_obj": b,
+    } for b in rows]
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def resolve_bin_view(request):
+    """
+    GET /api/resolve-bin?q=<gesprochener Lagerplatz>&limit=5&probes=10
+    Liefert { "data": { "candidates": [ {bin, location, code, score}, ... ] } }
+    """
+    q = (request.query_params.get("q") or "").strip()
+    if not q:
+        return Response({"data": {"candidates": []}}, status=400)
+    try:
+        limit = max(1, min(int(request.query_params.get("limit", 5)), 50))
+        probes = int(request.query_params["probes"]) if request.query_params.get("probes") else None
+    except ValueError:
+        return Response({"error": "limit/probes must be integer"}, status=status.HTTP_400_BAD_REQUEST)
+    cands = semantic_bin_candidates(q, limit=limit, probes=probes)
+    return Response({"data": {"candidates": [
+        {k: v for k, v in c.items() if k != "bin_obj"} for c in cands
+    ]}})
+
+
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
@@ -222,8 +429,43 @@ def resolve_item(request):
     return Response({"data": {"candidates": cands}})
 
 
+MAX_BATCH_QUERIES = 1000
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def resolve_item_batch(request):
+    """
+    POST /api/resolve-item/batch/
+    Body: { "queries": ["schraube m4", "M5-20", ...], "limit": 5? }
+    Liefert { "data": { "results": [ {q, candidates: [...]}, ... ] } } in Query-Reihenfolge.
+    """
+    queries = request.data.get("queries")
+    if not isinstance(queries, list) or not queries:
+        return Response({"error": "queries (list) required"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(queries) > MAX_BATCH_QUERIES:
+        return Response({"error": f"max {MAX_BATCH_QUERIES} queries per batch"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, min(int(request.data.get("limit", 5)), 50))
+    except (TypeError, ValueError):
+        return Response({"error": "limit must be integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    cleaned = [(q if isinstance(q, str) else "").strip() for q in queries]
+    todo = [q for q in cleaned if q]
+    if getattr(settings, "FUZZY_ENGINE", "memory") == "trgm":
+        found = iter(trgm_candidates_batch(todo, limit=limit))
+    else:
+        found = iter(fuzzy_index.candidates_batch(todo, limit=limit)) if todo else iter(())
+    results = [{"q": q, "candidates": (next(found) if q else [])} for q in cleaned]
+    return Response({"data": {"results": results}})
+
+
 # ------------------- Bestand / Stock -------------------
 
+# Gesamtbestand ohne OnHandItem-Zeile, in der Skala der Spalte (wie die async Variante)
+ZERO_QTY = Decimal("0.000")
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def stock(request):
@@ -251,11 +493,13 @@ def stock(request):
     rows = (
         Inventory.objects
         .filter(item=item)
-        .select_related("bin__location")
-        .values("bin__code", "bin__location__code", "qty")
+        .values_list("bin__code", "bin__location__code", "qty")
     )
-    bins = [{"bin": r["bin__code"], "location": r["bin__location__code"], "qty": r["qty"]} for r in rows]
-    on_hand = sum([r["qty"] for r in rows]) if rows else Decimal("0")
+    bins = [{"bin": b, "location": loc, "qty": qty} for b, loc, qty in rows]
+    # Gesamtbestand aus der gepflegten Summentabelle (eine indizierte Zeile)
+    on_hand = OnHandItem.objects.filter(item=item).values_list("qty", flat=True).first()
+    if on_hand is None:
+        on_hand = ZERO_QTY
     speech = (
         f"{item.sku} – {item.name}: Bestand {on_hand} {item.uom}. "
         + (f"In {len(bins)} Bins." if bins else "Keine Lagerplätze gefunden.")
@@ -263,6 +507,57 @@ def stock(request):
     return speak({"bins": bins, "on_hand": str(on_hand), "sku": item.sku, "name": item.name}, speech)
 
 
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def stock_as_of_view(request):
+    """
+    GET /api/stock/as-of/?at=2026-03-31[T18:00]&sku=SKU&bin=BIN
+    Bin-Bestände zu einem Zeitpunkt (Datum = Tagesende), aus dem nächsten
+    Checkpoint plus Ledger-Delta. sku und/oder bin erforderlich.
+    """
+    raw_at = (request.query_params.get("at") or "").strip()
+    sku = (request.query_params.get("sku") or "").strip()
+    bin_code = (request.query_params.get("bin") or "").strip()
+    if not raw_at or not (sku or bin_code):
+        return speak({"rows": []}, "Bitte Zeitpunkt und SKU oder Bin angeben.", http_status=400)
+
+    at = parse_datetime(raw_at)
+    if at is None:
+        day = parse_date(raw_at)
+        if day is None:
+            return Response({"error": "at must be YYYY-MM-DD or ISO datetime"}, status=status.HTTP_400_BAD_REQUEST)
+        at = day_start(day + timedelta(days=1))
+    elif timezone.is_naive(at):
+        at = timezone.make_aware(at)
+
+    item = b = None
+    if sku:
+        item = Item.objects.filter(sku=sku).first()
+        if item is None:
+            return speak({"rows": []}, f"SKU {sku} nicht gefunden.", http_status=404)
+    if bin_code:
+        try:
+            # Auswertung: kein semantischer Ersatz, sonst käme still der Bestand eines anderen Bins
+            b = resolve_bin(bin_code, semantic=False)
+        except Http404:
+            return speak({"rows": []}, f"Lagerplatz {bin_code} nicht gefunden.", http_status=404)
+
+    checkpoint, balances = stock_as_of(at, item_id=item.id if item else None, bin_id=b.id if b else None)
+    skus = dict(Item.objects.filter(id__in={i for i, _b, _q in balances}).values_list("id", "sku"))
+    bins = {bid: (code, loc) for bid, code, loc in
+            Bin.objects.filter(id__in={bid for _i, bid, _q in balances})
+            .values_list("id", "code", "location__code")}
+    rows = [{"sku": skus.get(i), "bin": bins.get(bid, (None, None))[0],
+             "location": bins.get(bid, (None, None))[1], "qty": str(q)}
+            for i, bid, q in balances]
+
+    what = " ".join(filter(None, [sku, f"in {b.location.code}-{b.code}" if b else ""]))
+    speech = (f"Bestand {what} am {timezone.localtime(at):%d.%m.%Y %H:%M}: "
+              + (f"{sum(q for _i, _b, q in balances)} in {len(rows)} Bins." if rows else "keiner."))
+    return speak({"at": at.isoformat(), "checkpoint": checkpoint.isoformat() if checkpoint else None,
+                  "rows": rows}, speech)
+
+
 # ------------------- Reorder -------------------
 
 @api_view(["GET"])
@@ -273,33 +568,24 @@ def reorder_suggestions(request):
     Liefert Liste mit (sku, name, location, on_hand, reorder_point, suggested_qty)
     """
     with connection.cursor() as cur:
+        # Gepflegte Alert-Tabelle (reorder.py): Aufwand hängt nur von der Zahl offener Vorschläge ab
         cur.execute("""
-            SELECT rp.item_id, rp.location_id,
-                   COALESCE(SUM(inv.qty), 0) AS on_hand,
-                   rp.reorder_point, rp.reorder_qty,
-                   GREATEST(rp.reorder_qty,
-                            rp.reorder_point - COALESCE(SUM(inv.qty),0)) AS suggested_qty
-            FROM inventory_reorderpolicy rp
-            LEFT JOIN inventory_inventory inv ON inv.item_id = rp.item_id
-            LEFT JOIN inventory_bin b ON b.id = inv.bin_id
-            WHERE (rp.location_id IS NULL OR b.location_id = rp.location_id)
-            GROUP BY rp.item_id, rp.location_id, rp.reorder_point, rp.reorder_qty
-            HAVING COALESCE(SUM(inv.qty),0) <= rp.reorder_point;
+            SELECT i.sku, i.name, COALESCE(l.code, 'ALL') AS location, a.on_hand,
+                   a.reorder_point, a.suggested_qty
+            FROM inventory_reorderalert a
+            JOIN inventory_item i ON i.id = a.item_id
+            LEFT JOIN inventory_location l ON l.id = a.location_id;
         """)
-        cols = [c[0] for c in cur.description]
-        data = [dict(zip(cols, row)) for row in cur.fetchall()]
-
-    items = {i.id: i for i in Item.objects.filter(id__in=[d["item_id"] for d in data])}
-    locs = {l.id: l for l in Location.objects.all()}
+        rows = cur.fetchall()
 
     out = [{
-        "sku": items[d["item_id"]].sku,
-        "name": items[d["item_id"]].name,
-        "location": (locs[d["location_id"]].code if d["location_id"] else "ALL"),
-        "on_hand": float(d["on_hand"]),
-        "reorder_point": float(d["reorder_point"]),
-        "suggested_qty": float(d["suggested_qty"]),
-    } for d in data]
+        "sku": sku,
+        "name": name,
+        "location": location,
+        "on_hand": float(on_hand),
+        "reorder_point": float(reorder_point),
+        "suggested_qty": float(suggested_qty),
+    } for sku, name, location, on_hand, reorder_point, suggested_qty in rows]
 
     return Response(out)
 
@@ -310,6 +596,7 @@ def reorder_suggestions(request):
 @permission_classes([AllowAny])
 @csrf_exempt
 @transaction.atomic
+@idempotent("PO_RECEIPT")
 def receive_goods(request):
     """
     POST /api/stock/receive
@@ -336,19 +623,14 @@ def receive_goods(request):
         return speak({"status": "error"}, f"SKU {sku} nicht gefunden.", http_status=404)
 
     try:
-        b = resolve_bin(bin_code)
+        b = resolve_posting_bin(bin_code)
     except Http404 as e:
-        return speak({"status": "error"}, str(e), http_status=404)
-
-    StockLedger.objects.create(item=item, to_bin=b, qty=qty, ref_type="PO_RECEIPT", ref_id=ref_id)
+        return speak({"status": "error", **bin_candidates(e)}, str(e), http_status=404)
 
-    inv, created = Inventory.objects.get_or_create(item=item, bin=b, defaults={"qty": qty})
-    if not created:
-        inv.qty = inv.qty + qty
-        inv.save()
+    new_qty = post_receive(item, b, qty, ref_id=ref_id)
 
     return speak(
-        {"status": "ok", "new_bin_qty": str(inv.qty)},
+        {"status": "ok", "new_bin_qty": str(new_qty)},
         f"Eingang gebucht: {qty} {item.uom} für {item.sku} in {b.location.code}-{b.code}."
     )
 
@@ -357,6 +639,7 @@ def receive_goods(request):
 @permission_classes([AllowAny])
 @csrf_exempt
 @transaction.atomic
+@idempotent("MOVE")
 def move_goods(request):
     """
     POST /api/stock/move/
@@ -388,48 +671,30 @@ def move_goods(request):
 
     # Bins robust auflösen (unterstützt LOC-BIN, MAIN-Default, Teilstring)
     try:
-        b_from = resolve_bin(from_code)
+        b_from = resolve_posting_bin(from_code)
     except Http404 as e:
-        return speak({"status": "error"}, str(e), http_status=404)
+        return speak({"status": "error", **bin_candidates(e)}, str(e), http_status=404)
 
     try:
-        b_to = resolve_bin(to_code)
+        b_to = resolve_posting_bin(to_code)
     except Http404 as e:
-        return speak({"status": "error"}, str(e), http_status=404)
+        return speak({"status": "error", **bin_candidates(e)}, str(e), http_status=404)
 
-    # Bestand im from_bin prüfen
-    inv_from, _ = Inventory.objects.get_or_create(item=item, bin=b_from, defaults={"qty": Decimal("0")})
-    if inv_from.qty < qty:
+    # Bestandsprüfung + Buchung in gesperrten Einzel-Statements
+    try:
+        from_qty, to_qty = post_move(item, b_from, b_to, qty, ref_id=ref_id)
+    except InsufficientStock as e:
         return Response(
-            {"error": "insufficient stock in from_bin", "available": str(inv_from.qty)},
+            {"error": "insufficient stock in from_bin", "available": str(e.available)},
             status=400
         )
 
-    # Ledger schreiben
-    StockLedger.objects.create(
-        item=item,
-        from_bin=b_from,
-        to_bin=b_to,
-        qty=qty,
-        ref_type="MOVE",
-        ref_id=ref_id,
-    )
-
-    # Bestände buchen
-    inv_from.qty = inv_from.qty - qty
-    inv_from.save()
-
-    inv_to, created = Inventory.objects.get_or_create(item=item, bin=b_to, defaults={"qty": qty})
-    if not created:
-        inv_to.qty = inv_to.qty + qty
-        inv_to.save()
-
     # Sprach-/Frontend-Antwort
     return speak(
         {
             "status": "ok",
-            "from_bin_qty": str(inv_from.qty),
-            "to_bin_qty": str(inv_to.qty),
+            "from_bin_qty": str(from_qty),
+            "to_bin_qty": str(to_qty),
             "sku": item.sku
         },
         f"Umgebucht: {qty} {item.uom} von {b_from.location.code}-{b_from.code} nach {b_to.location.code}-{b_to.code}."
@@ -441,6 +706,7 @@ def move_goods(request):
 @permission_classes([AllowAny])
 @csrf_exempt
 @transaction.atomic
+@idempotent("ISSUE")
 def issue_goods(request):
     """
     POST /api/stock/issue
@@ -465,46 +731,154 @@ def issue_goods(request):
 
     # Bin auflösen + Bestand prüfen
     try:
-        b_from = resolve_bin(from_code)
+        b_from = resolve_posting_bin(from_code)
     except Http404 as e:
-        return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"error": str(e), **bin_candidates(e)}, status=status.HTTP_404_NOT_FOUND)
 
-    inv_from, _ = Inventory.objects.get_or_create(item=item, bin=b_from, defaults={"qty": 0})
-    if inv_from.qty < qty:
-        return Response({"error": "insufficient stock in from_bin", "available": str(inv_from.qty)},
+    try:
+        from_qty = post_issue(item, b_from, qty, ref_id=ref_id)
+    except InsufficientStock as e:
+        return Response({"error": "insufficient stock in from_bin", "available": str(e.available)},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    # Ledger buchen
-    StockLedger.objects.create(
-        item=item,
-        from_bin=b_from,
-        to_bin=None,
-        qty=qty,
-        ref_type="ISSUE",
-        ref_id=ref_id,
-    )
-
-    # Bestand reduzieren
-    inv_from.qty = inv_from.qty - qty
-    inv_from.save()
-
     return speak(
-        {"status": "ok", "from_bin_qty": str(inv_from.qty)},
+        {"status": "ok", "from_bin_qty": str(from_qty)},
         f"Entnahme gebucht: {qty} {item.uom} von {b_from.location.code}-{b_from.code}."
     )
 
 
+MAX_POSTING_LINES = 5000
+POSTING_FIELDS = {
+    "receive": ("bin",),
+    "move": ("from_bin", "to_bin"),
+    "issue": ("from_bin",),
+}
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@csrf_exempt
+@idempotent()
+def stock_postings(request):
+    """
+    POST /api/stock/postings/
+    Body: { "mode": "atomic" | "best_effort", "lines": [
+              {"type": "receive", "sku": "...", "qty": 5, "bin": "A-01-01", "ref_id": "..."?},
+              {"type": "move", "sku": "...", "qty": 2, "from_bin": "...", "to_bin": "..."},
+              {"type": "issue", "sku": "...", "qty": 1, "from_bin": "..."} ] }
+    atomic (Default): alles oder nichts. best_effort: gültige Zeilen werden gebucht.
+    Wiederholungen mit gleichem Idempotency-Key-Header liefern die Originalantwort.
+    Liefert { status, posted, failed, results: [{index, status, error?, available?}] }
+    """
+    lines = request.data.get("lines")
+    mode = request.data.get("mode") or "atomic"
+    if mode not in ("atomic", "best_effort"):
+        return Response({"error": "mode must be atomic or best_effort"}, status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(lines, list) or not lines:
+        return Response({"error": "lines (list) required"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(lines) > MAX_POSTING_LINES:
+        return Response({"error": f"max {MAX_POSTING_LINES} lines per batch"}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = [None] * len(lines)
+
+    def fail(n, msg):
+        results[n] = {"index": n, "status": "error", "error": msg}
+
+    # 1) Syntax prüfen
+    parsed = {}
+    for n, raw in enumerate(lines):
+        if not isinstance(raw, dict) or raw.get("type") not in POSTING_FIELDS:
+            fail(n, "type must be receive, move or issue")
+            continue
+        fields = POSTING_FIELDS[raw["type"]]
+        if not all([raw.get("sku"), raw.get("qty")] + [raw.get(f) for f in fields]):
+            fail(n, f"sku, qty, {', '.join(fields)} required")
+            continue
+        # Listen/Objekte statt Codes: nur diese Zeile scheitert
+        if not all(isinstance(raw[f], str) for f in ("sku",) + fields) \
+                or not isinstance(raw.get("ref_id") or "", str):
+            fail(n, f"sku, {', '.join(fields)}, ref_id must be strings")
+            continue
+        try:
+            qty = Decimal(str(raw["qty"]))
+            if qty <= 0:
+                raise ValueError
+        except Exception:
+            fail(n, "qty must be positive number")
+            continue
+        parsed[n] = (raw, qty)
+
+    # 2) SKUs und Bins mengenbasiert auflösen
+    skus = {raw["sku"] for raw, _ in parsed.values()}
+    item_ids = dict(Item.objects.filter(sku__in=skus).values_list("sku", "id"))
+    bins = resolve_bins({raw[f] for raw, _ in parsed.values() for f in POSTING_FIELDS[raw["type"]]})
+
+    todo, todo_index = [], []
+    for n, (raw, qty) in parsed.items():
+        if raw["sku"] not in item_ids:
+            fail(n, f"SKU {raw['sku']} nicht gefunden.")
+            continue
+        missing = [raw[f] for f in POSTING_FIELDS[raw["type"]] if bins.get(raw[f]) is None]
+        if missing:
+            fail(n, f"Bin {missing[0]} nicht gefunden.")
+            continue
+        is_receive = raw["type"] == "receive"
+        todo.append({
+            "type": raw["type"],
+            "item_id": item_ids[raw["sku"]],
+            "qty": qty,
+            "from_bin": None if is_receive else bins[raw["from_bin"]],
+            "to_bin": bins[raw["bin"]] if is_receive else (bins[raw["to_bin"]] if raw["type"] == "move" else None),
+            "ref_id": raw.get("ref_id") or "",
+        })
+        todo_index.append(n)
+
+    # 3) Buchen (eine Transaktion)
+    committed = False
+    atomic = mode == "atomic"
+    if todo and not (atomic and any(results)):
+        posted, committed = post_batch(todo, atomic=atomic)
+        for n, r in zip(todo_index, posted):
+            if not committed and r["status"] == "ok":
+                r = {"status": "skipped"}
+            results[n] = {"index": n, **r}
+    for n in todo_index:
+        if results[n] is None:
+            results[n] = {"index": n, "status": "skipped"}
+
+    ok = sum(1 for r in results if r["status"] == "ok") if committed else 0
+    bad = sum(1 for r in results if r["status"] == "error")
+    if atomic and bad:
+        return speak({"status": "error", "mode": mode, "posted": 0, "failed": bad, "results": results},
+                     f"Nichts gebucht: {bad} fehlerhafte Zeile(n).", http_status=400)
+    return speak({"status": "ok", "mode": mode, "posted": ok, "failed": bad, "results": results},
+                 f"{ok} Buchungen gebucht" + (f", {bad} fehlerhaft." if bad else "."))
+
+
 # ------------------- Bewegungen -------------------
 
+MAX_MOVES_LIMIT = 500
+
+
+def moves_limit(value) -> int:
+    """limit für stock_moves/stock_moves_async, auf 1..MAX_MOVES_LIMIT begrenzt; ValueError bei Nicht-Zahl."""
+    return max(1, min(int(value), MAX_MOVES_LIMIT))
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def stock_moves(request):
     """
-    GET /api/stock-moves?sku=SKU&limit=5
-    Liefert { rows: [...] } mit jüngsten Bewegungen
+    GET /api/stock-moves?sku=SKU&limit=5[&cursor=...]
+    Liefert { rows: [...], next_cursor } mit jüngsten Bewegungen.
+    Ältere Seiten per cursor (Keyset über ts, id – Index ledger_item_ts_idx).
     """
     sku = (request.query_params.get("sku") or "").strip()
-    limit = int(request.query_params.get("limit", 5))
+    try:
+        limit = moves_limit(request.query_params.get("limit", 5))
+    except ValueError:
+        return Response({"error": "limit must be integer"}, status=status.HTTP_400_BAD_REQUEST)
+    cursor = request.query_params.get("cursor")
     if not sku:
         return speak({"rows": []}, "Bitte eine SKU angeben.", http_status=400)
 
@@ -524,7 +898,14 @@ def stock_moves(request):
     qs = (StockLedger.objects
           .filter(item=item)
           .select_related("from_bin__location", "to_bin__location")
-          .order_by("-ts")[:limit])
+          .order_by("-ts", "-id"))
+    if cursor:
+        try:
+            qs = keyset_before(qs, cursor)
+        except ValueError:
+            return Response({"error": "invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    page = list(qs[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1].ts, page[limit - 1].id) if len(page) > limit else None
 
     rows = [{
         "ts": sl.ts.isoformat(),
@@ -533,10 +914,10 @@ def stock_moves(request):
         "to_bin": (f"{sl.to_bin.location.code}-{sl.to_bin.code}" if sl.to_bin else None),
         "ref_type": sl.ref_type,
         "ref_id": sl.ref_id,
-    } for sl in qs]
+    } for sl in page[:limit]]
 
     if not rows:
-        return speak({"rows": []}, f"Keine Bewegungen für {item.sku} gefunden.")
+        return speak({"rows": [], "next_cursor": None}, f"Keine Bewegungen für {item.sku} gefunden.")
 
     last = rows[0]
     dirn = (f'von {last["from_bin"]} nach {last["to_bin"]}'
@@ -544,6 +925,212 @@ def stock_moves(request):
             else f'nach {last["to_bin"]}' if last["to_bin"]
             else f'von {last["from_bin"]}' if last["from_bin"] else "gebucht")
     speech = f"Letzte {len(rows)} Bewegungen für {item.sku}. Zuletzt {last['qty']} {item.uom} {dirn}."
-    return speak({"rows": rows}, speech)
+    return speak({"rows": rows, "next_cursor": next_cursor}, speech)
+
+
+# ------------------- Async-Lesepfade (ASGI) -------------------
+# Gleiche Antworten wie health/resolve_item/stock/stock_moves, aber ohne Thread je Request:
+# Queries laufen über den psycopg-Async-Pool (inventory.adb) direkt auf dem Event-Loop.
+# Geroutet werden sie nur mit ASYNC_READ_VIEWS (setzt warehouse/asgi.py).
+
+ITEM_SQL = """
+    SELECT i.id, i.sku, i.name, i.uom, coalesce(oh.qty, 0)::numeric(18, 3)
+    FROM inventory_item i
+    LEFT JOIN inventory_onhanditem oh ON oh.item_id = i.id
+    WHERE i.sku = %s
+"""
+
+STOCK_BINS_SQL = """
+    SELECT b.code, l.code, inv.qty
+    FROM inventory_inventory inv
+    JOIN inventory_bin b ON b.id = inv.bin_id
+    JOIN inventory_location l ON l.id = b.location_id
+    WHERE inv.item_id = %s
+"""
+
+MOVES_SQL = """
+    SELECT sl.ts, sl.id, sl.qty, fl.code, fb.code, tl.code, tb.code, sl.ref_type, sl.ref_id
+    FROM inventory_stockledger sl
+    LEFT JOIN inventory_bin fb ON fb.id = sl.from_bin_id
+    LEFT JOIN inventory_location fl ON fl.id = fb.location_id
+    LEFT JOIN inventory_bin tb ON tb.id = sl.to_bin_id
+    LEFT JOIN inventory_location tl ON tl.id = tb.location_id
+    WHERE sl.item_id = %(item)s {before}
+    ORDER BY sl.ts DESC, sl.id DESC
+    LIMIT %(n)s
+"""
+MOVES_BEFORE = "AND (sl.ts, sl.id) < (%(ts)s, %(id)s)"
+
+
+async def afuzzy_candidates(q: str, limit: int = 5):
+    if getattr(settings, "FUZZY_ENGINE", "memory") == "trgm":
+        return await atrgm_candidates(q, limit=limit)
+    return await fuzzy_index.acandidates(q, limit=limit)
+
+
+def _candidates_speech(cands) -> str:
+    best = cands[0]
+    if best["score"] < 0.9:
+        return f'Meinst du {best["sku"]} – {best["name"]}?'
+    return f'{best["sku"]} – {best["name"]} gefunden.'
+
+
+def async_read_view(view):
+    """require_safe (GET/HEAD); OPTIONS wie bei den DRF-Views mit 200 und Allow-Header."""
+    view = require_safe(view)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method == "OPTIONS":
+            resp = HttpResponse()
+            resp["Allow"] = "GET, HEAD, OPTIONS"
+            return resp
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@async_read_view
+async def health_async(request):
+    return JsonResponse({"status": "ok"})
+
 
+@async_read_view
+async def resolve_item_async(request):
+    """GET /api/resolve-item?q=... (async, siehe resolve_item)"""
+    q = (request.GET.get("q") or "").strip()
+    if not q:
+        return JsonResponse({"data": {"candidates": []}}, status=400)
+    return JsonResponse({"data": {"candidates": await afuzzy_candidates(q, limit=5)}},
+                        json_dumps_params={"ensure_ascii": False})
+
+
+@async_read_view
+async def stock_async(request):
+    """GET /api/stock?sku=SKU (async, siehe stock)"""
+    sku = (request.GET.get("sku") or "").strip()
+    if not sku:
+        return speak_json({"bins": []}, "SKU erforderlich.", http_status=400)
 
+    item = await adb.fetchone(ITEM_SQL, [sku])
+    if item is None:
+        cands = await afuzzy_candidates(sku)
+        if cands:
+            return speak_json({"candidates": cands}, _candidates_speech(cands))
+        return speak_json({"bins": []}, f"SKU {sku} nicht gefunden.", http_status=404)
+
+    item_id, item_sku, name, uom, on_hand = item
+    bins = [{"bin": b, "location": loc, "qty": float(qty)}
+            for b, loc, qty in await adb.fetchall(STOCK_BINS_SQL, [item_id])]
+    speech = (
+        f"{item_sku} – {name}: Bestand {on_hand} {uom}. "
+        + (f"In {len(bins)} Bins." if bins else "Keine Lagerplätze gefunden.")
+    )
+    return speak_json({"bins": bins, "on_hand": str(on_hand), "sku": item_sku, "name": name}, speech)
+
+
+@async_read_view
+async def stock_moves_async(request):
+    """GET /api/stock-moves?sku=SKU&limit=5[&cursor=...] (async, siehe stock_moves)"""
+    sku = (request.GET.get("sku") or "").strip()
+    try:
+        limit = moves_limit(request.GET.get("limit", 5))
+    except ValueError:
+        return JsonResponse({"error": "limit must be integer"}, status=400)
+    if not sku:
+        return speak_json({"rows": []}, "Bitte eine SKU angeben.", http_status=400)
+
+    params = {"n": limit + 1}
+    sql = MOVES_SQL.format(before="")
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            params["ts"], params["id"] = decode_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"error": "invalid cursor"}, status=400)
+        sql = MOVES_SQL.format(before=MOVES_BEFORE)
+
+    item = await adb.fetchone(ITEM_SQL, [sku])
+    if item is None:
+        cands = await afuzzy_candidates(sku)
+        if cands:
+            return speak_json({"candidates": cands}, _candidates_speech(cands))
+        return speak_json({"rows": []}, f"SKU {sku} nicht gefunden.", http_status=404)
+    item_id, item_sku, _name, uom, _on_hand = item
+
+    params["item"] = item_id
+    page = await adb.fetchall(sql, params)
+    next_cursor = encode_cursor(page[limit - 1][0], page[limit - 1][1]) if len(page) > limit else None
+    rows = [{
+        "ts": ts.isoformat(),
+        "qty": float(qty),
+        "from_bin": f"{from_loc}-{from_bin}" if from_bin else None,
+        "to_bin": f"{to_loc}-{to_bin}" if to_bin else None,
+        "ref_type": ref_type,
+        "ref_id": ref_id,
+    } for ts, _id, qty, from_loc, from_bin, to_loc, to_bin, ref_type, ref_id in page[:limit]]
+
+    if not rows:
+        return speak_json({"rows": [], "next_cursor": None}, f"Keine Bewegungen für {item_sku} gefunden.")
+
+    last = rows[0]
+    dirn = (f'von {last["from_bin"]} nach {last["to_bin"]}'
+            if last["from_bin"] and last["to_bin"]
+            else f'nach {last["to_bin"]}' if last["to_bin"]
+            else f'von {last["from_bin"]}' if last["from_bin"] else "gebucht")
+    speech = f"Letzte {len(rows)} Bewegungen für {item_sku}. Zuletzt {last['qty']} {uom} {dirn}."
+    return speak_json({"rows": rows, "next_cursor": next_cursor}, speech)
+
+
+# ------------------- Export (Streaming) -------------------
+
+def _export_params(request):
+    """fmt/since_ts/since_id/until_ts/limit aus der Query; ValueError bei ungültigen Werten."""
+    qp = request.query_params
+    fmt = (qp.get("fmt") or "ndjson").lower()
+    if fmt not in CONTENT_TYPES:
+        raise ValueError("fmt must be ndjson or csv")
+    out = {"fmt": fmt}
+    for key in ("since_ts", "until_ts"):
+        if qp.get(key):
+            ts = parse_datetime(qp[key])
+            if ts is None:
+                raise ValueError(f"{key} must be an ISO datetime")
+            out[key] = timezone.make_aware(ts) if timezone.is_naive(ts) else ts
+    for key in ("since_id", "limit"):
+        if qp.get(key):
+            out[key] = int(qp[key])
+    return out
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def export_ledger(request):
+    """
+    GET /api/export/ledger/?fmt=ndjson|csv&since_ts=...&since_id=...&until_ts=...&limit=...
+    Streamt den Ledger nach (ts, id) über einen Server-Side-Cursor (konstanter Speicher).
+    """
+    try:
+        p = _export_params(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    rows = ledger_rows(since_ts=p.get("since_ts"), since_id=p.get("since_id"),
+                       until_ts=p.get("until_ts"), limit=p.get("limit"))
+    return streaming_export(rows, LEDGER_COLUMNS, p["fmt"], "ledger")
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def export_inventory(request):
+    """
+    GET /api/export/inventory/?fmt=ndjson|csv&limit=...
+    Streamt alle Bestandszeilen nach id (Vollabzug; Änderungen über /api/export/ledger/).
+    """
+    try:
+        p = _export_params(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if {"since_id", "since_ts"} & set(p):
+        return Response({"error": "inventory export is a full snapshot; use /api/export/ledger/ for changes"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    rows = inventory_rows(limit=p.get("limit"))
+    return streaming_export(rows, INVENTORY_COLUMNS, p["fmt"], "inventory")
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'warehouse.settings')
+# Lesepfade stock/stock-moves/resolve-item/health async bedienen (siehe settings.ASYNC_READ_VIEWS)
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
 
 application = get_asgi_application()
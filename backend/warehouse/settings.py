@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from django.core.management.utils import get_random_secret_key
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -65,7 +66,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'inventory.middleware.StaticFilesMiddleware',   # WhiteNoise, async-fähig (ASGI)
+    'inventory.middleware.PerfMiddleware',          # Server-Timing + Perf-Log je Request
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -185,6 +187,9 @@ CORS_ALLOWED_ORIGINS = [s for s in os.getenv(
     ).split(",") if s]
 
 CORS_ALLOW_CREDENTIALS = True
+# Idempotency-Key für sichere Wiederholungen von Buchungen (Handheld-Retries)
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Server-Timing"]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -193,7 +198,11 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "inventory.pagination.EstimatedCountPagination",
+    "DEFAULT_RENDERER_CLASSES": (
+        "inventory.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "PAGE_SIZE": 50,
 }
 
@@ -203,4 +212,52 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
-}
\ No newline at end of file
+}
+
+# Fuzzy-Suche: Engine für fuzzy_candidates
+#   memory   – WRatio über den kompletten In-Memory-Index
+#   phonetic – Vorauswahl über Kölner Phonetik, WRatio nur auf der Shortlist
+#   trgm     – Vorauswahl per pg_trgm in Postgres, kein Katalog im Worker-RAM
+FUZZY_ENGINE = os.getenv("FUZZY_ENGINE", "memory")
+FUZZY_PHONETIC_SHORTLIST = int(os.getenv("FUZZY_PHONETIC_SHORTLIST", "200"))
+FUZZY_TRGM_CANDIDATES = int(os.getenv("FUZZY_TRGM_CANDIDATES", "300"))
+FUZZY_TRGM_THRESHOLD = float(os.getenv("FUZZY_TRGM_THRESHOLD", "0.2"))
+# Threads für rapidfuzz.process.cdist (-1 = alle Kerne)
+FUZZY_WORKERS = int(os.getenv("FUZZY_WORKERS", "-1"))
+
+# Bin-Cache: so oft (Sekunden) prüft jeder Worker die Cache-Version in der DB
+BIN_CACHE_CHECK_INTERVAL = float(os.getenv("BIN_CACHE_CHECK_INTERVAL", "2"))
+
+# Semantische Bin-Suche (pgvector): ivfflat.probes bzw. hnsw.ef_search und Fallback in resolve_bin
+# (Werte mit `manage.py bench_vectors` ermitteln)
+BIN_SEMANTIC_PROBES = int(os.getenv("BIN_SEMANTIC_PROBES", "10"))
+BIN_SEMANTIC_EF_SEARCH = int(os.getenv("BIN_SEMANTIC_EF_SEARCH", "40"))
+BIN_SEMANTIC_FALLBACK = os.getenv("BIN_SEMANTIC_FALLBACK", "1") == "1"
+BIN_SEMANTIC_MIN_SCORE = float(os.getenv("BIN_SEMANTIC_MIN_SCORE", "0.85"))
+# Buchungen übernehmen nie einen semantischen Treffer; auf Wunsch liefert die 404 Vorschläge
+# zum Bestätigen (kostet einen Embedding-Aufruf innerhalb der Buchungstransaktion)
+BIN_SEMANTIC_POSTING_SUGGEST = os.getenv("BIN_SEMANTIC_POSTING_SUGGEST", "0") == "1"
+
+# Idempotency-Key: gespeicherte Buchungsantworten so lange wiederholbar (Cleanup: idempotency_cleanup)
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+
+# Perf-Middleware: ab so vielen gleichen SELECTs je Request gilt es als N+1; langsame Requests als WARNING
+PERF_NPLUSONE_THRESHOLD = int(os.getenv("PERF_NPLUSONE_THRESHOLD", "5"))
+PERF_SLOW_MS = float(os.getenv("PERF_SLOW_MS", "500"))
+
+# Async-Lesepfade (stock, stock-moves, resolve-item, health) – warehouse/asgi.py schaltet sie ein;
+# unter WSGI liefe jede async View über einen eigenen Event-Loop je Request.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "0") == "1"
+# psycopg-AsyncConnections je Worker (inventory.adb)
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "10"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"plain": {"format": "%(message)s"}},
+    "handlers": {"perf": {"class": "logging.StreamHandler", "formatter": "plain"}},
+    "loggers": {
+        # eine JSON-Zeile je Request (INFO), N+1/langsam als WARNING
+        "inventory.perf": {"handlers": ["perf"], "level": os.getenv("PERF_LOG_LEVEL", "INFO"), "propagate": False},
+    },
+}
@@ -1,4 +1,5 @@
 # warehouse/urls.py
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
@@ -7,7 +8,9 @@ from inventory.views import (
     ItemViewSet, LocationViewSet, BinViewSet,
     ReorderPolicyViewSet, StockLedgerViewSet, InventoryViewSet,
     health, stock, reorder_suggestions, receive_goods, move_goods,
-    stock_moves, issue_goods, resolve_item
+    stock_moves, issue_goods, resolve_item, resolve_item_batch, resolve_bin_view,
+    stock_postings, stock_as_of_view, export_ledger, export_inventory, metrics,
+    health_async, stock_async, stock_moves_async, resolve_item_async,
 )
 
 from inventory.views import MeView, LogoutView
@@ -15,6 +18,11 @@ from inventory.views import resolve_item  # ✅ richtige View importieren
 # NICHT: from inventory.views import resolve_bin as resolve_item
 
 
+# Unter ASGI die async Lesepfade (kein Thread je Request), sonst die DRF-Views
+if settings.ASYNC_READ_VIEWS:
+    health, stock, stock_moves, resolve_item = health_async, stock_async, stock_moves_async, resolve_item_async
+
+
 router = DefaultRouter()
 router.register(r"items", ItemViewSet)
 router.register(r"locations", LocationViewSet)
@@ -45,15 +53,26 @@ urlpatterns = [
 
     # Funktionsendpunkte – ALLE unter /api/ und mit trailing slash
     path("api/health/", health, name="health"),
+    path("metrics", metrics, name="metrics"),
      # GET-Endpoints
      # GET-Endpoints
     path("api/stock/", stock),
+    path("api/stock/as-of/", stock_as_of_view),
     path("api/stock-moves/", stock_moves),
     path("api/resolve-item/", resolve_item),
+    path("api/resolve-bin/", resolve_bin_view),
     path("api/reorder/suggestions/", reorder_suggestions),
 
+    # Streaming-Export (BI, inkrementell per Wasserzeichen)
+    path("api/export/ledger/", export_ledger),
+    path("api/export/inventory/", export_inventory),
+
+    # Batch-Auflösung (Picklisten, Lieferscheine)
+    path("api/resolve-item/batch/", resolve_item_batch),
+
     # POST-Endpoints
     path("api/stock/receive/", receive_goods),
     path("api/stock/move/", move_goods),
     path("api/stock/issue/", issue_goods),
+    path("api/stock/postings/", stock_postings),
 ]
@@ -1,12 +1,16 @@
 # intent_service/main.py
-import os, json, re, logging, traceback, requests
+import os, json, re, logging, traceback, requests, uuid, time
+from contextvars import ContextVar
 from typing import Optional, Literal, List
-from fastapi import FastAPI, Header
+from fastapi import FastAPI, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from metrics import REGISTRY, CONTENT_TYPE, Counter, Histogram
+
 load_dotenv()
 
 # -----------------------------------------------------------------------------
@@ -25,6 +29,60 @@ app.add_middleware(
 log = logging.getLogger("intent")
 log.setLevel(logging.INFO)
 
+# -----------------------------------------------------------------------------
+# Metriken (/metrics, Prometheus-Textformat)
+# -----------------------------------------------------------------------------
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "intent_http_request_duration_seconds", "Dauer je Request nach Endpoint", ("method", "route", "status")))
+CHAT_LATENCY = REGISTRY.register(Histogram(
+    "intent_chat_duration_seconds", "Dauer je /chat nach erkanntem Intent", ("intent",)))
+CHAT_ROUNDTRIPS = REGISTRY.register(Histogram(
+    "intent_chat_backend_roundtrips", "Backend-Requests je /chat nach Intent", ("intent",),
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10)))
+LLM_CALLS = REGISTRY.register(Counter(
+    "intent_llm_requests_total", "LLM-Aufrufe (outcome=ok|error)", ("model", "outcome")))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "intent_llm_request_duration_seconds", "Dauer je LLM-Aufruf", ("model",)))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "intent_llm_tokens_total", "Verbrauchte Tokens (kind=prompt|completion)", ("model", "kind")))
+UPSTREAM_CALLS = REGISTRY.register(Counter(
+    "intent_upstream_requests_total", "Requests an Backend/Vanna nach Ziel, Pfad und Status",
+    ("target", "path", "status")))
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    "intent_upstream_request_duration_seconds", "Dauer je Request an Backend/Vanna", ("target", "path")))
+
+# Zähler des laufenden /chat (je Request eigener Kontext)
+_chat_stats: ContextVar[Optional[dict]] = ContextVar("chat_stats", default=None)
+# Idempotency-Key des laufenden /chat: vom Client oder je Request neu erzeugt
+_action_key: ContextVar[Optional[str]] = ContextVar("action_key", default=None)
+
+
+def _track_upstream(target: str, path: str, t0: float, status) -> None:
+    UPSTREAM_LATENCY.observe(time.perf_counter() - t0, target=target, path=path)
+    UPSTREAM_CALLS.inc(target=target, path=path, status=status)
+    stats = _chat_stats.get()
+    if stats is not None and target == "backend":
+        stats["roundtrips"] += 1
+
+
+@app.middleware("http")
+async def http_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_LATENCY.observe(time.perf_counter() - t0, method=request.method,
+                             route=getattr(route, "path", "<unmatched>"), status=status)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 # -----------------------------------------------------------------------------
 # Config
 # -----------------------------------------------------------------------------
@@ -60,16 +118,28 @@ class IntentOut(BaseModel):
 def _ensure_trailing_slash(path: str) -> str:
     return path if path.endswith("/") else path + "/"
 
-def backend_post(path: str, payload: dict, authorization: Optional[str]) -> requests.Response:
+def backend_post(path: str, payload: dict, authorization: Optional[str],
+                 idempotency_key: Optional[str] = None) -> requests.Response:
     path = _ensure_trailing_slash(path)
     url = f"{BACKEND}{path}"
-    headers = {"Content-Type": "application/json", **build_auth_headers(authorization)}
-    resp = requests.post(url, json=payload, headers=headers, timeout=30)
+    extra = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+    headers = {"Content-Type": "application/json", **extra, **build_auth_headers(authorization)}
+    resp = _timed_backend("POST", path, url, json=payload, headers=headers, timeout=30)
     if resp.status_code == 401 and _refresh_token():
-        headers = {"Content-Type": "application/json", **build_auth_headers(None)}
-        resp = requests.post(url, json=payload, headers=headers, timeout=30)
+        headers = {"Content-Type": "application/json", **extra, **build_auth_headers(None)}
+        resp = _timed_backend("POST", path, url, json=payload, headers=headers, timeout=30)
     return resp
 
+def _timed_backend(method: str, path: str, url: str, **kwargs) -> requests.Response:
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        resp = requests.request(method, url, **kwargs)
+        status = resp.status_code
+        return resp
+    finally:
+        _track_upstream("backend", path, t0, status)
+
 
 def http_fail(msg: str, status: int = 500):
     return {"speech_text": msg, "data": {"status": "error", "http_status": status}}
@@ -87,7 +157,8 @@ def _refresh_token() -> bool:
     global ACCESS_TOKEN
     if not REFRESH_TOKEN:
         return False
-    r = requests.post(f"{BACKEND}/api/auth/refresh/", json={"refresh": REFRESH_TOKEN}, timeout=10)
+    r = _timed_backend("POST", "/api/auth/refresh/", f"{BACKEND}/api/auth/refresh/",
+                       json={"refresh": REFRESH_TOKEN}, timeout=10)
     if r.ok:
         ACCESS_TOKEN = r.json().get("access")
         return bool(ACCESS_TOKEN)
@@ -97,10 +168,10 @@ def backend_get(path: str, params: dict, authorization: Optional[str]) -> reques
     path = _ensure_trailing_slash(path)
     url = f"{BACKEND}{path}"
     headers = {"Accept": "application/json", **build_auth_headers(authorization)}
-    resp = requests.get(url, params=params, headers=headers, timeout=30)
+    resp = _timed_backend("GET", path, url, params=params, headers=headers, timeout=30)
     if resp.status_code == 401 and _refresh_token():
         headers = {"Accept": "application/json", **build_auth_headers(None)}
-        resp = requests.get(url, params=params, headers=headers, timeout=30)
+        resp = _timed_backend("GET", path, url, params=params, headers=headers, timeout=30)
     return resp
 
 def backend_get_resilient(paths: List[str], params: dict, authorization: Optional[str]) -> requests.Response:
@@ -115,10 +186,22 @@ def backend_get_resilient(paths: List[str], params: dict, authorization: Optiona
         last = r
     return last
 
+def action_idempotency_key() -> str:
+    """
+    Key der laufenden /chat-Aktion: Idempotency-Key-Header des Clients (dessen Retry
+    bucht nicht doppelt), sonst einer je /chat-Request. Zwei gleichlautende, gewollte
+    Buchungen sind zwei Requests und werden beide gebucht.
+    """
+    return _action_key.get() or str(uuid.uuid4())
+
 def backend_post_resilient(paths: List[str], payload: dict, authorization: Optional[str]) -> requests.Response:
+    """
+    Ein Idempotency-Key für alle Versuche: das Backend bucht höchstens einmal.
+    """
     last = None
+    key = action_idempotency_key()
     for p in paths:
-        r = backend_post(p, payload, authorization)
+        r = backend_post(p, payload, authorization, idempotency_key=key)
         if r.ok:
             return r
         last = r
@@ -153,14 +236,25 @@ def _extract_backend_error(resp: Optional[requests.Response]) -> tuple[str, str]
 def backend_error_response(resp: Optional[requests.Response], endpoint: str, status_fallback: int = 500):
     code, msg = _extract_backend_error(resp)
     status_code = resp.status_code if (resp is not None and resp.status_code) else status_fallback
+    data = {
+        "status": "error",
+        "http_status": status_code,
+        "error_code": code,
+        "endpoint": endpoint,
+    }
+    # Bin-Vorschläge des Backends (semantisch, nie automatisch gebucht) zum Bestätigen weiterreichen
+    try:
+        body = resp.json() if resp is not None else {}
+        cands = body.get("candidates") or (body.get("data") or {}).get("candidates")
+    except Exception:
+        cands = None
+    if cands and code.startswith("BIN_"):
+        data["candidates"] = cands
+        data["confirmation_needed"] = True
+        msg = f"{msg} Meintest du {cands[0]['code']}? Bitte Lagerplatz bestätigen."
     return {
         "speech_text": msg or "Fehler.",
-        "data": {
-            "status": "error",
-            "http_status": status_code,
-            "error_code": code,
-            "endpoint": endpoint,
-        },
+        "data": data,
     }
 
 # -----------------------------------------------------------------------------
@@ -266,9 +360,27 @@ Text: "Verschiebe 10 M4-12 von A-01-01 nach A-01-02"
 {"intent":"ACTION_MOVE","params":{"sku":"M4-12","qty":10,"from_bin":"A-01-01","to_bin":"A-01-02"}}
 """
 
+def llm_complete(**kwargs):
+    """chat.completions.create mit Zählung, Dauer und Token-Verbrauch."""
+    model = kwargs.get("model", OPENAI_MODEL)
+    t0 = time.perf_counter()
+    try:
+        r = client.chat.completions.create(**kwargs)
+    except Exception:
+        LLM_CALLS.inc(model=model, outcome="error")
+        raise
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - t0, model=model)
+    LLM_CALLS.inc(model=model, outcome="ok")
+    usage = getattr(r, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, model=model, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, model=model, kind="completion")
+    return r
+
 def parse_with_llm(user_text: str) -> IntentOut:
     prompt = f"{FEW_SHOT}\n\nText: {user_text}\nAntworte NUR als JSON."
-    r = client.chat.completions.create(
+    r = llm_complete(
         model=OPENAI_MODEL,
         temperature=0.2,
         top_p=0.9,
@@ -282,7 +394,7 @@ def parse_with_llm(user_text: str) -> IntentOut:
     if intent not in ALLOWED_INTENTS:
         strict = ("Nur diese Intents sind erlaubt: QUERY, ACTION_RECEIVE, ACTION_MOVE, ACTION_ISSUE, HELP, SMALL_TALK. "
                   "Gib ausschließlich JSON zurück.\nText: " + user_text)
-        r2 = client.chat.completions.create(
+        r2 = llm_complete(
             model=OPENAI_MODEL,
             temperature=0.1,
             messages=[{"role":"system","content":SYSTEM},{"role":"user","content":strict}],
@@ -306,9 +418,24 @@ def parse_with_llm(user_text: str) -> IntentOut:
 # API
 # -----------------------------------------------------------------------------
 @app.post("/chat")
-def chat(inp: ChatIn, authorization: Optional[str] = Header(None)):
+def chat(inp: ChatIn, authorization: Optional[str] = Header(None),
+         idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    stats = {"intent": "UNKNOWN", "roundtrips": 0}
+    token = _chat_stats.set(stats)
+    key_token = _action_key.set((idempotency_key or "").strip() or str(uuid.uuid4()))
+    t0 = time.perf_counter()
+    try:
+        return handle_chat(inp, authorization)
+    finally:
+        _action_key.reset(key_token)
+        _chat_stats.reset(token)
+        CHAT_LATENCY.observe(time.perf_counter() - t0, intent=stats["intent"])
+        CHAT_ROUNDTRIPS.observe(stats["roundtrips"], intent=stats["intent"])
+
+def handle_chat(inp: ChatIn, authorization: Optional[str]):
     try:
         parsed = parse_with_llm(inp.text)
+        _chat_stats.get()["intent"] = parsed.intent
 
         # ------------------ QUERY ------------------
         if parsed.intent == "QUERY":
@@ -384,7 +511,9 @@ def chat(inp: ChatIn, authorization: Optional[str] = Header(None)):
 
             # generische Analyse → Vanna
             q = parsed.params.get("question") or inp.text
+            t0 = time.perf_counter()
             v = requests.post(f"{VANNA}/ask", json={"question": q}, timeout=30)
+            _track_upstream("vanna", "/ask", t0, v.status_code)
             if v.status_code != 200:
                 return http_fail(f"Vanna-Fehler: {v.text}", 400)
             vdata = v.json()
@@ -0,0 +1,56 @@
+# intent_service/tests.py  (python -m unittest tests)
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import main  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.status_code = 200 if ok else 502
+
+    def json(self):
+        return {"speech_text": "ok", "data": {"status": "ok"}}
+
+
+class IdempotencyKeyTests(unittest.TestCase):
+    """Key je /chat-Aktion: Client-Key wird durchgereicht, sonst ein neuer je Request."""
+
+    def setUp(self):
+        intent = main.IntentOut(intent="ACTION_ISSUE", params={"sku": "M4-12", "qty": 1, "from_bin": "A-01-01"})
+        for target, kwargs in (("parse_with_llm", {"return_value": intent}),
+                               ("normalize_action_request", {}),
+                               ("backend_post", {"return_value": FakeResponse()})):
+            patcher = mock.patch.object(main, target, **kwargs)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def chat(self, key=None):
+        main.chat(main.ChatIn(text="eins von A-01-01 entnehmen", confirm=True), authorization=None,
+                  idempotency_key=key)
+        return self.backend_post.call_args.kwargs["idempotency_key"]
+
+    def test_same_utterance_twice_gets_two_keys(self):
+        self.assertNotEqual(self.chat(), self.chat())
+
+    def test_client_key_is_forwarded(self):
+        self.assertEqual(self.chat("client-1"), "client-1")
+        self.assertEqual(self.chat("client-1"), "client-1")
+
+    def test_retry_loop_reuses_key(self):
+        self.backend_post.side_effect = [FakeResponse(ok=False), FakeResponse()]
+        token = main._action_key.set("chat-1")
+        try:
+            main.backend_post_resilient(["/api/stock/issue/", "/api/stock/issue"], {}, None)
+        finally:
+            main._action_key.reset(token)
+        keys = [c.kwargs["idempotency_key"] for c in self.backend_post.call_args_list]
+        self.assertEqual(keys, ["chat-1", "chat-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,15 @@
 import os, re
 import json
+import time
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from vanna.openai import OpenAI_Chat
 from vanna.chromadb import ChromaDB_VectorStore
 
+from metrics import REGISTRY, CONTENT_TYPE, Counter, Histogram
+
 load_dotenv()
 
 class MyVanna(ChromaDB_VectorStore, OpenAI_Chat):
@@ -30,6 +34,35 @@ vn.connect_to_postgres(
 
 app = FastAPI(title="Vanna Warehouse", version="1.0")
 
+# Metriken (/metrics, Prometheus-Textformat)
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "vanna_http_request_duration_seconds", "Dauer je Request nach Endpoint", ("method", "route", "status")))
+LLM_CALLS = REGISTRY.register(Counter(
+    "vanna_llm_requests_total", "generate_sql-Aufrufe (outcome=ok|error)", ("outcome",)))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "vanna_llm_request_duration_seconds", "Dauer je generate_sql-Aufruf"))
+SQL_SOURCE = REGISTRY.register(Counter(
+    "vanna_sql_source_total", "Herkunft der SQL (fallback ohne LLM, llm, llm_strict)", ("source",)))
+SQL_LATENCY = REGISTRY.register(Histogram(
+    "vanna_sql_duration_seconds", "Dauer je run_sql", ("outcome",)))
+
+@app.middleware("http")
+async def http_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_LATENCY.observe(time.perf_counter() - t0, method=request.method,
+                             route=getattr(route, "path", "<unmatched>"), status=status)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 class AskRequest(BaseModel):
     question: str
 
@@ -98,19 +131,29 @@ ORDER BY sl.ts DESC
 LIMIT {limit}
 """.strip()
 
+def llm_generate_sql(question: str) -> str:
+    t0 = time.perf_counter()
+    try:
+        sql = vn.generate_sql(question, allow_llm_to_see_data=True) or ""
+    except Exception as e:
+        LLM_CALLS.inc(outcome="error")
+        raise HTTPException(status_code=400, detail=f"LLM-Fehler: {e}")
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - t0)
+    LLM_CALLS.inc(outcome="ok")
+    return sql
+
 def generate_sql_strict(question: str) -> str:
     # 0) expliziter Ledger-Fallback
     fb = ledger_fallback_sql(question)
     if fb:
+        SQL_SOURCE.inc(source="fallback")
         return fb
 
     # 1) normaler Versuch
-    try:
-        s1 = vn.generate_sql(question, allow_llm_to_see_data=True) or ""
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"LLM-Fehler: {e}")
-    s1 = extract_sql(s1)
+    s1 = extract_sql(llm_generate_sql(question))
     if is_safe_select(s1):
+        SQL_SOURCE.inc(source="llm")
         return s1
 
     # 2) harter Prompt
@@ -118,11 +161,8 @@ def generate_sql_strict(question: str) -> str:
         "Gib AUSSCHLIESSLICH SQL zurück. Keine Erklärungen, keine Kommentare. "
         "Beginne mit SELECT oder WITH. Ziel-DB ist PostgreSQL.\n\nFrage: " + question
     )
-    try:
-        s2 = vn.generate_sql(prompt, allow_llm_to_see_data=True) or ""
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"LLM-Fehler: {e}")
-    s2 = extract_sql(s2)
+    s2 = extract_sql(llm_generate_sql(prompt))
+    SQL_SOURCE.inc(source="llm_strict")
     return s2
 
 @app.post("/ask")
@@ -135,10 +175,13 @@ def ask(req: AskRequest):
     if not is_safe_select(sql_clean):
         raise HTTPException(status_code=400, detail=f"Nur SELECT erlaubt. (got: {sql})")
 
+    t0 = time.perf_counter()
     try:
         df = vn.run_sql(sql_clean)
     except Exception as e:
+        SQL_LATENCY.observe(time.perf_counter() - t0, outcome="error")
         raise HTTPException(status_code=400, detail=f"SQL-Fehler: {e}")
+    SQL_LATENCY.observe(time.perf_counter() - t0, outcome="ok")
 
     # 🔧 Make JSON-safe: NaN/NaT -> null, datetimes -> ISO strings
     rows = json.loads(df.to_json(orient="records", date_format="iso"))